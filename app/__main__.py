@@ -5,6 +5,7 @@ import sys
 from logging import getLogger
 from logging.config import dictConfig
 from pathlib import Path
+from typing import Awaitable, Callable
 
 import colorama
 from dotenv import load_dotenv
@@ -13,17 +14,20 @@ from .settings import Settings
 from .run import run
 
 
-def init_logging(log_dir: Path, mode: str) -> None:
+def init_logging(log_dir: Path, mode: str, file_name: str) -> None:
     log_dir.mkdir(parents=True, exist_ok=True)
     log_config_path = Path(f"log_configs/{mode}.json")
     with open(log_config_path) as file:
         config = json.load(file)
         file_handler = config["handlers"]["FileHandler"]
-        file_handler["filename"] = str(log_dir / "log.txt")
+        file_handler["filename"] = str(log_dir / file_name)
         dictConfig(config)
 
 
-def main() -> int:
+def main(
+    entry: Callable[[Settings], Awaitable[None]] = run,
+    log_file_name: str = "log.txt",
+) -> int:
     colorama.init()
     random.seed()
 
@@ -40,11 +44,11 @@ def main() -> int:
         load_dotenv()
 
     settings = Settings()
-    init_logging(settings.log_dir, settings.mode)
+    init_logging(settings.log_dir, settings.mode, log_file_name)
     logger = getLogger(Path(__file__).parent.name)
     try:
         logger.info("Start work ...")
-        asyncio.run(run(settings))
+        asyncio.run(entry(settings))
         logger.info("Work finished.")
     except KeyboardInterrupt:  # Ctrl+C
         logger.warning("Interrupted by user.")
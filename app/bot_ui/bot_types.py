@@ -12,6 +12,7 @@ from aiogram.fsm.storage.base import StateType
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from ..auxiliary_utils import get_thread_id
+from ..http_client import HttpSession
 from ..settings import Settings
 
 
@@ -92,6 +93,7 @@ class BotContext(NamedTuple):
     settings: Settings
     storage: Storage
     session_maker: async_sessionmaker
+    http_session: HttpSession
 
 
 UNICODE_CHARS = "✅🟩🚫"
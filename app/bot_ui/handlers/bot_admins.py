@@ -18,6 +18,7 @@ from ...database.models import YouTubeChannel, Category
 from ...database.utils import (
     delete_category_by_name,
     delete_channel_by_original_id,
+    get_quarantined_channels,
     get_yt_channel_id,
 )
 from ...database.utils import (
@@ -26,8 +27,9 @@ from ...database.utils import (
     delete_yt_channel_category,
     set_telegram_chat_status,
 )
+from ...format_utils import fmt_channel
 from ...settings import MAX_CATEGORY_COUNT
-from ...settings import MAX_TG_COUNT
+from ...settings import MAX_QUARANTINE_COUNT, MAX_TG_COUNT
 from ...youtube_utils import get_channel_info
 
 logger = logging.getLogger(__name__)
@@ -42,7 +44,10 @@ async def add_channel_command(
 ):
     if args := command.args and split_string(command.args, " ", 1):
         try:
-            channel: YouTubeChannel = await get_channel_info(args[0])
+            channel: YouTubeChannel = await get_channel_info(
+                args[0],
+                context.http_session,
+            )
         except aiohttp.ClientError as e:
             logger.error(f"{type(e)} {e}")
             await message.reply("I can't add this channel!")
@@ -89,7 +94,10 @@ async def remove_channel_command(
         if arg := command.args and command.args.strip():
             async with context.session_maker.begin() as session:
                 if arg.startswith("https://"):
-                    channel: YouTubeChannel = await get_channel_info(arg)
+                    channel: YouTubeChannel = await get_channel_info(
+                        arg,
+                        context.http_session,
+                    )
                     channel_id = channel.original_id
                 else:
                     channel_id = arg
@@ -135,6 +143,30 @@ async def remove_category(
         await message.reply("Category name missing!")
 
 
+@router.message(Command(commands=["quarantine"]))
+async def quarantine_command(message: Message, context: BotContext):
+    async with context.session_maker() as session:
+        rows = await get_quarantined_channels(
+            context.settings.quarantine_threshold,
+            session,
+        )
+    if not rows:
+        await message.reply("No quarantined channels.")
+        return
+
+    lines = [f"Quarantined channels: {len(rows)}"]
+    for channel, failure in rows[:MAX_QUARANTINE_COUNT]:
+        lines.append(fmt_channel(channel))
+        lines.append(
+            f"    failed {failure.failure_count} times "
+            f"since {failure.first_failure_time:%Y-%m-%d}, "
+            f"next probe {failure.next_scan_time:%Y-%m-%d %H:%M}"
+        )
+    if len(rows) > MAX_QUARANTINE_COUNT:
+        lines.append("...")
+    await message.reply("\n".join(lines), disable_web_page_preview=True)
+
+
 @router.callback_query(AttachCategoryData.filter(), F.message.as_("message"))
 async def attach_categories_callback(
     query: CallbackQuery,
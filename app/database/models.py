@@ -7,9 +7,14 @@ from sqlalchemy import (
     DateTime,
     String,
     Boolean,
+    Float,
     ForeignKey,
+    Index,
     UniqueConstraint,
     BigInteger,
+    Integer,
+    JSON,
+    text,
 )
 from sqlalchemy.orm import (
     DeclarativeBase,
@@ -20,12 +25,26 @@ from sqlalchemy.orm import (
 
 from ..bot_ui.bot_types import Status
 
-YT_VIDEO_URL_FMT = "https://www.youtube.com/watch?v={id}"
-YT_CHANNEL_URL_FMT = "https://www.youtube.com/channel/{id}"
-YT_CHANNEL_CANONICAL_URL_FMT = "https://www.youtube.com{base_url}"
+YT_BASE_URL = "https://www.youtube.com"
+YT_VIDEO_URL_FMT = YT_BASE_URL + "/watch?v={id}"
+YT_CHANNEL_URL_FMT = YT_BASE_URL + "/channel/{id}"
+YT_FEED_URL_FMT = YT_BASE_URL + "/feeds/videos.xml?channel_id={id}"
+YT_CHANNEL_CANONICAL_URL_FMT = YT_BASE_URL + "{base_url}"
 TG_URL_FMT = "https://t.me/{user_name}"
 
 
+def set_youtube_base_url(base_url: str) -> None:
+    """Point urls of channels and videos to another server
+    (e.g. fake YouTube of load tests)."""
+    global YT_BASE_URL, YT_VIDEO_URL_FMT, YT_CHANNEL_URL_FMT
+    global YT_FEED_URL_FMT, YT_CHANNEL_CANONICAL_URL_FMT
+    YT_BASE_URL = base_url.rstrip("/")
+    YT_VIDEO_URL_FMT = YT_BASE_URL + "/watch?v={id}"
+    YT_CHANNEL_URL_FMT = YT_BASE_URL + "/channel/{id}"
+    YT_FEED_URL_FMT = YT_BASE_URL + "/feeds/videos.xml?channel_id={id}"
+    YT_CHANNEL_CANONICAL_URL_FMT = YT_BASE_URL + "{base_url}"
+
+
 class Base(DeclarativeBase):
     __abstract__ = True
 
@@ -49,6 +68,10 @@ class YouTubeChannel(MappedAsDataclass, Base, unsafe_hash=False, eq=False):
     def url(self) -> str:
         return YT_CHANNEL_URL_FMT.format(id=self.original_id)
 
+    @property
+    def feed_url(self) -> str:
+        return YT_FEED_URL_FMT.format(id=self.original_id)
+
     @property
     def canonical_url(self) -> str:
         return YT_CHANNEL_CANONICAL_URL_FMT.format(
@@ -235,6 +258,8 @@ class Forwarding(MappedAsDataclass, Base, unsafe_hash=False, eq=False):
             "telegram_thread_id",
             name="unique_forwarding",
         ),
+        # forwardings of chat, cascades of chats and threads
+        Index("ix_forwarding_chat", "telegram_chat_id", "telegram_thread_id"),
     )
 
     def __eq__(self, other):
@@ -290,6 +315,184 @@ class YouTubeVideo(MappedAsDataclass, Base, unsafe_hash=False, eq=False):
     )
     url = property(lambda self: YT_VIDEO_URL_FMT.format(id=self.original_id))
 
+    __table_args__ = (
+        # known ids: channel_id IN (...) AND (creation_time >= ... OR live)
+        Index(
+            "ix_videos_channel_creation",
+            "channel_id",
+            "creation_time",
+            postgresql_include=["original_id"],
+        ),
+        Index(
+            "ix_videos_live_24_7",
+            "channel_id",
+            postgresql_include=["original_id"],
+            postgresql_where=text("live_24_7 IS true"),
+            sqlite_where=text("live_24_7 IS true"),
+        ),
+        # known ids of all channels
+        Index("ix_videos_creation_time", "creation_time"),
+    )
+
+    def __hash__(self):
+        return hash(self.original_id)
+
+    def __eq__(self, other):
+        return self.original_id == other.original_id
+
+
+class YouTubeVideoArchive(
+    MappedAsDataclass,
+    Base,
+    unsafe_hash=False,
+    eq=False,
+):
+    """Videos moved out of YouTubeVideos by retention, same columns.
+
+    No foreign key: archived videos outlive deleted channels.
+    """
+
+    __tablename__ = "YouTubeVideosArchive"
+
+    id: Mapped[int] = mapped_column(
+        primary_key=True,
+        autoincrement=False,
+    )
+    original_id: Mapped[str] = mapped_column(
+        String,
+    )
+    scan_time: Mapped[datetime] = mapped_column(
+        DateTime,
+    )
+    channel_id: Mapped[int] = mapped_column(
+        Integer,
+        default=None,
+        nullable=True,
+    )
+    title: Mapped[str] = mapped_column(
+        String,
+        default=None,
+        nullable=True,
+    )
+    style: Mapped[str] = mapped_column(
+        String,
+        default=None,
+        nullable=True,
+    )
+    time_ago: Mapped[str] = mapped_column(
+        String,
+        default=None,
+        nullable=True,
+    )
+    creation_time: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=None,
+        nullable=True,
+    )
+    live_24_7: Mapped[bool] = mapped_column(
+        Boolean,
+        default=False,
+    )
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __eq__(self, other):
+        return self.id == other.id
+
+
+class YouTubeChannelSchedule(
+    MappedAsDataclass,
+    Base,
+    unsafe_hash=False,
+    eq=False,
+):
+    __tablename__ = "YouTubeChannelSchedules"
+
+    channel_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            YouTubeChannel.id,
+            ondelete="CASCADE",
+            onupdate="CASCADE",
+        ),
+        primary_key=True,
+    )
+    next_scan_time: Mapped[datetime] = mapped_column(
+        DateTime,
+    )
+    upload_interval: Mapped[float] = mapped_column(  # seconds, EWMA
+        Float,
+        default=None,
+        nullable=True,
+    )
+    last_upload_time: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=None,
+        nullable=True,
+    )
+
+    def __hash__(self):
+        return hash(self.channel_id)
+
+    def __eq__(self, other):
+        return self.channel_id == other.channel_id
+
+
+class YouTubeChannelFailure(
+    MappedAsDataclass,
+    Base,
+    unsafe_hash=False,
+    eq=False,
+):
+    """Channel failed scans in a row, removed after successful scan."""
+
+    __tablename__ = "YouTubeChannelFailures"
+
+    channel_id: Mapped[int] = mapped_column(
+        ForeignKey(
+            YouTubeChannel.id,
+            ondelete="CASCADE",
+            onupdate="CASCADE",
+        ),
+        primary_key=True,
+    )
+    failure_count: Mapped[int] = mapped_column(
+        Integer,
+    )
+    first_failure_time: Mapped[datetime] = mapped_column(
+        DateTime,
+    )
+    next_scan_time: Mapped[datetime] = mapped_column(  # backoff or probe
+        DateTime,
+    )
+
+    def __hash__(self):
+        return hash(self.channel_id)
+
+    def __eq__(self, other):
+        return self.channel_id == other.channel_id
+
+
+class YouTubeVideoTags(MappedAsDataclass, Base, unsafe_hash=False, eq=False):
+    __tablename__ = "YouTubeVideoTags"
+
+    # YouTubeVideo.original_id, tags are fetched before video is saved
+    original_id: Mapped[str] = mapped_column(
+        String,
+        primary_key=True,
+    )
+    tags: Mapped[list[str]] = mapped_column(
+        JSON,
+    )
+    scan_time: Mapped[datetime] = mapped_column(
+        DateTime,
+    )
+
+    __table_args__ = (
+        # retention
+        Index("ix_video_tags_scan_time", "scan_time"),
+    )
+
     def __hash__(self):
         return hash(self.original_id)
 
@@ -347,6 +550,8 @@ class YTChannelCategory(MappedAsDataclass, Base, unsafe_hash=False, eq=False):
             "channel_id",
             name="unique_yt_tag",
         ),
+        # categories of channel, unique_yt_tag starts with category_id
+        Index("ix_yt_channel_categories_channel", "channel_id"),
     )
 
     def __hash__(self):
@@ -0,0 +1,69 @@
+"""INSERT ... ON CONFLICT of PostgreSQL (and SQLite for tests).
+
+Unique constraints of models are conflict targets, so writes take
+one round trip per batch and can be repeated safely.
+"""
+
+from typing import Any, Sequence
+
+from sqlalchemy import Column
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Base
+
+BATCH_SIZE = 1000  # rows per INSERT, bound parameters are limited by drivers
+
+Row = dict[str, Any]
+
+
+def insert(model: type[Base], session: AsyncSession):
+    """INSERT of the session database dialect."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise NotImplementedError(f"Upsert is not supported by {dialect}")
+
+
+async def insert_ignore(
+    model: type[Base],
+    rows: Sequence[Row],
+    conflict_columns: Sequence[Column],
+    session: AsyncSession,
+    returning: Column | None = None,
+) -> list:
+    """Insert rows, skip ones conflicting with already saved rows.
+
+    Return values of `returning` column of inserted rows.
+    """
+    result = []
+    for i in range(0, len(rows), BATCH_SIZE):
+        q = (
+            insert(model, session)
+            .values(rows[i : i + BATCH_SIZE])
+            .on_conflict_do_nothing(index_elements=conflict_columns)
+        )
+        if returning is None:
+            await session.execute(q)
+        else:
+            result.extend(await session.scalars(q.returning(returning)))
+    return result
+
+
+async def upsert(
+    model: type[Base],
+    rows: Sequence[Row],
+    conflict_columns: Sequence[Column],
+    update_columns: Sequence[str],
+    session: AsyncSession,
+) -> None:
+    """Insert rows, update `update_columns` of already saved ones."""
+    for i in range(0, len(rows), BATCH_SIZE):
+        q = insert(model, session).values(rows[i : i + BATCH_SIZE])
+        q = q.on_conflict_do_update(
+            index_elements=conflict_columns,
+            set_={name: q.excluded[name] for name in update_columns},
+        )
+        await session.execute(q)
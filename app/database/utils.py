@@ -1,8 +1,8 @@
 import logging
 from datetime import datetime, timedelta
-from typing import Optional, TypeAlias
+from typing import NamedTuple, Optional, TypeAlias
 
-from sqlalchemy import true
+from sqlalchemy import literal, true
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.expression import (
     select,
@@ -18,14 +18,21 @@ from .models import (
     TelegramChat,
     Forwarding,
     YouTubeVideo,
+    YouTubeVideoArchive,
     YouTubeChannel,
+    YouTubeChannelSchedule,
+    YouTubeChannelFailure,
+    YouTubeVideoTags,
     Category,
     YTChannelCategory,
     TelegramThread,
     Destination,
 )
+from .upsert import insert, insert_ignore, upsert
 from ..bot_ui.bot_types import Status
 
+ID_BATCH_SIZE = 5000  # bound parameters of IN (...) are limited by drivers
+
 TgToYouTubeChannels: TypeAlias = dict[Destination, list[YouTubeChannel]]
 TgYtToForwarding: TypeAlias = dict[
     tuple[Destination, YouTubeChannel], Forwarding
@@ -68,12 +75,26 @@ async def add_forwarding(
     telegram_thread_id: int | None,
     session: AsyncSession,
 ):
-    f = Forwarding(
-        youtube_channel_id=youtube_channel_id,
-        telegram_chat_id=telegram_chat_id,
-        telegram_thread_id=telegram_thread_id,
+    # NULL thread ids don't conflict in unique constraint,
+    # so the same forwarding is also checked by the statement
+    columns = (
+        Forwarding.youtube_channel_id,
+        Forwarding.telegram_chat_id,
+        Forwarding.telegram_thread_id,
+    )
+    values = (youtube_channel_id, telegram_chat_id, telegram_thread_id)
+    same = [c.is_not_distinct_from(v) for c, v in zip(columns, values)]
+    q = (
+        insert(Forwarding, session)
+        .from_select(
+            [c.key for c in columns],
+            select(
+                *(literal(v, c.type) for c, v in zip(columns, values))
+            ).where(~exists().where(*same)),
+        )
+        .on_conflict_do_nothing(index_elements=columns)
     )
-    await session.merge(f)
+    await session.execute(q)
 
 
 async def delete_forwarding(
@@ -170,37 +191,297 @@ async def get_yt_channels(
     return [(row[0], row[1]) for row in rows]
 
 
+async def get_channel_schedules(
+    channel_ids: list[int],
+    session: AsyncSession,
+) -> dict[int, YouTubeChannelSchedule]:
+    q = select(YouTubeChannelSchedule).where(
+        YouTubeChannelSchedule.channel_id.in_(channel_ids)
+    )
+    schedules = (await session.scalars(q)).all()
+    return {s.channel_id: s for s in schedules}
+
+
+async def save_channel_schedules(
+    schedules: list[YouTubeChannelSchedule],
+    session: AsyncSession,
+) -> None:
+    for schedule in schedules:
+        await session.merge(schedule)
+
+
+async def get_channel_failures(
+    channel_ids: list[int],
+    session: AsyncSession,
+) -> dict[int, YouTubeChannelFailure]:
+    q = select(YouTubeChannelFailure).where(
+        YouTubeChannelFailure.channel_id.in_(channel_ids)
+    )
+    failures = (await session.scalars(q)).all()
+    return {f.channel_id: f for f in failures}
+
+
+async def save_channel_failures(
+    failures: list[YouTubeChannelFailure],
+    session: AsyncSession,
+) -> None:
+    for failure in failures:
+        await session.merge(failure)
+
+
+async def delete_channel_failures(
+    channel_ids: list[int],
+    session: AsyncSession,
+) -> None:
+    if channel_ids:
+        await session.execute(
+            delete(YouTubeChannelFailure).where(
+                YouTubeChannelFailure.channel_id.in_(channel_ids)
+            )
+        )
+
+
+async def get_quarantined_channels(
+    min_failure_count: int,
+    session: AsyncSession,
+) -> list[tuple[YouTubeChannel, YouTubeChannelFailure]]:
+    q = (
+        select(YouTubeChannel, YouTubeChannelFailure)
+        .join(
+            YouTubeChannelFailure,
+            YouTubeChannelFailure.channel_id == YouTubeChannel.id,
+        )
+        .where(YouTubeChannelFailure.failure_count >= min_failure_count)
+        .order_by(YouTubeChannelFailure.first_failure_time)
+    )
+    result = await session.execute(q)
+    return [(row[0], row[1]) for row in result.fetchall()]
+
+
 #  YouTubeVideo
 
 
-async def get_last_video_ids(
-    channel_id: int,
+async def get_known_video_ids(
+    channel_ids: list[int],
     last_days: int,
     session: AsyncSession,
-) -> frozenset[str]:
+) -> dict[int, frozenset[str]]:
+    """Ids of videos saved in the last days and 24/7 streams by channel,
+    for all channels in one query."""
     last_time = datetime.today() - timedelta(days=last_days)
+    q = select(YouTubeVideo.channel_id, YouTubeVideo.original_id).where(
+        YouTubeVideo.channel_id.in_(channel_ids)
+        & (
+            (YouTubeVideo.creation_time >= last_time)
+            | YouTubeVideo.live_24_7.is_(true())
+        )
+    )
+    result = await session.execute(q)
+    known_ids: dict[int, set[str]] = {}
+    for channel_id, original_id in result.fetchall():
+        known_ids.setdefault(channel_id, set()).add(original_id)
+    return {k: frozenset(v) for k, v in known_ids.items()}
+
+
+async def get_video_creation_times(
+    channel_ids: list[int],
+    last_days: int,
+    session: AsyncSession,
+) -> dict[int, dict[str, datetime]]:
+    """Creation times of videos saved in the last days by channel and
+    original id, 24/7 streams are skipped."""
+    last_time = datetime.today() - timedelta(days=last_days)
+    q = select(
+        YouTubeVideo.channel_id,
+        YouTubeVideo.original_id,
+        YouTubeVideo.creation_time,
+    ).where(
+        YouTubeVideo.channel_id.in_(channel_ids)
+        & (YouTubeVideo.creation_time >= last_time)
+        & YouTubeVideo.live_24_7.is_not(true())
+    )
+    result = await session.execute(q)
+    times: dict[int, dict[str, datetime]] = {}
+    for channel_id, original_id, creation_time in result:
+        times.setdefault(channel_id, {})[original_id] = creation_time
+    return times
+
+
+async def get_recent_video_times(
+    last_days: int,
+    session: AsyncSession,
+) -> list[tuple[int, str, datetime | None]]:
+    """Channel id, original id and creation time (None for 24/7 streams)
+    of videos of all channels, like get_known_video_ids."""
+    last_time = datetime.today() - timedelta(days=last_days)
+    q = select(
+        YouTubeVideo.channel_id,
+        YouTubeVideo.original_id,
+        YouTubeVideo.creation_time,
+        YouTubeVideo.live_24_7,
+    ).where(
+        (YouTubeVideo.creation_time >= last_time)
+        | YouTubeVideo.live_24_7.is_(true())
+    )
+    result = await session.execute(q)
+    return [
+        (channel_id, original_id, None if live_24_7 else creation_time)
+        for channel_id, original_id, creation_time, live_24_7 in result
+    ]
+
+
+async def insert_videos(
+    rows: list[dict],
+    session: AsyncSession,
+) -> set[str]:
+    """Insert videos, skip already saved ones (e.g. by concurrent run).
+
+    Return original ids of inserted videos.
+    """
+    inserted = await insert_ignore(
+        YouTubeVideo,
+        rows,
+        [YouTubeVideo.original_id],
+        session,
+        returning=YouTubeVideo.original_id,
+    )
+    return set(inserted)
+
+
+class VideoState(NamedTuple):
+    style: str | None
+    live_24_7: bool
+    creation_time: datetime | None
+
+    def is_recent(self, last_time: datetime) -> bool:
+        """Same condition as in get_known_video_ids."""
+        return self.live_24_7 or (
+            self.creation_time is not None and self.creation_time >= last_time
+        )
+
+
+async def get_video_states(
+    original_ids: list[str],
+    session: AsyncSession,
+    batch_size: int = ID_BATCH_SIZE,
+) -> dict[str, VideoState]:
+    """States of videos already in database, one query per batch of ids."""
+    result = {}
+    for i in range(0, len(original_ids), batch_size):
+        q = select(
+            YouTubeVideo.original_id,
+            YouTubeVideo.style,
+            YouTubeVideo.live_24_7,
+            YouTubeVideo.creation_time,
+        ).where(YouTubeVideo.original_id.in_(original_ids[i : i + batch_size]))
+        for original_id, *state in (await session.execute(q)).fetchall():
+            result[original_id] = VideoState(*state)
+    return result
+
+
+async def mark_streams_live(
+    original_ids: list[str],
+    session: AsyncSession,
+    batch_size: int = ID_BATCH_SIZE,
+) -> None:
+    for i in range(0, len(original_ids), batch_size):
+        await session.execute(
+            update(YouTubeVideo)
+            .where(
+                YouTubeVideo.original_id.in_(original_ids[i : i + batch_size])
+            )
+            .values(style="LIVE", live_24_7=True)
+        )
+
+
+async def get_video_tags_by_ids(
+    original_ids: list[str],
+    session: AsyncSession,
+) -> dict[str, list[str]]:
+    q = select(YouTubeVideoTags).where(
+        YouTubeVideoTags.original_id.in_(original_ids)
+    )
+    return {t.original_id: t.tags for t in (await session.scalars(q)).all()}
+
+
+async def save_video_tags(
+    tags: dict[str, list[str]],
+    session: AsyncSession,
+) -> None:
+    scan_time = datetime.now()
+    await upsert(
+        YouTubeVideoTags,
+        [
+            dict(original_id=k, tags=v, scan_time=scan_time)
+            for k, v in tags.items()
+        ],
+        [YouTubeVideoTags.original_id],
+        ["tags", "scan_time"],
+        session,
+    )
+
+
+async def get_expired_video_ids(
+    last_time: datetime,
+    limit: int,
+    session: AsyncSession,
+) -> list[int]:
+    """Ids of videos created before last_time, except streams
+    (24/7, live or upcoming), which stay on channel pages."""
     q = (
-        select(YouTubeVideo)
+        select(YouTubeVideo.id)
         .where(
-            (YouTubeVideo.channel_id == channel_id)
+            (YouTubeVideo.creation_time < last_time)
+            & YouTubeVideo.live_24_7.is_not(true())
             & (
-                (YouTubeVideo.creation_time >= last_time)
-                | YouTubeVideo.live_24_7.is_(true())
+                YouTubeVideo.style.is_(None)
+                | YouTubeVideo.style.not_in(["LIVE", "UPCOMING"])
             )
         )
-        .order_by(YouTubeVideo.creation_time.desc())
+        .limit(limit)
     )
-    result = await session.execute(q)
-    rows = result.fetchall()
-    return frozenset((row[0].original_id for row in rows))
+    return list(await session.scalars(q))
 
 
-async def get_video_by_original_id(
-    original_id: str,
+async def archive_videos(ids: list[int], session: AsyncSession) -> None:
+    """Copy videos to YouTubeVideosArchive, already copied are skipped."""
+    columns = [c.key for c in YouTubeVideoArchive.__table__.columns]
+    q = (
+        insert(YouTubeVideoArchive, session)
+        .from_select(
+            columns,
+            select(
+                *(YouTubeVideo.__table__.c[name] for name in columns)
+            ).where(YouTubeVideo.id.in_(ids)),
+        )
+        .on_conflict_do_nothing(index_elements=[YouTubeVideoArchive.id])
+    )
+    await session.execute(q)
+
+
+async def delete_videos(ids: list[int], session: AsyncSession) -> None:
+    await session.execute(delete(YouTubeVideo).where(YouTubeVideo.id.in_(ids)))
+
+
+async def delete_expired_video_tags(
+    last_time: datetime,
+    limit: int,
     session: AsyncSession,
-) -> YouTubeVideo | None:
-    q = select(YouTubeVideo).where(YouTubeVideo.original_id == original_id)
-    return await session.scalar(q)
+) -> int:
+    """Delete up to limit tags fetched before last_time, return count."""
+    q = (
+        select(YouTubeVideoTags.original_id)
+        .where(YouTubeVideoTags.scan_time < last_time)
+        .limit(limit)
+    )
+    original_ids = list(await session.scalars(q))
+    if original_ids:
+        await session.execute(
+            delete(YouTubeVideoTags).where(
+                YouTubeVideoTags.original_id.in_(original_ids)
+            )
+        )
+    return len(original_ids)
 
 
 # Telegram
@@ -295,10 +576,12 @@ async def add_yt_channel_category(
     channel_id: int,
     session: AsyncSession,
 ) -> None:
-    yt_category = YTChannelCategory(
-        category_id=category_id, channel_id=channel_id
+    await insert_ignore(
+        YTChannelCategory,
+        [dict(category_id=category_id, channel_id=channel_id)],
+        [YTChannelCategory.category_id, YTChannelCategory.channel_id],
+        session,
     )
-    await session.merge(yt_category)
 
 
 async def delete_yt_channel_category(
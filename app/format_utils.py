@@ -4,15 +4,15 @@ from typing import Iterable
 from string import punctuation
 
 from .message_utils import ScannerMessage, MessageGroups
-from .database.models import YouTubeVideo, YouTubeChannel, Destination
-from .youtube_utils import ScanData
+from .database.models import YouTubeChannel, Destination
+from .youtube_utils import ScanData, ScannedVideo
 
 MAX_TITLE_WIDTH = 30
 PLACEHOLDER = " ..."
 PATTERN = re.compile(rf"[ {re.escape(punctuation)}]+")
 
 
-def fmt_video(v: YouTubeVideo) -> str:
+def fmt_video(v: ScannedVideo) -> str:
     text = shorten(v.title, MAX_TITLE_WIDTH, placeholder=PLACEHOLDER)
     return f'"{text}" {v.url}'
 
@@ -22,7 +22,7 @@ def fmt_channel(c: YouTubeChannel) -> str:
     return f'"{text}" {c.canonical_url}'
 
 
-def fmt_videos(videos: Iterable[YouTubeVideo], indent: str = "") -> str:
+def fmt_videos(videos: Iterable[ScannedVideo], indent: str = "") -> str:
     if not videos:
         return ""
     return indent + f"\n{indent}".join(map(fmt_video, videos))
@@ -46,7 +46,7 @@ def fmt_scan_data(data: ScanData):
     return "\n".join(lines)
 
 
-def fmt_pair(video: YouTubeVideo, tg: Destination) -> str:
+def fmt_pair(video: ScannedVideo, tg: Destination) -> str:
     title = tg.chat.title or tg.chat.first_name
     if tg.thread and tg.thread.title:
         title += "/" + tg.thread.title
@@ -0,0 +1,236 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, AsyncIterator, Mapping
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class HttpCache:
+    """Responses on disk, gzipped bodies are stored by their sha256.
+
+    requests/<key>.json - url, status, headers and body hash of request
+    bodies/<hash>.gz    - body, shared by requests with the same content
+    """
+
+    def __init__(self, cache_dir: Path):
+        self._requests_dir = cache_dir / "requests"
+        self._bodies_dir = cache_dir / "bodies"
+        self._requests_dir.mkdir(parents=True, exist_ok=True)
+        self._bodies_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(url: URL) -> str:
+        query = sorted(url.query.items())
+        canonical = str(url.with_query(query).with_fragment(None))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    async def load(self, url: URL) -> tuple[dict, bytes] | None:
+        return await asyncio.to_thread(self._load, url)
+
+    async def save(
+        self,
+        url: URL,
+        status: int,
+        headers: Mapping[str, str],
+        body: bytes,
+    ) -> None:
+        meta_headers = {k: headers[k] for k in STORED_HEADERS if k in headers}
+        await asyncio.to_thread(self._save, url, status, meta_headers, body)
+
+    def _load(self, url: URL) -> tuple[dict, bytes] | None:
+        path = self._requests_dir / f"{self.make_key(url)}.json"
+        if not path.exists():
+            return None
+        meta = json.loads(path.read_text(encoding="utf-8"))
+        body = gzip.decompress(
+            (self._bodies_dir / f"{meta['body']}.gz").read_bytes()
+        )
+        return meta, body
+
+    def _save(
+        self,
+        url: URL,
+        status: int,
+        headers: dict[str, str],
+        body: bytes,
+    ) -> None:
+        body_hash = hashlib.sha256(body).hexdigest()
+        body_path = self._bodies_dir / f"{body_hash}.gz"
+        if not body_path.exists():
+            _write_atomic(body_path, gzip.compress(body))
+        meta = dict(
+            url=str(url),
+            status=status,
+            headers=headers,
+            body=body_hash,
+        )
+        path = self._requests_dir / f"{self.make_key(url)}.json"
+        _write_atomic(path, json.dumps(meta).encode())
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Readers see the old file or the whole new one, never a part."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class _CachedContent:
+    """Part of aiohttp.StreamReader interface used by scanner."""
+
+    def __init__(self, body: bytes):
+        self._body = body
+        self._pos = 0
+
+    async def read(self, n: int = -1) -> bytes:
+        end = len(self._body) if n < 0 else self._pos + n
+        chunk = self._body[self._pos : end]
+        self._pos += len(chunk)
+        return chunk
+
+    async def readany(self) -> bytes:
+        return await self.read()
+
+    async def iter_chunked(self, n: int) -> AsyncIterator[bytes]:
+        while chunk := await self.read(n):
+            yield chunk
+
+
+class CachedResponse:
+    """Part of aiohttp.ClientResponse interface used by scanner."""
+
+    def __init__(
+        self,
+        url: URL,
+        status: int,
+        headers: Mapping[str, str],
+        body: bytes,
+    ):
+        self.url = url
+        self.status = status
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self.content = _CachedContent(body)
+        self._body = body
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    @property
+    def charset(self) -> str | None:
+        content_type = self.headers.get("Content-Type", "")
+        _, _, charset = content_type.partition("charset=")
+        return charset.strip() or None
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise aiohttp.ClientResponseError(
+                aiohttp.RequestInfo(
+                    self.url, "GET", CIMultiDictProxy(CIMultiDict()), self.url
+                ),
+                (),
+                status=self.status,
+                headers=self.headers,
+            )
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self) -> str:
+        return self._body.decode(self.charset or "utf-8", errors="replace")
+
+    def close(self) -> None:
+        pass
+
+    def release(self) -> None:
+        pass
+
+
+class _RequestContext:
+    def __init__(self, coro):
+        self._coro = coro
+
+    async def __aenter__(self) -> CachedResponse:
+        return await self._coro
+
+    async def __aexit__(self, *args: Any) -> None:
+        pass
+
+
+class CachedSession:
+    """Stand-in for aiohttp.ClientSession with record or replay mode.
+
+    record - requests go to the site, whole responses are saved to cache
+    replay - responses come only from cache after latency seconds,
+             missed ones raise ClientConnectionError
+    """
+
+    def __init__(
+        self,
+        http_session: aiohttp.ClientSession,
+        cache: HttpCache,
+        mode: str,
+        latency: float = 0,
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Wrong http cache mode: {mode}")
+        self._http_session = http_session
+        self._cache = cache
+        self._mode = mode
+        self._latency = latency
+
+    def get(
+        self,
+        url: str | URL,
+        params: Mapping[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> _RequestContext:
+        full_url = URL(url)
+        if params:
+            full_url = full_url.update_query(
+                {k: str(v) for k, v in params.items()}
+            )
+        return _RequestContext(self._get(full_url, **kwargs))
+
+    async def _get(self, url: URL, **kwargs: Any) -> CachedResponse:
+        if self._mode == "replay":
+            if self._latency > 0:
+                await asyncio.sleep(self._latency)
+            if (cached := await self._cache.load(url)) is None:
+                raise aiohttp.ClientConnectionError(f"Not in cache: {url}")
+            meta, body = cached
+            return CachedResponse(url, meta["status"], meta["headers"], body)
+
+        kwargs.pop("headers", None)  # whole responses only, not 304
+        async with self._http_session.get(url, **kwargs) as r:
+            body = await r.read()
+            if r.status < 500:
+                await self._cache.save(url, r.status, r.headers, body)
+            return CachedResponse(url, r.status, r.headers, body)
+
+    @property
+    def closed(self) -> bool:
+        return self._http_session.closed
+
+    async def close(self) -> None:
+        await self._http_session.close()
+
+    async def __aenter__(self) -> "CachedSession":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
@@ -0,0 +1,43 @@
+from typing import TypeAlias
+
+import aiohttp
+
+from .http_cache import CachedResponse, CachedSession, HttpCache
+from .settings import Settings
+
+HttpSession: TypeAlias = aiohttp.ClientSession | CachedSession
+HttpResponse: TypeAlias = aiohttp.ClientResponse | CachedResponse
+
+HEADERS = {"Accept-Language": "en-US,en;q=0.5"}
+
+
+def create_http_session(settings: Settings) -> HttpSession:
+    """Long-lived session for all YouTube traffic.
+
+    Keeps connections alive between requests, so the whole scan
+    pays for TCP+TLS handshakes and DNS lookups only once per connection.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=settings.http_pool_size,
+        limit_per_host=settings.http_pool_size_per_host,
+        ttl_dns_cache=settings.dns_cache_ttl,
+        use_dns_cache=True,
+        keepalive_timeout=settings.keepalive_timeout,
+    )
+    timeout = aiohttp.ClientTimeout(
+        sock_connect=settings.connect_timeout,
+        sock_read=settings.read_timeout,
+    )
+    http_session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout,
+        headers=HEADERS,
+    )
+    if settings.http_cache_mode == "off":
+        return http_session
+    return CachedSession(
+        http_session,
+        HttpCache(settings.http_cache_dir),
+        settings.http_cache_mode,
+        settings.http_cache_latency,
+    )
@@ -0,0 +1,112 @@
+import pickle
+from datetime import datetime, timedelta
+from logging import getLogger
+from typing import Iterable
+
+import redis.asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database.utils import get_recent_video_times
+from .youtube_utils import ScannedVideo
+
+logger = getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+class KnownVideoIndex:
+    """Ids of videos saved in the last days (and 24/7 streams) by channel.
+
+    The same set as get_known_video_ids returns, but kept in memory:
+    built from database once, then updated with saved videos.
+    Snapshot in Redis makes restarts warm. A stale snapshot only misses
+    ids, and missed ones are still looked up in database.
+    """
+
+    def __init__(self, last_days: int):
+        self._last_days = last_days
+        # channel id -> original id -> creation time, None - 24/7 stream
+        self._channels: dict[int, dict[str, datetime | None]] = {}
+
+    def __len__(self) -> int:
+        return sum(map(len, self._channels.values()))
+
+    def get(self, channel_id: int) -> frozenset[str]:
+        return frozenset(self._channels.get(channel_id, ()))
+
+    def contains(self, channel_id: int, original_id: str) -> bool:
+        return original_id in self._channels.get(channel_id, ())
+
+    def add(
+        self,
+        channel_id: int,
+        original_id: str,
+        creation_time: datetime | None,
+    ) -> None:
+        self._channels.setdefault(channel_id, {})[original_id] = creation_time
+
+    def add_videos(self, videos: Iterable[ScannedVideo]) -> None:
+        for video in videos:
+            assert video.channel_id is not None
+            self.add(
+                video.channel_id,
+                video.original_id,
+                None if video.live_24_7 else video.creation_time,
+            )
+
+    def prune(self, now: datetime) -> int:
+        """Forget videos older than last days, return their count."""
+        last_time = now - timedelta(days=self._last_days)
+        count = 0
+        for channel_id, times in list(self._channels.items()):
+            old_ids = [
+                original_id
+                for original_id, creation_time in times.items()
+                if creation_time is not None and creation_time < last_time
+            ]
+            for original_id in old_ids:
+                del times[original_id]
+            count += len(old_ids)
+            if not times:
+                del self._channels[channel_id]
+        return count
+
+    async def build(self, session: AsyncSession) -> None:
+        self._channels.clear()
+        rows = await get_recent_video_times(self._last_days, session)
+        for channel_id, original_id, creation_time in rows:
+            self.add(channel_id, original_id, creation_time)
+        logger.info(f"Known video index built: {len(self)} videos")
+
+    async def save(
+        self,
+        redis_client: redis.asyncio.Redis,
+        key: str,
+    ) -> None:
+        await redis_client.set(
+            key,
+            pickle.dumps((SNAPSHOT_VERSION, self._channels)),
+        )
+
+    async def load(
+        self,
+        redis_client: redis.asyncio.Redis,
+        key: str,
+    ) -> bool:
+        """Load snapshot, False if there is no usable one."""
+        if not (dump := await redis_client.get(key)):
+            return False
+        try:
+            version, channels = pickle.loads(dump)
+        except Exception as e:
+            logger.warning(f"Wrong known video snapshot: {type(e)} {e}")
+            return False
+        if version != SNAPSHOT_VERSION:
+            return False
+        self._channels = channels
+        pruned = self.prune(datetime.now())
+        logger.info(
+            f"Known video index loaded: {len(self)} videos "
+            f"({pruned} expired)"
+        )
+        return True
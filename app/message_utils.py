@@ -1,22 +1,22 @@
 from dataclasses import dataclass
 from typing import Iterable
 
-from .database.models import Destination, YouTubeVideo, YouTubeChannel
+from .database.models import Destination, YouTubeChannel
 from .database.utils import TgToYouTubeChannels
-from .youtube_utils import ScanData
+from .youtube_utils import ScanData, ScannedVideo
 
 
 @dataclass
 class ScannerMessage:
     destination: Destination
-    youtube_video: YouTubeVideo
+    youtube_video: ScannedVideo
     youtube_channel_title: str
     tags: list[str]
 
 
 MessageGroup = list[ScannerMessage]
 MessageGroups = list[MessageGroup]
-TgToYouTubeVideos = dict[Destination, list[YouTubeVideo]]
+TgToYouTubeVideos = dict[Destination, list[ScannedVideo]]
 
 
 def get_tg_to_yt_videos(
@@ -25,7 +25,7 @@ def get_tg_to_yt_videos(
 ) -> TgToYouTubeVideos:
     tg_to_yt_videos = {}
     for tg, channels in tg_to_yt_channels.items():
-        videos: list[YouTubeVideo] = []
+        videos: list[ScannedVideo] = []
         for channel in channels:
             videos.extend(scan_data.get(channel, []))
         tg_to_yt_videos[tg] = sorted(videos, key=lambda v: v.creation_time)
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import redis.asyncio
+
+
+class RateLimiter:
+    """Token bucket shared by all scan workers.
+
+    Tokens are refilled at `rate` per second up to `capacity`,
+    every request to youtube.com takes one token.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        if rate <= 0:
+            raise ValueError("Rate must be positive!")
+        self._rate = rate
+        self._capacity = max(capacity, 1)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:  # waiters are served in FIFO order
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+                self._refill()
+            self._tokens -= 1
+
+    async def __aenter__(self) -> "RateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+
+# Takes a token, the bucket may go negative: callers reserve their turns
+# and wait for them, so all processes are served at `rate` in total.
+# Time of Redis server is used, clocks of workers don't matter.
+_ACQUIRE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local t = redis.call("TIME")
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call("HMGET", KEYS[1], "tokens", "updated")
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+tokens = tokens - 1
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens),
+           "updated", tostring(now))
+local wait = math.max(0, -tokens) / rate
+redis.call("PEXPIRE", KEYS[1],
+           math.ceil((wait + capacity / rate) * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisRateLimiter:
+    """Token bucket in Redis, shared by the bot and scan worker processes.
+
+    Same interface as RateLimiter.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.asyncio.Redis,
+        key: str,
+        rate: float,
+        capacity: float = 1,
+    ):
+        if rate <= 0:
+            raise ValueError("Rate must be positive!")
+        self._key = key
+        self._rate = rate
+        self._capacity = max(capacity, 1)
+        self._script = redis_client.register_script(_ACQUIRE_SCRIPT)
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    async def acquire(self) -> None:
+        wait = float(
+            await self._script(
+                keys=[self._key],
+                args=[self._rate, self._capacity],
+            )
+        )
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def __aenter__(self) -> "RedisRateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        pass
@@ -0,0 +1,80 @@
+"""Retention of saved videos and tags.
+
+Only videos of the last LAST_DAYS_IN_DB days and streams are needed to
+skip known videos, older ones are moved to YouTubeVideosArchive (or
+deleted) in small batches, each in its own short transaction, so
+YouTubeVideos and its indexes don't grow while the scanner keeps writing.
+
+YouTubeVideos isn't partitioned by time: unique original_id, the conflict
+target of inserts, would have to include the partition key, and creation
+time of a video isn't stable (estimated from "time ago" on every scan).
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from logging import getLogger
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .database.utils import (
+    archive_videos,
+    delete_expired_video_tags,
+    delete_videos,
+    get_expired_video_ids,
+)
+from .settings import LAST_DAYS_IN_DB, Settings
+
+logger = getLogger(__name__)
+
+BATCH_DELAY = 0.1  # seconds between batches, lets other queries in
+
+
+def retention_time(settings: Settings, now: datetime) -> datetime:
+    """Creation time videos older than expire, never within
+    LAST_DAYS_IN_DB."""
+    days = max(settings.video_retention_days, LAST_DAYS_IN_DB)
+    return now - timedelta(days=days)
+
+
+async def expire_videos(
+    session_maker: async_sessionmaker,
+    settings: Settings,
+    now: datetime | None = None,
+) -> tuple[int, int]:
+    """Archive (or delete) expired videos, delete expired tags.
+
+    Return counts of expired videos and tags.
+    """
+    last_time = retention_time(settings, now or datetime.now())
+    batch_size = settings.retention_batch_size
+    video_count = 0
+    while True:
+        async with session_maker() as session:
+            ids = await get_expired_video_ids(last_time, batch_size, session)
+            if not ids:
+                break
+            if settings.archive_videos:
+                await archive_videos(ids, session)
+            await delete_videos(ids, session)
+            await session.commit()
+        video_count += len(ids)
+        await asyncio.sleep(BATCH_DELAY)
+
+    tag_count = 0
+    while True:
+        async with session_maker() as session:
+            count = await delete_expired_video_tags(
+                last_time, batch_size, session
+            )
+            await session.commit()
+        tag_count += count
+        if count < batch_size:
+            break
+        await asyncio.sleep(BATCH_DELAY)
+
+    logger.info(
+        f"Expired videos before {last_time:%Y-%m-%d}: {video_count} "
+        f"({'archived' if settings.archive_videos else 'deleted'}), "
+        f"tags: {tag_count}"
+    )
+    return video_count, tag_count
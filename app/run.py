@@ -1,14 +1,15 @@
 import asyncio
 import itertools
 import pickle
-import random
 import subprocess
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 from logging import getLogger
-from typing import Sequence
+from typing import Callable, Coroutine, Sequence
 
-import aiohttp
 from aiogram import Bot, Dispatcher
 from aiogram.filters import or_f
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -23,26 +24,57 @@ from sqlalchemy.ext.asyncio import (
 from .bot_ui.bot_types import BotContext, Storage
 from .bot_ui.filers import ChatAdminFilter, BotAdminFilter, PrivateChatFilter
 from .bot_ui.handlers import chat_admins, bot_admins
-from .database.models import YouTubeChannel, YouTubeVideo
+from .database.models import (
+    YouTubeChannel,
+    YouTubeChannelFailure,
+    set_youtube_base_url,
+)
 from .database.utils import (
+    TgToYouTubeChannels,
+    delete_channel_failures,
+    get_channel_failures,
+    get_channel_schedules,
     get_forwarding_data,
-    get_last_video_ids,
-    get_video_by_original_id,
+    get_known_video_ids,
+    get_video_creation_times,
+    get_video_states,
+    insert_videos,
+    mark_streams_live,
+    save_channel_failures,
+    save_channel_schedules,
 )
 from .format_utils import fmt_scan_data, fmt_groups, fmt_channel
+from .http_client import create_http_session
+from .known_ids import KnownVideoIndex
 from .message_utils import get_tg_to_yt_videos, make_message_groups
+from .retention import expire_videos
+from .scan_queue import QueueKeys, scan_distributed
+from .scheduling import (
+    is_due,
+    is_quarantined,
+    order_by_fan_out,
+    update_failures,
+    update_schedules,
+)
 from .send_worker import send_worker
 from .settings import Settings, LAST_DAYS_IN_DB, LAST_DAYS_ON_PAGE, MY_COMMANDS
-from .youtube_parser import search
+from .video_tags import VideoTagStore
+from .youtube_parser import json_backend
+from .youtube_parser.youtube_parser import path_cache_stats
 from .youtube_utils import (
-    get_channel_data,
+    ScanContext,
     ScanData,
+    ScannedVideo,
     YouTubeChannelData,
-    get_video_tags,
+    create_parse_executor,
+    create_scan_context,
+    try_scan_channel,
 )
 
 logger = getLogger(__name__)
 
+_background_tasks: set[asyncio.Task] = set()
+
 
 async def upgrade_database(attempts=6, delay=10) -> None:
     for i in range(attempts):
@@ -84,151 +116,464 @@ async def run(settings: Settings) -> None:
     dp.include_router(bot_admins.router)
     dp.include_router(chat_admins.router)
 
-    context = BotContext(settings, Storage(), session_maker)
-    logger.info("Create scheduler ...")
-    scheduler = AsyncIOScheduler(timezone=settings.tz)
-    trigger = CronTrigger.from_crontab(
-        settings.cron_schedule,
-        timezone=settings.tz,
-    )
-    scheduler.add_job(
-        update,
-        args=(session_maker, settings),
-        trigger=trigger,
-    )
-    scheduler.start()
-
-    logger.info("Run tasks ...")
-    dp.startup.register(on_startup)
-    tasks = [
-        dp.start_polling(bot, context=context),
-        send_worker(settings, bot),
-    ]
-    await asyncio.gather(*tasks)
-
-
-async def update(session_maker, settings: Settings) -> None:
+    backend = json_backend.set_backend(settings.json_backend)
+    logger.info(f"JSON backend: {backend}")
+    set_youtube_base_url(settings.youtube_base_url)
+    executor = create_parse_executor(settings)
+    with executor or nullcontext():
+        async with (
+            create_http_session(settings) as http_session,
+            # request rate is shared with scan workers through Redis
+            from_url(settings.redis_url)
+            if settings.distributed_scan
+            else nullcontext() as rate_redis_client,
+        ):
+            context = BotContext(
+                settings, Storage(), session_maker, http_session
+            )
+            scan_context = create_scan_context(
+                settings,
+                http_session,
+                executor,
+                rate_redis_client,
+            )
+            tag_store = None
+            if settings.parse_tags:
+                tag_store = VideoTagStore(
+                    session_maker,
+                    scan_context,
+                    settings.tag_cache_size,
+                    settings.tag_concurrency,
+                )
+            known_index = None
+            if settings.known_ids_index:
+                known_index = await create_known_index(session_maker, settings)
+            logger.info("Create scheduler ...")
+            scheduler = AsyncIOScheduler(timezone=settings.tz)
+            trigger = CronTrigger.from_crontab(
+                settings.cron_schedule,
+                timezone=settings.tz,
+            )
+            scheduler.add_job(
+                update,
+                args=(
+                    session_maker,
+                    settings,
+                    scan_context,
+                    tag_store,
+                    known_index,
+                ),
+                trigger=trigger,
+            )
+            if settings.video_retention_days:
+                scheduler.add_job(
+                    expire_videos,
+                    args=(session_maker, settings),
+                    trigger=CronTrigger.from_crontab(
+                        settings.retention_schedule,
+                        timezone=settings.tz,
+                    ),
+                )
+            scheduler.start()
+
+            logger.info("Run tasks ...")
+            dp.startup.register(on_startup)
+            tasks = [
+                dp.start_polling(bot, context=context),
+                send_worker(settings, bot),
+            ]
+            await asyncio.gather(*tasks)
+
+
+async def update(
+    session_maker,
+    settings: Settings,
+    scan_context: ScanContext,
+    tag_store: VideoTagStore | None = None,
+    known_index: KnownVideoIndex | None = None,
+) -> None:
     logger.info("Updating ...")
+    now = datetime.now()
 
     async with session_maker() as session:
         f_data = await get_forwarding_data(session)
         tg_to_yt_channels, tg_yt_to_forwarding = f_data
 
-        youtube_channels = list(
-            set(itertools.chain.from_iterable(tg_to_yt_channels.values()))
+        youtube_channels = order_by_fan_out(tg_to_yt_channels)
+        schedules = {}
+        if settings.adaptive_schedule:
+            schedules = await get_channel_schedules(
+                [c.id for c in youtube_channels],  # noqa
+                session,
+            )
+        failures = await get_channel_failures(
+            [c.id for c in youtube_channels],  # noqa
+            session,
         )
-        if not settings.mode != "dev":
-            random.shuffle(youtube_channels)
+        due_channels = [
+            c
+            for c in youtube_channels
+            if is_due(schedules.get(c.id), now)
+            and is_due(failures.get(c.id), now)
+        ]
+        # healthy channels first, failing ones are probed after them
+        due_channels.sort(key=lambda c: c.id in failures)
 
         logger.info("Scan youtube channels ...")
-        logger.info(f"Channel count {len(youtube_channels)}")
+        logger.info(
+            f"Channel count {len(due_channels)}/{len(youtube_channels)}"
+        )
 
-        scan_data = await scan_youtube_channels(
-            youtube_channels,
-            settings.request_delay,
+        known_ids = {}
+        if settings.incremental_scan and known_index is not None:
+            known_ids = {
+                c.id: known_index.get(c.id)  # noqa
+                for c in due_channels
+            }
+        elif settings.incremental_scan:
+            known_ids = await get_known_video_ids(
+                [c.id for c in due_channels],  # noqa
+                LAST_DAYS_IN_DB,
+                session,
+            )
+
+        if settings.distributed_scan:
+            async with from_url(settings.redis_url) as redis_client:
+                scan_data = await scan_distributed(
+                    due_channels,
+                    known_ids,
+                    redis_client,
+                    QueueKeys(settings.scan_queue_prefix),
+                    settings.scan_max_attempts,
+                    settings.scan_timeout,
+                )
+        else:
+            scan_data = await scan_youtube_channels(
+                due_channels,
+                scan_context,
+                settings.scan_concurrency,
+                known_ids,
+            )
+        await _save_failures(
+            due_channels,
+            scan_data,
+            failures,
+            now,
+            settings,
+            session,
         )
+        if settings.adaptive_schedule:
+            video_times = await get_video_creation_times(
+                [
+                    c.id  # noqa
+                    for c in scan_data
+                    if c.id not in schedules
+                    or schedules[c.id].upload_interval is None
+                ],
+                LAST_DAYS_IN_DB,
+                session,
+            )
+            await save_channel_schedules(
+                update_schedules(
+                    scan_data, schedules, now, settings, video_times
+                ),
+                session,
+            )
+            await session.commit()
 
         logger.info("Search new videos ...")
         new_data = await filter_data_by_time(scan_data)
-        new_data = await filter_data_by_id(new_data, session)
-        new_videos: frozenset[YouTubeVideo] = frozenset(
+        new_data = await filter_data_by_id(new_data, session, known_index)
+        await session.commit()  # streams marked as 24/7
+        new_videos: frozenset[ScannedVideo] = frozenset(
             itertools.chain.from_iterable(list(new_data.values()))
         )
 
-        tags = {}
-        if settings.parse_tags:
-            logger.info("Parse tags of videos ...")
-            for video in new_videos:
-                tags[video.original_id] = await get_video_tags(video.url)
-                await asyncio.sleep(settings.request_delay)
-
         logger.info(f"New videos: {len(new_videos)}")
         if new_videos:
-            logger.info(fmt_scan_data(new_data))
-
-            logger.info("Make message groups ...")
-            tg_to_yt_videos = get_tg_to_yt_videos(new_data, tg_to_yt_channels)
-            groups = make_message_groups(
-                tg_to_yt_videos,
-                youtube_channels,
-                tags,
-            )
-            logger.info("Messages:\n" + fmt_groups(groups, " " * 4))
-
-            dumps = [pickle.dumps(group) for group in groups]
-            async with from_url(settings.redis_url) as redis_client:
-                await redis_client.rpush(settings.redis_queue, *dumps)
-
             logger.info("Save new videos to database ...")
             try:
-                session.add_all(new_videos)
+                inserted = await insert_videos(
+                    [v.to_row() for v in new_videos],
+                    session,
+                )
+                if len(inserted) < len(new_videos):
+                    logger.info(f"Inserted videos: {len(inserted)}")
+                # videos saved by concurrent run are sent by it
+                new_data, _ = _split_scan_data(
+                    new_data,
+                    lambda v: v.original_id in inserted,
+                )
+                # committed only after messages are queued: if queueing
+                # fails, videos stay new and are sent next time
+                wait_data = await _push_new_videos(
+                    new_data,
+                    inserted,
+                    tg_to_yt_channels,
+                    youtube_channels,
+                    tag_store,
+                    settings,
+                )
                 await session.commit()
             except Exception as e:
                 logger.exception(e)
+                await session.rollback()
+            else:
+                if known_index is not None:
+                    known_index.add_videos(new_videos)
+                if any(wait_data.values()):
+                    assert tag_store is not None
+                    logger.info("Parse tags of videos in background ...")
+                    _run_in_background(
+                        push_message_groups_with_tags(
+                            wait_data,
+                            tg_to_yt_channels,
+                            youtube_channels,
+                            tag_store,
+                            settings,
+                        )
+                    )
+
+        if known_index is not None:
+            await _save_known_index(known_index, now, settings)
         logger.info("Updating finished.")
 
 
+async def _push_new_videos(
+    new_data: ScanData,
+    inserted: set[str],
+    tg_to_yt_channels: TgToYouTubeChannels,
+    youtube_channels: Sequence[YouTubeChannel],
+    tag_store: VideoTagStore | None,
+    settings: Settings,
+) -> ScanData:
+    """Queue messages about new videos with known tags.
+
+    Return videos waiting for tags, they are queued in background once
+    the videos are committed.
+    """
+    if not inserted:
+        return {}
+    logger.info(fmt_scan_data(new_data))
+
+    tags = {}
+    ready_data: ScanData = new_data
+    wait_data: ScanData = {}  # videos waiting for tags
+    if tag_store is not None:
+        tags = await tag_store.get_known(inserted)
+        ready_data, wait_data = _split_scan_data(
+            new_data,
+            lambda v: v.original_id in tags,
+        )
+    logger.info("Make message groups ...")
+    await push_message_groups(
+        ready_data,
+        tg_to_yt_channels,
+        youtube_channels,
+        tags,
+        settings,
+    )
+    return wait_data
+
+
+async def create_known_index(
+    session_maker,
+    settings: Settings,
+) -> KnownVideoIndex:
+    """Index from Redis snapshot or, if there is none, from database."""
+    known_index = KnownVideoIndex(LAST_DAYS_IN_DB)
+    async with from_url(settings.redis_url) as redis_client:
+        if await known_index.load(redis_client, settings.known_ids_key):
+            return known_index
+    async with session_maker() as session:
+        await known_index.build(session)
+    return known_index
+
+
+async def _save_known_index(
+    known_index: KnownVideoIndex,
+    now: datetime,
+    settings: Settings,
+) -> None:
+    known_index.prune(now)
+    try:
+        async with from_url(settings.redis_url) as redis_client:
+            await known_index.save(redis_client, settings.known_ids_key)
+    except Exception as e:
+        logger.exception(e)
+
+
+async def _save_failures(
+    channels: Sequence[YouTubeChannel],
+    scan_data: ScanData,
+    failures: dict[int, YouTubeChannelFailure],
+    now: datetime,
+    settings: Settings,
+    session: AsyncSession,
+) -> None:
+    """Back off channels which failed to scan, quarantine persistent ones."""
+    if not scan_data and len(channels) > 1:
+        logger.warning("No channel scanned, failures are not counted.")
+        return
+    failed, recovered = update_failures(
+        channels,
+        scan_data,
+        failures,
+        now,
+        settings,
+    )
+    channel_by_id = {c.id: c for c in channels}
+    for failure in failed:
+        if failure.failure_count == settings.quarantine_threshold:
+            channel = channel_by_id[failure.channel_id]
+            logger.warning(f"Channel quarantined {fmt_channel(channel)}")
+    await save_channel_failures(failed, session)
+    await delete_channel_failures(recovered, session)
+    await session.commit()
+    quarantined = sum(is_quarantined(f, settings) for f in failed)
+    logger.info(
+        f"Failed channels: {len(failed)} (quarantined {quarantined}), "
+        f"recovered: {len(recovered)}"
+    )
+
+
+def _run_in_background(coro: Coroutine) -> None:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)  # keep reference until done
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _split_scan_data(
+    scan_data: ScanData,
+    predicate: Callable[[ScannedVideo], bool],
+) -> tuple[ScanData, ScanData]:
+    """Videos for which predicate is true and the rest."""
+    true_data: ScanData = {}
+    false_data: ScanData = {}
+    for channel, data in scan_data.items():
+        for target, value in ((true_data, True), (false_data, False)):
+            target[channel] = YouTubeChannelData(
+                videos=[v for v in data.videos if predicate(v) == value],
+                streams=[v for v in data.streams if predicate(v) == value],
+            )
+    return true_data, false_data
+
+
+async def push_message_groups(
+    scan_data: ScanData,
+    tg_to_yt_channels: TgToYouTubeChannels,
+    youtube_channels: Sequence[YouTubeChannel],
+    tags: dict[str, list[str]],
+    settings: Settings,
+) -> None:
+    tg_to_yt_videos = get_tg_to_yt_videos(scan_data, tg_to_yt_channels)
+    groups = make_message_groups(tg_to_yt_videos, youtube_channels, tags)
+    if not groups:
+        return
+    logger.info("Messages:\n" + fmt_groups(groups, " " * 4))
+    dumps = [pickle.dumps(group) for group in groups]
+    async with from_url(settings.redis_url) as redis_client:
+        await redis_client.rpush(settings.redis_queue, *dumps)
+
+
+async def push_message_groups_with_tags(
+    scan_data: ScanData,
+    tg_to_yt_channels: TgToYouTubeChannels,
+    youtube_channels: Sequence[YouTubeChannel],
+    tag_store: VideoTagStore,
+    settings: Settings,
+) -> None:
+    """Fetch tags of videos, then send messages about them."""
+    try:
+        videos = itertools.chain.from_iterable(scan_data.values())
+        tags = await tag_store.fetch(videos)
+    except Exception as e:
+        logger.exception(e)
+        tags = {}
+    try:
+        await push_message_groups(
+            scan_data,
+            tg_to_yt_channels,
+            youtube_channels,
+            tags,
+            settings,
+        )
+    except Exception as e:
+        logger.exception(e)
+        lost = [v.original_id for data in scan_data.values() for v in data]
+        logger.error(f"Messages about saved videos are lost: {lost}")
+
+
+async def _measure_loop_lag(lags: list[float], interval: float = 0.1):
+    while True:
+        start_time = time.monotonic()
+        await asyncio.sleep(interval)
+        lags.append(time.monotonic() - start_time - interval)
+
+
 async def scan_youtube_channels(
     channels: Sequence[YouTubeChannel],
-    request_delay: float,
+    context: ScanContext,
+    concurrency: int,
+    known_ids: dict[int, frozenset[str]] | None = None,
 ) -> ScanData:
+    """Scan channels by concurrency workers.
+
+    known_ids are ids of videos already in database by channel id,
+    pages are parsed only up to them.
+    """
+    known_ids = known_ids or {}
     result = {}
+    latencies: list[float] = []
+    queue: asyncio.Queue[tuple[int, YouTubeChannel]] = asyncio.Queue()
     for i, channel in enumerate(channels, start=1):
-        logger.debug(f"{i}/{len(channels)} " + fmt_channel(channel))
-        try:
-            result[channel] = await get_channel_data(channel)
-        except (aiohttp.ClientConnectorError, asyncio.TimeoutError) as e:
-            logger.error(
-                f"Scan error {channel.title}\n{channel.url}\n{type(e)}"
+        queue.put_nowait((i, channel))
+
+    async def worker() -> None:
+        while not queue.empty():
+            i, channel = queue.get_nowait()
+            logger.debug(f"{i}/{len(channels)} " + fmt_channel(channel))
+            channel_start_time = time.monotonic()
+            data = await try_scan_channel(
+                channel,
+                context,
+                known_ids.get(channel.id, frozenset()),  # noqa
             )
-        except search.SearchError:
-            logger.exception(f"Search error {channel.title}\n{channel.url}")
-        except Exception as e:
-            logger.exception(e)
-        await asyncio.sleep(request_delay)
-    logger.debug("Scan done!")
+            latencies.append(time.monotonic() - channel_start_time)
+            if data is not None:
+                result[channel] = data
+
+    lags: list[float] = [0]
+    lag_task = asyncio.create_task(_measure_loop_lag(lags))
+    start_hits, start_misses = path_cache_stats()
+    start_time = time.monotonic()
+    worker_count = max(1, min(concurrency, len(channels)))
+    await asyncio.gather(*(worker() for _ in range(worker_count)))
+    elapsed = time.monotonic() - start_time
+    lag_task.cancel()
+    throughput = len(channels) / elapsed if elapsed > 0 else 0
+    latency = sum(latencies) / len(latencies) if latencies else 0
+    logger.info(
+        f"Scan done! {len(result)}/{len(channels)} channels "
+        f"in {elapsed:.1f}s ({throughput:.2f} channels/s, "
+        f"{latency:.2f}s per channel, "
+        f"max event loop lag {max(lags) * 1000:.0f}ms)"
+    )
+    # counters of pool processes aren't seen here
+    if not isinstance(context.executor, ProcessPoolExecutor):
+        hits, misses = path_cache_stats()
+        hits, misses = hits - start_hits, misses - start_misses
+        logger.info(f"Path cache hits: {hits}/{hits + misses}")
     return result
 
 
 def filter_videos_by_time(
-    vs: list[YouTubeVideo],
+    vs: list[ScannedVideo],
     last_time: datetime,
-) -> list[YouTubeVideo]:
+) -> list[ScannedVideo]:
     return list(filter(lambda v: v.creation_time >= last_time, vs))
 
 
-async def filter_videos_by_id(
-    videos: list[YouTubeVideo],
-    last_ids: frozenset[str],
-) -> list[YouTubeVideo]:
-    result = []
-    for video in videos:
-        if video.original_id not in last_ids:
-            result.append(video)
-    return result
-
-
-async def filter_streams_by_id(
-    streams: list[YouTubeVideo],
-    last_ids: frozenset[str],
-    session: AsyncSession,
-) -> list[YouTubeVideo]:
-    result = []
-    for stream in streams:
-        if stream.original_id not in last_ids:
-            if exist_stream := await get_video_by_original_id(
-                stream.original_id,
-                session,
-            ):
-                if "LIVE" in (stream.style, exist_stream.style):
-                    exist_stream.style = "LIVE"
-                    exist_stream.live_24_7 = True
-                    await session.merge(exist_stream)
-            else:
-                result.append(stream)
-    return result
-
-
 async def filter_data_by_time(scan_data: ScanData) -> ScanData:
     new_data: ScanData = {}
     last_time = datetime.today() - timedelta(days=LAST_DAYS_ON_PAGE)
@@ -243,27 +588,61 @@ async def filter_data_by_time(scan_data: ScanData) -> ScanData:
 async def filter_data_by_id(
     scan_data: ScanData,
     session: AsyncSession,
+    known_index: KnownVideoIndex | None = None,
 ) -> ScanData:
+    """Only videos not in database, looked up all at once.
+
+    Videos from known_index are skipped without database, found recent
+    ones are added to it. Streams saved long ago are marked as 24/7
+    if they are or were live, so they stay known.
+    """
+
+    def is_known(v: ScannedVideo) -> bool:
+        assert v.channel_id is not None
+        return known_index is not None and known_index.contains(
+            v.channel_id, v.original_id
+        )
+
+    unknown_data = {
+        channel: YouTubeChannelData(
+            videos=[v for v in data.videos if not is_known(v)],
+            streams=[v for v in data.streams if not is_known(v)],
+        )
+        for channel, data in scan_data.items()
+        if data
+    }
+    states = await get_video_states(
+        [v.original_id for data in unknown_data.values() for v in data],
+        session,
+    )
+    last_time = datetime.today() - timedelta(days=LAST_DAYS_IN_DB)
+    live_streams = []
     new_data: ScanData = {}
-    for channel, data in scan_data.items():
-        assert channel.id is not None
-        if data.videos or data.streams:
-            last_video_ids = await get_last_video_ids(
-                channel.id,  # noqa
-                LAST_DAYS_IN_DB,
-                session,
-            )
-            videos = await filter_videos_by_id(
-                data.videos,
-                last_video_ids,
-            )
-            streams = await filter_streams_by_id(
-                data.streams,
-                last_video_ids,
-                session,
-            )
-            new_data[channel] = YouTubeChannelData(
-                videos=videos,
-                streams=streams,
-            )
+    for channel, data in unknown_data.items():
+        for stream in data.streams:
+            state = states.get(stream.original_id)
+            if (
+                state is not None
+                and not state.is_recent(last_time)
+                and "LIVE" in (stream.style, state.style)
+            ):
+                live_streams.append(stream)
+        if known_index is not None:
+            for video in data:
+                state = states.get(video.original_id)
+                if state is not None and state.is_recent(last_time):
+                    known_index.add(
+                        channel.id,  # noqa
+                        video.original_id,
+                        None if state.live_24_7 else state.creation_time,
+                    )
+        new_data[channel] = YouTubeChannelData(
+            videos=[v for v in data.videos if v.original_id not in states],
+            streams=[v for v in data.streams if v.original_id not in states],
+        )
+    await mark_streams_live([v.original_id for v in live_streams], session)
+    if known_index is not None:
+        for stream in live_streams:
+            assert stream.channel_id is not None
+            known_index.add(stream.channel_id, stream.original_id, None)
     return new_data
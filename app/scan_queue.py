@@ -0,0 +1,234 @@
+import asyncio
+import pickle
+import time
+import uuid
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Awaitable, Callable, Sequence
+
+import redis.asyncio
+
+from .database.models import YouTubeChannel
+from .youtube_utils import ScanData, YouTubeChannelData
+
+logger = getLogger(__name__)
+
+REAP_INTERVAL = 5  # seconds
+TAKE_POLL_INTERVAL = 0.1  # seconds, while jobs list is empty
+
+# Item is moved to processing together with its lease, so the reaper
+# never sees a taken item without lease. Blocking BLMOVE can't be used
+# in a script, empty jobs list is polled instead.
+_TAKE_SCRIPT = """
+local item_id = redis.call("LMOVE", KEYS[1], KEYS[2], "LEFT", "RIGHT")
+if item_id then
+    redis.call("SET", ARGV[1] .. item_id, 1, "PX", ARGV[2])
+end
+return item_id
+"""
+
+
+@dataclass
+class WorkItem:
+    id: str
+    run_id: str
+    channel: YouTubeChannel
+    known_ids: frozenset[str]
+    attempt: int = 0
+
+
+@dataclass
+class WorkResult:
+    item_id: str
+    data: YouTubeChannelData | None  # None - scan failed
+
+
+Handler = Callable[[WorkItem], Awaitable[YouTubeChannelData | None]]
+
+
+class QueueKeys:
+    """Redis keys of the scan work queue.
+
+    jobs       - list of pending item ids
+    processing - list of taken item ids, alive while their lease exists
+    items      - hash item id -> pickled WorkItem
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.jobs = f"{prefix}:jobs"
+        self.processing = f"{prefix}:processing"
+        self.items = f"{prefix}:items"
+
+    def lease(self, item_id: str) -> str:
+        return f"{self.prefix}:lease:{item_id}"
+
+    def results(self, run_id: str) -> str:
+        return f"{self.prefix}:results:{run_id}"
+
+
+async def push_items(
+    redis_client: redis.asyncio.Redis,
+    keys: QueueKeys,
+    items: Sequence[WorkItem],
+) -> None:
+    if not items:
+        return
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(
+            keys.items,
+            mapping={item.id: pickle.dumps(item) for item in items},
+        )
+        pipe.rpush(keys.jobs, *(item.id for item in items))
+        await pipe.execute()
+
+
+async def take_item(
+    redis_client: redis.asyncio.Redis,
+    keys: QueueKeys,
+    lease_timeout: float,
+    timeout: float = 1,
+) -> WorkItem | None:
+    take = redis_client.register_script(_TAKE_SCRIPT)
+    deadline = time.monotonic() + timeout
+    while not (
+        item_id := await take(
+            keys=[keys.jobs, keys.processing],
+            args=[keys.lease(""), int(lease_timeout * 1000)],
+        )
+    ):
+        if time.monotonic() >= deadline:
+            return None
+        await asyncio.sleep(TAKE_POLL_INTERVAL)
+    item_id = item_id.decode()
+    if (data := await redis_client.hget(keys.items, item_id)) is None:
+        # already finished by another worker after lease expiration
+        await redis_client.lrem(keys.processing, 0, item_id)
+        return None
+    return pickle.loads(data)
+
+
+async def complete_item(
+    redis_client: redis.asyncio.Redis,
+    keys: QueueKeys,
+    item: WorkItem,
+    data: YouTubeChannelData | None,
+) -> None:
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.rpush(
+            keys.results(item.run_id),
+            pickle.dumps(WorkResult(item.id, data)),
+        )
+        pipe.lrem(keys.processing, 0, item.id)
+        pipe.delete(keys.lease(item.id))
+        pipe.hdel(keys.items, item.id)
+        await pipe.execute()
+
+
+async def requeue_expired(
+    redis_client: redis.asyncio.Redis,
+    keys: QueueKeys,
+    max_attempts: int,
+) -> int:
+    """Return items of dead workers (lease expired) to the jobs list."""
+    count = 0
+    for item_id in await redis_client.lrange(keys.processing, 0, -1):
+        item_id = item_id.decode()
+        if await redis_client.exists(keys.lease(item_id)):
+            continue
+        if not await redis_client.lrem(keys.processing, 1, item_id):
+            continue  # taken by another coordinator
+        if (data := await redis_client.hget(keys.items, item_id)) is None:
+            continue
+        item: WorkItem = pickle.loads(data)
+        item.attempt += 1
+        if item.attempt >= max_attempts:
+            logger.error(f"Max scan attempts of {item.channel.title}")
+            await complete_item(redis_client, keys, item, None)
+        else:
+            await push_items(redis_client, keys, [item])
+        count += 1
+    return count
+
+
+async def _keep_lease(
+    redis_client: redis.asyncio.Redis,
+    keys: QueueKeys,
+    item_id: str,
+    lease_timeout: float,
+) -> None:
+    while True:
+        await asyncio.sleep(lease_timeout / 3)
+        await redis_client.pexpire(
+            keys.lease(item_id),
+            int(lease_timeout * 1000),
+        )
+
+
+async def run_worker(
+    redis_client: redis.asyncio.Redis,
+    keys: QueueKeys,
+    handler: Handler,
+    lease_timeout: float,
+) -> None:
+    while True:
+        if item := await take_item(redis_client, keys, lease_timeout):
+            lease_task = asyncio.create_task(
+                _keep_lease(redis_client, keys, item.id, lease_timeout)
+            )
+            try:
+                data = await handler(item)
+            finally:
+                lease_task.cancel()
+            await complete_item(redis_client, keys, item, data)
+
+
+async def scan_distributed(
+    channels: Sequence[YouTubeChannel],
+    known_ids: dict[int, frozenset[str]],
+    redis_client: redis.asyncio.Redis,
+    keys: QueueKeys,
+    max_attempts: int,
+    timeout: float,
+) -> ScanData:
+    """Split channels into work items for scan workers, collect results."""
+    run_id = uuid.uuid4().hex
+    items = {
+        item.id: item
+        for item in (
+            WorkItem(
+                id=f"{run_id}:{i}",
+                run_id=run_id,
+                channel=channel,
+                known_ids=known_ids.get(channel.id, frozenset()),  # noqa
+            )
+            for i, channel in enumerate(channels)
+        )
+    }
+    await push_items(redis_client, keys, list(items.values()))
+
+    result: ScanData = {}
+    done: set[str] = set()
+    deadline = time.monotonic() + timeout
+    reap_time = time.monotonic()
+    results_key = keys.results(run_id)
+    while len(done) < len(items):
+        now = time.monotonic()
+        if now > deadline:
+            logger.error(f"Scan timeout, {len(items) - len(done)} not done")
+            if not_done := items.keys() - done:
+                await redis_client.hdel(keys.items, *not_done)
+            break
+        if now - reap_time >= REAP_INTERVAL:
+            await requeue_expired(redis_client, keys, max_attempts)
+            reap_time = now
+        if reply := await redis_client.blpop(results_key, 1):
+            work_result: WorkResult = pickle.loads(reply[1])
+            if work_result.item_id in done:  # repeated after lease expiration
+                continue
+            done.add(work_result.item_id)
+            if work_result.data is not None:
+                channel = items[work_result.item_id].channel
+                result[channel] = work_result.data
+    await redis_client.delete(results_key)
+    return result
@@ -0,0 +1,68 @@
+import asyncio
+import os
+import sys
+from contextlib import nullcontext
+from logging import getLogger
+
+from redis.asyncio import from_url
+
+from .__main__ import main
+from .database.models import set_youtube_base_url
+from .format_utils import fmt_channel
+from .http_client import create_http_session
+from .scan_queue import QueueKeys, WorkItem, run_worker
+from .settings import Settings
+from .youtube_parser import json_backend
+from .youtube_utils import (
+    YouTubeChannelData,
+    create_parse_executor,
+    create_scan_context,
+    try_scan_channel,
+)
+
+logger = getLogger(__name__)
+
+
+async def run_scan_worker(settings: Settings) -> None:
+    """Scan channels from the Redis work queue filled by update()."""
+    keys = QueueKeys(settings.scan_queue_prefix)
+    backend = json_backend.set_backend(settings.json_backend)
+    logger.info(f"JSON backend: {backend}")
+    set_youtube_base_url(settings.youtube_base_url)
+    executor = create_parse_executor(settings)
+    with executor or nullcontext():
+        async with (
+            create_http_session(settings) as http_session,
+            from_url(settings.redis_url) as redis_client,
+        ):
+            # request rate is shared by all workers through Redis
+            context = create_scan_context(
+                settings,
+                http_session,
+                executor,
+                redis_client,
+            )
+
+            async def handler(item: WorkItem) -> YouTubeChannelData | None:
+                logger.debug(fmt_channel(item.channel))
+                return await try_scan_channel(
+                    item.channel,
+                    context,
+                    item.known_ids,
+                )
+
+            logger.info("Scan worker started.")
+            workers = [
+                run_worker(
+                    redis_client,
+                    keys,
+                    handler,
+                    settings.scan_lease_timeout,
+                )
+                for _ in range(max(1, settings.scan_concurrency))
+            ]
+            await asyncio.gather(*workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main(run_scan_worker, f"scan_worker_{os.getpid()}.txt"))
@@ -0,0 +1,190 @@
+import itertools
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Iterable, Sequence
+
+from .database.models import (
+    YouTubeChannel,
+    YouTubeChannelFailure,
+    YouTubeChannelSchedule,
+)
+from .database.utils import TgToYouTubeChannels
+from .settings import Settings
+from .youtube_utils import ScanData
+
+EWMA_ALPHA = 0.3
+MAX_BACKOFF_EXPONENT = 32
+DUE_TOLERANCE = timedelta(minutes=1)  # cron runs don't start exactly on time
+
+
+def order_by_fan_out(
+    tg_to_yt_channels: TgToYouTubeChannels,
+) -> list[YouTubeChannel]:
+    """Channels forwarded to the most destinations go first."""
+    fan_out = Counter(
+        itertools.chain.from_iterable(tg_to_yt_channels.values())
+    )
+    return [channel for channel, _ in fan_out.most_common()]
+
+
+def is_due(
+    schedule: YouTubeChannelSchedule | YouTubeChannelFailure | None,
+    now: datetime,
+) -> bool:
+    return schedule is None or schedule.next_scan_time <= now + DUE_TOLERANCE
+
+
+def fold_upload_interval(
+    upload_interval: float | None,
+    last_upload_time: datetime | None,
+    creation_times: Iterable[datetime],
+    alpha: float = EWMA_ALPHA,
+) -> float | None:
+    """Fold seconds between uploads after last_upload_time into EWMA
+    upload_interval, the first gap is from last_upload_time."""
+    times = sorted(
+        t
+        for t in creation_times
+        if last_upload_time is None or t > last_upload_time
+    )
+    if last_upload_time is not None:
+        times.insert(0, last_upload_time)
+    for prev_time, time in zip(times, times[1:]):
+        gap = (time - prev_time).total_seconds()
+        upload_interval = (
+            gap
+            if upload_interval is None
+            else alpha * gap + (1 - alpha) * upload_interval
+        )
+    return upload_interval
+
+
+def estimate_upload_interval(
+    creation_times: Iterable[datetime],
+    alpha: float = EWMA_ALPHA,
+) -> float | None:
+    """EWMA of seconds between uploads, recent uploads weigh more."""
+    return fold_upload_interval(None, None, creation_times, alpha)
+
+
+def next_scan_time(
+    now: datetime,
+    upload_interval: float | None,
+    last_upload_time: datetime | None,
+    settings: Settings,
+) -> datetime:
+    if upload_interval is None:
+        delay = settings.max_scan_interval
+    else:
+        if last_upload_time is not None:  # channel keeps silence longer
+            silence = (now - last_upload_time).total_seconds()
+            upload_interval = max(upload_interval, silence)
+        delay = upload_interval * settings.scan_interval_factor
+    delay = min(
+        max(delay, settings.min_scan_interval), settings.max_scan_interval
+    )
+    return now + timedelta(seconds=delay)
+
+
+def update_schedules(
+    scan_data: ScanData,
+    schedules: dict[int, YouTubeChannelSchedule],
+    now: datetime,
+    settings: Settings,
+    video_times: dict[int, dict[str, datetime]] | None = None,
+) -> list[YouTubeChannelSchedule]:
+    """Schedules of scanned channels.
+
+    Gaps between uploads newer than the last known one are folded into
+    the stored upload interval, so it is EWMA across scans. With
+    incremental scan scan_data has only new videos, so channels
+    without upload interval yet are estimated from video_times, saved
+    creation times by channel and original id (get_video_creation_times).
+    """
+    video_times = video_times or {}
+    result = []
+    for channel, data in scan_data.items():
+        assert channel.id is not None
+        schedule = schedules.get(channel.id) or YouTubeChannelSchedule(
+            channel_id=channel.id,
+            next_scan_time=now,
+        )
+        times = {v.original_id: v.creation_time for v in data}
+        if schedule.upload_interval is None:
+            times = {**video_times.get(channel.id, {}), **times}
+            schedule.upload_interval = estimate_upload_interval(times.values())
+        else:  # EWMA across scans
+            schedule.upload_interval = fold_upload_interval(
+                schedule.upload_interval,
+                schedule.last_upload_time,
+                times.values(),
+            )
+        if times:  # otherwise nothing changed since the last scan
+            last_upload_time = max(times.values())
+            if schedule.last_upload_time is not None:
+                last_upload_time = max(
+                    last_upload_time, schedule.last_upload_time
+                )
+            schedule.last_upload_time = last_upload_time
+        schedule.next_scan_time = next_scan_time(
+            now,
+            schedule.upload_interval,
+            schedule.last_upload_time,
+            settings,
+        )
+        result.append(schedule)
+    return result
+
+
+def is_quarantined(
+    failure: YouTubeChannelFailure | None,
+    settings: Settings,
+) -> bool:
+    return (
+        failure is not None
+        and failure.failure_count >= settings.quarantine_threshold
+    )
+
+
+def failure_delay(failure_count: int, settings: Settings) -> float:
+    """Exponential backoff, quarantined channels are only probed."""
+    if failure_count >= settings.quarantine_threshold:
+        return settings.quarantine_probe_interval
+    exponent = min(failure_count - 1, MAX_BACKOFF_EXPONENT)
+    return min(
+        settings.failure_backoff * 2**exponent,
+        settings.max_failure_backoff,
+    )
+
+
+def update_failures(
+    channels: Sequence[YouTubeChannel],
+    scan_data: ScanData,
+    failures: dict[int, YouTubeChannelFailure],
+    now: datetime,
+    settings: Settings,
+) -> tuple[list[YouTubeChannelFailure], list[int]]:
+    """Failures of scanned channels missed in scan_data
+    and ids of channels recovered from failures."""
+    failed = []
+    recovered = []
+    for channel in channels:
+        assert channel.id is not None
+        failure = failures.get(channel.id)
+        if channel in scan_data:
+            if failure is not None:
+                recovered.append(channel.id)
+            continue
+        if failure is None:
+            failure = YouTubeChannelFailure(
+                channel_id=channel.id,
+                failure_count=0,
+                first_failure_time=now,
+                next_scan_time=now,
+            )
+        failure.failure_count += 1
+        failure.next_scan_time = now + timedelta(
+            seconds=failure_delay(failure.failure_count, settings)
+        )
+        failed.append(failure)
+    return failed, recovered
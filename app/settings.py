@@ -15,6 +15,7 @@ KEYBOARD_COLUMN_COUNT: Final[int] = 4
 MAX_YT_CHANNEL_COUNT: Final[int] = 10
 MAX_CATEGORY_COUNT: Final[int] = 40
 MAX_TG_COUNT: Final[int] = 10
+MAX_QUARANTINE_COUNT: Final[int] = 30  # channels in /quarantine reply
 
 MY_COMMANDS: Final[list] = [
     BotCommand(
@@ -41,6 +42,10 @@ MY_COMMANDS: Final[list] = [
         command="/remove_category",
         description="Remove category by name",
     ),
+    BotCommand(
+        command="/quarantine",
+        description="Show channels which keep failing to scan",
+    ),
 ]
 
 
@@ -61,12 +66,45 @@ class Settings(BaseSettings):
     database_url: str
     redis_url: str
     redis_queue: str = "youtube_scanner:queue"
+    scan_queue_prefix: str = "youtube_scanner:scan"
 
     mode: str = "dev"
     without_sending: bool = False
 
+    scan_backend: str = "html"  # html, feed
+    incremental_scan: bool = True
+    known_ids_index: bool = True  # known video ids in memory, not database
+    known_ids_key: str = "youtube_scanner:known_ids"  # snapshot of index
+    distributed_scan: bool = False  # scan by app.scan_worker processes
+    scan_lease_timeout: float = 30
+    scan_max_attempts: int = 3
+    scan_timeout: float = 30 * 60
+    parse_workers: int = 0  # 0 - parse pages in event loop
+    parse_executor: str = "process"  # process, thread
+    json_backend: str = "auto"  # auto (orjson if installed), orjson, json
+    tab_layout_ttl: float = 24 * 60 * 60  # 0 - discover tabs on every scan
     cron_schedule: str = "*/30 * * * *"
-    request_delay: float = 1
+    adaptive_schedule: bool = False
+    min_scan_interval: float = 30 * 60
+    max_scan_interval: float = 24 * 60 * 60
+    scan_interval_factor: float = 0.25  # part of upload interval
+    failure_backoff: float = 30 * 60  # after failed scan, doubled each time
+    max_failure_backoff: float = 24 * 60 * 60
+    quarantine_threshold: int = 8  # failed scans in a row
+    quarantine_probe_interval: float = 7 * 24 * 60 * 60
+    scan_concurrency: int = 1
+    request_rate: float = 1  # requests per second to youtube.com
+    request_rate_key: str = "youtube_scanner:request_rate"  # shared bucket
+    youtube_base_url: str = "https://www.youtube.com"  # fake for load tests
+    http_pool_size: int = 100
+    http_pool_size_per_host: int = 10
+    dns_cache_ttl: int = 5 * 60
+    keepalive_timeout: float = 60
+    connect_timeout: float = 10
+    read_timeout: float = 30
+    http_cache_mode: str = "off"  # off, record, replay
+    http_cache_dir: Path = Path("http_cache")
+    http_cache_latency: float = 0  # seconds, added to replayed responses
     send_delay: float = 5 * 60
     error_delay: float = 65
     message_delay: float = 1
@@ -74,6 +112,12 @@ class Settings(BaseSettings):
     tz: str = Field(default_factory=_local_tz)
     check_migrations: bool = False
     parse_tags: bool = False
+    tag_concurrency: int = 4
+    tag_cache_size: int = 10_000
+    video_retention_days: int = 180  # 0 - keep, at least LAST_DAYS_IN_DB
+    archive_videos: bool = True  # move expired videos to archive table
+    retention_schedule: str = "17 4 * * *"
+    retention_batch_size: int = 1000
 
     class Config:
         @classmethod
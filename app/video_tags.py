@@ -0,0 +1,104 @@
+import asyncio
+from collections import OrderedDict
+from logging import getLogger
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .database.utils import get_video_tags_by_ids, save_video_tags
+from .youtube_utils import ScanContext, ScannedVideo, get_video_tags
+
+logger = getLogger(__name__)
+
+
+class TagCache:
+    """LRU of video tags by YouTubeVideo.original_id."""
+
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._tags: OrderedDict[str, list[str]] = OrderedDict()
+
+    def get(self, key: str) -> list[str] | None:
+        if (tags := self._tags.get(key)) is not None:
+            self._tags.move_to_end(key)
+        return tags
+
+    def set(self, key: str, tags: list[str]) -> None:
+        self._tags[key] = tags
+        self._tags.move_to_end(key)
+        while len(self._tags) > self._maxsize:
+            self._tags.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+
+class VideoTagStore:
+    """Tags of videos from cache, database or youtube.com."""
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker,
+        context: ScanContext,
+        cache_size: int,
+        concurrency: int,
+    ):
+        self._session_maker = session_maker
+        self._context = context
+        self._cache = TagCache(cache_size)
+        self._concurrency = max(1, concurrency)
+
+    async def get_known(
+        self,
+        original_ids: Iterable[str],
+    ) -> dict[str, list[str]]:
+        """Tags from cache and database only."""
+        result = {}
+        missing = []
+        for original_id in original_ids:
+            if (tags := self._cache.get(original_id)) is not None:
+                result[original_id] = tags
+            else:
+                missing.append(original_id)
+        if missing:
+            async with self._session_maker() as session:
+                stored = await get_video_tags_by_ids(missing, session)
+            for original_id, tags in stored.items():
+                self._cache.set(original_id, tags)
+            result.update(stored)
+        return result
+
+    async def fetch(
+        self,
+        videos: Iterable[ScannedVideo],
+    ) -> dict[str, list[str]]:
+        """Tags of videos, unknown ones are fetched concurrently.
+
+        Videos with fetch errors are missed in result.
+        """
+        videos = list(videos)
+        result = await self.get_known(v.original_id for v in videos)
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def fetch_one(video: ScannedVideo) -> None:
+            async with semaphore:
+                try:
+                    tags = await get_video_tags(video.url, self._context)
+                except Exception as e:
+                    logger.error(f"Tags of {video.url}: {type(e)} {e}")
+                    return
+            fetched[video.original_id] = tags
+
+        fetched: dict[str, list[str]] = {}
+        await asyncio.gather(
+            *(fetch_one(v) for v in videos if v.original_id not in result)
+        )
+        if fetched:
+            async with self._session_maker() as session:
+                await save_video_tags(fetched, session)
+                await session.commit()
+            for original_id, tags in fetched.items():
+                self._cache.set(original_id, tags)
+        logger.info(f"Tags fetched: {len(fetched)}, known: {len(result)}")
+        result.update(fetched)
+        return result
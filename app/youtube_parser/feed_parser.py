@@ -0,0 +1,37 @@
+from datetime import datetime
+from xml.etree import ElementTree
+
+from .youtube_parser import YoutubeParserError
+
+NAMESPACES = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "yt": "http://www.youtube.com/xml/schemas/2015",
+}
+
+
+def _parse_time(text: str) -> datetime:
+    # 2023-10-17T14:51:09+00:00 -> naive local time, like scan_time
+    return datetime.fromisoformat(text).astimezone().replace(tzinfo=None)
+
+
+def parse_feed(content: str | bytes) -> list[dict]:
+    """Parse channel Atom feed (feeds/videos.xml?channel_id=...)."""
+    try:
+        root = ElementTree.fromstring(content)
+    except ElementTree.ParseError as e:
+        raise YoutubeParserError(f"Wrong feed: {e}") from e
+
+    videos = []
+    for entry in root.iterfind("atom:entry", NAMESPACES):
+        video_id = entry.findtext("yt:videoId", None, NAMESPACES)
+        published = entry.findtext("atom:published", None, NAMESPACES)
+        if not (video_id and published):
+            raise YoutubeParserError("Feed entry without id or time!")
+        videos.append(
+            dict(
+                id=video_id,
+                title=entry.findtext("atom:title", None, NAMESPACES),
+                published=_parse_time(published),
+            )
+        )
+    return videos
@@ -0,0 +1,37 @@
+import json
+from typing import Any, Callable
+
+BACKENDS = ("auto", "orjson", "json")
+
+_loads: Callable[[str], Any] = json.loads
+backend_name = "json"
+
+
+def set_backend(name: str = "auto") -> str:
+    """Select decoder of ytInitialData, auto - orjson if installed."""
+    global _loads, backend_name
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown json backend: {name}")
+    if name != "json":
+        try:
+            import orjson
+        except ImportError:
+            if name == "orjson":
+                raise
+        else:
+            _loads, backend_name = orjson.loads, "orjson"
+            return backend_name
+    _loads, backend_name = json.loads, "json"
+    return backend_name
+
+
+def loads(text: str) -> Any:
+    try:
+        return _loads(text)
+    except ValueError:
+        if _loads is json.loads:
+            raise
+        return json.loads(text)  # orjson is stricter, e.g. rejects NaN
+
+
+set_backend()
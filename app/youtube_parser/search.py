@@ -1,5 +1,14 @@
+import threading
 from collections import deque
-from typing import Sequence, Mapping, Callable, Any, TypeAlias, Iterator
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Mapping,
+    Sequence,
+    TypeAlias,
+)
 
 KiValueIt: TypeAlias = Iterator[tuple[Any, Any]]
 Callback = Callable[[list, str | int, Any], tuple[bool, Any]]
@@ -49,12 +58,14 @@ def _iterate_map_or_seq(obj: Sequence | Mapping) -> KiValueIt:
 
 
 def _is_composite_object(obj) -> bool:
+    if isinstance(obj, (dict, list)):  # fast path for json objects
+        return True
     return isinstance(obj, Mapping) or (
         isinstance(obj, Sequence) and not isinstance(obj, str)
     )
 
 
-def find_first(root: Sequence | Mapping, callback: Callback) -> Any:
+def _find_first(root: Sequence | Mapping, callback: Callback) -> Any:
     q: deque[Sequence | Mapping] = deque([([], root)])
     while q:
         path, obj = q.popleft()
@@ -69,7 +80,7 @@ def find_first(root: Sequence | Mapping, callback: Callback) -> Any:
     raise SearchError("Not found!")
 
 
-def find_all(root: Sequence | Mapping, callback: Callback) -> list:
+def _find_all(root: Sequence | Mapping, callback: Callback) -> list:
     q: deque[Sequence[Any] | Mapping[Any, Any]] = deque([([], root)])
     results = []
     while q:
@@ -85,29 +96,215 @@ def find_all(root: Sequence | Mapping, callback: Callback) -> list:
     return results
 
 
-class ByKey:
-    def __init__(self, key: str):
-        self._key = key
+def find_first(root: Sequence | Mapping, callback: Callback) -> Any:
+    if isinstance(callback, Selector):
+        result = Query(callback).find_first(root)[0]
+        if result is NOT_FOUND:
+            raise SearchError("Not found!")
+        return result
+    return _find_first(root, callback)
 
-    def __call__(
-        self,
-        path: list,
-        ki: str | int,
-        value: Any,
-    ) -> tuple[bool, Any]:
-        if (not isinstance(ki, int)) and ki == self._key:
-            return True, value
+
+def find_all(root: Sequence | Mapping, callback: Callback) -> list:
+    if isinstance(callback, Selector):
+        return Query(callback).find_all(root)[0]
+    return _find_all(root, callback)
+
+
+def _key_equal(ki: str | int, key: str | int) -> bool:
+    # not isinstance check, True == 1 but isn't index
+    return ki == key and type(ki) is type(key)
+
+
+class Selector:
+    """Matches child with key (or index) and existing sub path in it."""
+
+    def __init__(self, key: str | int, *sub_path: str | int, return_root):
+        self.key = key
+        self.sub_path = sub_path
+        self.return_root = return_root
+
+    def match(self, value: Any) -> Any | NotFound:
+        child_value = get(value, *self.sub_path) if self.sub_path else value
+        if child_value is NOT_FOUND or not self.return_root:
+            return child_value
+        return value
+
+    def __call__(self, path: list, ki, value: Any) -> tuple[bool, Any]:
+        if _key_equal(ki, self.key):
+            result = self.match(value)
+            if result is not NOT_FOUND:
+                return True, result
         return False, None  # found, result_value
 
 
-class BySubPath:
+class ByKey(Selector):
+    def __init__(self, key: str):
+        super().__init__(key, return_root=False)
+
+
+class BySubPath(Selector):
     def __init__(self, *sub_path: str | int, return_root: bool = False):
-        self._sub_path = sub_path
-        self._return_root = return_root
+        super().__init__(*sub_path, return_root=return_root)
 
-    def __call__(self, path: list, ki, value: Any) -> tuple[bool, Any]:
-        if ki == self._sub_path[0]:
-            child_value = get(value, *self._sub_path[1:])
-            if child_value is not NOT_FOUND:
-                return True, value if self._return_root else child_value
-        return False, None
+
+_SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
+
+
+def _children(obj) -> KiValueIt | None:
+    if isinstance(obj, dict):  # fast path for json objects
+        return iter(obj.items())
+    if isinstance(obj, list):
+        return enumerate(obj)
+    if isinstance(obj, Mapping):
+        return iter(obj.items())
+    if isinstance(obj, Sequence) and not isinstance(obj, str):
+        return enumerate(obj)
+    return None
+
+
+class Query:
+    """Several selectors resolved by a single breadth-first traversal.
+
+    Results are the same as of separate find_first / find_all calls
+    with each selector. Subtrees under skip_keys are not visited.
+    """
+
+    def __init__(
+        self,
+        *selectors: Selector,
+        skip_keys: Iterable[str] = (),
+    ):
+        self._selectors = selectors
+        self._skip_keys = frozenset(skip_keys)
+        self._keys = frozenset(s.key for s in selectors)
+
+    def find_first(self, root: Sequence | Mapping) -> list[Any | NotFound]:
+        """First match of each selector, NOT_FOUND for missing."""
+        results: list[Any | NotFound] = [NOT_FOUND] * len(self._selectors)
+        pending = dict(enumerate(self._selectors))
+        keys = self._keys
+        skip_keys = self._skip_keys
+        q: deque = deque([root])
+        while q and pending:
+            children = _children(q.popleft())
+            if children is None:
+                continue
+            for ki, value in children:
+                if ki in keys:
+                    for i, selector in list(pending.items()):
+                        if _key_equal(ki, selector.key):
+                            result = selector.match(value)
+                            if result is not NOT_FOUND:
+                                results[i] = result
+                                del pending[i]
+                    if not pending:
+                        break
+                if (
+                    type(value) not in _SCALAR_TYPES
+                    and ki not in skip_keys
+                    and _is_composite_object(value)
+                ):
+                    q.append(value)
+        return results
+
+    def find_all(self, root: Sequence | Mapping) -> list[list]:
+        """All matches of each selector, subtrees of a match are not
+        searched further by that selector."""
+        results: list[list] = [[] for _ in self._selectors]
+        all_active = tuple(range(len(self._selectors)))
+        keys = self._keys
+        skip_keys = self._skip_keys
+        q: deque = deque([(root, all_active)])
+        while q:
+            obj, active = q.popleft()
+            children = _children(obj)
+            if children is None:
+                continue
+            for ki, value in children:
+                if type(value) in _SCALAR_TYPES and ki not in keys:
+                    continue
+                child_active = active
+                if ki in keys:
+                    matched = []
+                    for i in active:
+                        selector = self._selectors[i]
+                        if _key_equal(ki, selector.key):
+                            result = selector.match(value)
+                            if result is not NOT_FOUND:
+                                results[i].append(result)
+                                matched.append(i)
+                    if matched:
+                        child_active = tuple(
+                            i for i in active if i not in matched
+                        )
+                        if not child_active:
+                            continue
+                if ki not in skip_keys and _is_composite_object(value):
+                    q.append((value, child_active))
+        return results
+
+
+def _find_first_path(
+    root: Sequence | Mapping,
+    selector: Selector,
+) -> tuple[tuple[str | int, ...], Any]:
+    q: deque = deque([((), root)])
+    while q:
+        path, obj = q.popleft()
+        children = _children(obj)
+        if children is None:
+            continue
+        for ki, value in children:
+            if _key_equal(ki, selector.key):
+                result = selector.match(value)
+                if result is not NOT_FOUND:
+                    return path + (ki,), result
+            if type(value) not in _SCALAR_TYPES and _is_composite_object(
+                value
+            ):
+                q.append((path + (ki,), value))
+    raise SearchError("Not found!")
+
+
+class PathCache:
+    """Selector that remembers concrete paths of its last matches.
+
+    Direct lookups by the most recently used paths are tried first,
+    full search runs only if none of them matches.
+    """
+
+    def __init__(self, selector: Selector, size: int = 4):
+        self._selector = selector
+        self._size = size
+        self._paths: list[tuple[str | int, ...]] = []
+        self._lock = threading.Lock()  # parsing can run in threads
+        self.hits = 0
+        self.misses = 0
+
+    def find_first(self, root: Sequence | Mapping) -> Any:
+        for path in tuple(self._paths):
+            value = get(root, *path)
+            if value is NOT_FOUND:
+                continue
+            result = self._selector.match(value)
+            if result is not NOT_FOUND:
+                self._use(path, hit=True)
+                return result
+
+        path, result = _find_first_path(root, self._selector)
+        self._use(path, hit=False)
+        return result
+
+    def _use(self, path: tuple[str | int, ...], hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            if self._paths and self._paths[0] == path:
+                return
+            if path in self._paths:
+                self._paths.remove(path)
+            self._paths.insert(0, path)
+            del self._paths[self._size :]
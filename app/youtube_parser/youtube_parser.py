@@ -1,13 +1,16 @@
 import json
 import re
-from typing import no_type_check
+from html.parser import HTMLParser
+from typing import Any, Container, no_type_check
 
-import bs4
 from dateutil.relativedelta import relativedelta
 
-from . import search
+from . import json_backend, search
 
-DATA_PATTERN = re.compile(r"\s*var\s+ytInitialData\s*=\s*")
+DATA_PATTERN = re.compile(r"var\s+ytInitialData\s*=\s*")
+SCRIPT_END = "</script>"
+HEAD_END = "</head>"
+MAX_HEAD_LENGTH = 256
 
 MEASUREMENT_SHORT_NAMES = {
     "s": "second",
@@ -22,44 +25,122 @@ MEASUREMENT_SHORT_NAMES = {
 MEASUREMENT_NAMES = frozenset(MEASUREMENT_SHORT_NAMES.values())
 
 
+# learned locations of the page parts, layout of pages changes rarely
+TAB_CONTENT = search.PathCache(search.BySubPath("tabRenderer", "content"))
+TABS = search.PathCache(search.ByKey("tabs"))
+TABBED_HEADER = search.PathCache(
+    search.BySubPath("c4TabbedHeaderRenderer", "channelId", return_root=True)
+)
+PATH_CACHES = (TAB_CONTENT, TABS, TABBED_HEADER)
+
+
+def path_cache_stats() -> tuple[int, int]:
+    """Hits and misses of path caches of this process."""
+    return (
+        sum(cache.hits for cache in PATH_CACHES),
+        sum(cache.misses for cache in PATH_CACHES),
+    )
+
+
 class YoutubeParserError(Exception):
     pass
 
 
+def _clean_init_data(text: str) -> str:
+    # text between "var ytInitialData =" and "</script>",
+    # the end of the object is found by _load_init_data in the executor
+    return text.strip().rstrip(";").rstrip()
+
+
+def _load_init_data(obj_content: str) -> Any:
+    """Decode ytInitialData, it can be followed by other statements of
+    the script (e.g. ytInitialPlayerResponse)."""
+    try:
+        return json_backend.loads(obj_content)
+    except ValueError:
+        pass
+    try:  # rare, decoded once more only up to the end of the object
+        obj, _ = json.JSONDecoder().raw_decode(obj_content)
+    except ValueError as e:
+        raise YoutubeParserError(f'Wrong "ytInitialData": {e}') from e
+    return obj
+
+
 def _parse_init_data(content: str) -> str:
+    """Find text of ytInitialData object in page without building DOM."""
     if m := DATA_PATTERN.search(content):
-        start = m.span()[1]
-        bracket_counter = 0
-        single_quote = False
-        double_quote = False
-        for i, ch in enumerate(content[start:], start=start):
-            if ch == "{" and not any((single_quote, double_quote)):
-                bracket_counter += 1
-            elif ch == "}" and not any((single_quote, double_quote)):
-                bracket_counter -= 1
-                if bracket_counter == 0:
-                    return content[start : i + 1]
-            elif ch == '"':
-                if not single_quote:
-                    if i == 0 or content[i - 1] != "\\":
-                        double_quote = not double_quote
-            elif ch == "'":
-                if not double_quote:
-                    if i == 0 or content[i - 1] != "\\":
-                        single_quote = not single_quote
+        end = content.find(SCRIPT_END, m.end())
+        return _clean_init_data(content[m.end() : end if end != -1 else None])
     raise YoutubeParserError('Variable "ytInitialData" not found!')
 
 
+class TextCollector:
+    """Collects text arriving in parts up to the first marker."""
+
+    def __init__(self, marker: str):
+        self._marker = marker
+        self._parts: list[str] = []
+        self._tail = ""  # marker can be split between parts
+
+    def feed(self, text: str) -> str | None:
+        """Return all text before marker as soon as it is found."""
+        search_text = self._tail + text
+        self._parts.append(text)
+        self._tail = search_text[-len(self._marker) :]
+        if (i := search_text.find(self._marker)) == -1:
+            return None
+        content = "".join(self._parts)
+        return content[: len(content) - len(search_text) + i]
+
+
+class InitDataExtractor:
+    """Same as _parse_init_data, but for page text arriving in parts.
+
+    feed() returns text of object as soon as its script is complete,
+    the rest of the page is not needed.
+    """
+
+    def __init__(self):
+        self._head = ""  # text before the object
+        self._collector: TextCollector | None = None  # text of the object
+
+    def feed(self, text: str) -> str | None:
+        if self._collector is None:
+            self._head += text
+            if not (m := DATA_PATTERN.search(self._head)):
+                self._head = self._head[-MAX_HEAD_LENGTH:]
+                return None
+            text = self._head[m.end() :]
+            self._head = ""
+            self._collector = TextCollector(SCRIPT_END)
+
+        if (content := self._collector.feed(text)) is None:
+            return None
+        return _clean_init_data(content)
+
+
+VIDEO_QUERY = search.Query(
+    search.ByKey("videoId"),
+    search.BySubPath("title", "runs", 0, "text"),
+    search.BySubPath("thumbnailOverlayTimeStatusRenderer", "style"),
+    # big subtrees without these fields
+    skip_keys=(
+        "navigationEndpoint",
+        "menu",
+        "thumbnail",
+        "richThumbnail",
+        "descriptionSnippet",
+        "ownerBadges",
+        "badges",
+        "channelThumbnailSupportedRenderers",
+    ),
+)
+
+
 def _parse_renderer(video_renderer: dict) -> dict:
-    video_id = search.find_first(video_renderer, search.ByKey("videoId"))
-    title = search.find_first(
-        video_renderer,
-        search.BySubPath("title", "runs", 0, "text"),
-    )
-    style = search.find_first(
-        video_renderer,
-        search.BySubPath("thumbnailOverlayTimeStatusRenderer", "style"),
-    )
+    video_id, title, style = VIDEO_QUERY.find_first(video_renderer)
+    if search.NOT_FOUND in (video_id, title, style):
+        raise search.SearchError("Not found!")
     time_ago = search.get(
         video_renderer,
         "publishedTimeText",
@@ -90,7 +171,31 @@ def _has_no_video2(renderer: dict) -> bool:
     return text == "This channel has no videos."
 
 
-def _parse_section_list_renderer(renderer: dict) -> list[dict]:
+def _is_published(video_renderer: dict) -> bool:
+    """Not an upcoming or live stream (or other item kept at the top
+    of the tab), so videos below it are older."""
+    if "publishedTimeText" not in video_renderer:
+        return False
+    _, _, style = VIDEO_QUERY.find_first(video_renderer)
+    return style == "DEFAULT"
+
+
+def _is_known(
+    video_renderer: dict,
+    known_ids: Container[str],
+    stop_at_known: bool,
+) -> tuple[bool, bool]:  # skip, stop
+    video_id = video_renderer.get("videoId")
+    if video_id is not None and video_id in known_ids:
+        return True, stop_at_known and _is_published(video_renderer)
+    return False, False
+
+
+def _parse_section_list_renderer(
+    renderer: dict,
+    known_ids: Container[str],
+    stop_at_known: bool,
+) -> list[dict]:
     videos = []
     items = []
     try:
@@ -112,15 +217,34 @@ def _parse_section_list_renderer(renderer: dict) -> list[dict]:
 
     for i, item in enumerate(items):
         if video_renderer := item.get("gridVideoRenderer"):
-            videos.append(_parse_renderer(video_renderer))
+            skip, stop = _is_known(video_renderer, known_ids, stop_at_known)
+            if stop:
+                break
+            if not skip:
+                videos.append(_parse_renderer(video_renderer))
     return videos
 
 
-def _parse_rich_grid_renderer(renderer: dict) -> list[dict]:
+def _parse_rich_grid_renderer(
+    renderer: dict,
+    known_ids: Container[str],
+    stop_at_known: bool,
+) -> list[dict]:
     videos = []
     items = search.find_first(renderer, search.ByKey("contents"))
     for i, item in enumerate(items):
         if item_renderer := item.get("richItemRenderer"):
+            skip, stop = _is_known(
+                search.get(
+                    item_renderer, "content", "videoRenderer", default={}
+                ),
+                known_ids,
+                stop_at_known,
+            )
+            if stop:
+                break
+            if skip:
+                continue
             video_renderer = search.find_first(
                 item_renderer,
                 search.BySubPath("content", "videoRenderer"),
@@ -129,26 +253,29 @@ def _parse_rich_grid_renderer(renderer: dict) -> list[dict]:
     return videos
 
 
-def _parse_object(obj_content: str) -> list[dict]:
+def _parse_object(
+    obj: dict,
+    known_ids: Container[str],
+    stop_at_known: bool,
+) -> list[dict]:
     videos = []
-    obj = json.loads(obj_content)
-    content = search.find_first(
-        obj,
-        search.BySubPath("tabRenderer", "content"),
-    )
+    content = TAB_CONTENT.find_first(obj)
     if renderer := content.get("sectionListRenderer"):
-        videos.extend(_parse_section_list_renderer(renderer))
+        videos.extend(
+            _parse_section_list_renderer(renderer, known_ids, stop_at_known)
+        )
     elif renderer := content.get("richGridRenderer"):
-        videos.extend(_parse_rich_grid_renderer(renderer))
+        videos.extend(
+            _parse_rich_grid_renderer(renderer, known_ids, stop_at_known)
+        )
     else:
         raise YoutubeParserError("Renderer not found!")
     return videos
 
 
-def parse_tab_urls(obj_content: str) -> list[str]:
+def parse_tab_urls(obj: dict) -> list[str]:
     urls = []
-    obj = json.loads(obj_content)
-    tabs = search.find_first(obj, search.ByKey("tabs"))
+    tabs = TABS.find_first(obj)
     tab_renders = search.find_all(tabs, search.BySubPath("tabRenderer"))
     for tab_render in tab_renders:
         url = search.find_first(
@@ -164,39 +291,41 @@ def parse_tab_urls(obj_content: str) -> list[str]:
     return urls
 
 
-def parse_channel(content: str) -> dict:
-    soup = bs4.BeautifulSoup(content, "lxml")
-    script_els = soup.find_all("script")
-    script_with_data_els = list(
-        filter(lambda el: DATA_PATTERN.search(el.text), script_els)
-    )
-    if len(script_with_data_els) == 0:
-        raise YoutubeParserError('"ytInitialData" not found!')
-    obj_content = _parse_init_data(script_with_data_els[0].text)
-    tab_urls: list[str] = parse_tab_urls(obj_content)
-    videos: list[dict] = _parse_object(obj_content)
+def parse_channel_data(
+    obj_content: str,
+    with_tab_urls: bool = True,
+    known_ids: Container[str] = frozenset(),
+    stop_at_known: bool = True,
+) -> dict:
+    """Parse videos from text of ytInitialData of channel tab page.
+
+    Videos from known_ids are skipped, with stop_at_known parsing stops
+    at the first published one (tab is sorted from the newest video,
+    upcoming and live streams stay at the top).
+    """
+    obj = _load_init_data(obj_content)
+    tab_urls: list[str] = parse_tab_urls(obj) if with_tab_urls else []
+    videos: list[dict] = _parse_object(obj, known_ids, stop_at_known)
     return dict(tab_urls=tab_urls, videos=videos)
 
 
-def parse_channel_info(content: str) -> dict:
-    soup = bs4.BeautifulSoup(content, "lxml")
-    script_els = soup.find_all("script")
-    script_with_data_els = list(
-        filter(lambda el: "ytInitialData" in el.text, script_els)
-    )
-    if len(script_with_data_els) == 0:
-        raise YoutubeParserError('"ytInitialData" not found!')
-    obj_content = _parse_init_data(script_with_data_els[0].text)
-
-    obj = json.loads(obj_content)
-    tabbed_header_renderer = search.find_first(
-        obj,
-        search.BySubPath(
-            "c4TabbedHeaderRenderer",
-            "channelId",
-            return_root=True,
-        ),
+def parse_channel(
+    content: str,
+    with_tab_urls: bool = True,
+    known_ids: Container[str] = frozenset(),
+    stop_at_known: bool = True,
+) -> dict:
+    return parse_channel_data(
+        _parse_init_data(content),
+        with_tab_urls,
+        known_ids,
+        stop_at_known,
     )
+
+
+def parse_channel_info_data(obj_content: str) -> dict:
+    obj = _load_init_data(obj_content)
+    tabbed_header_renderer = TABBED_HEADER.find_first(obj)
     channel_id = tabbed_header_renderer.get("channelId")
     title = tabbed_header_renderer.get("title")
     canonical_base_url = search.get(
@@ -213,6 +342,10 @@ def parse_channel_info(content: str) -> dict:
     )
 
 
+def parse_channel_info(content: str) -> dict:
+    return parse_channel_info_data(_parse_init_data(content))
+
+
 @no_type_check
 def parse_time_age(text: str) -> relativedelta:
     if m := re.search(r"(\d+)\s*(\w+?)s?\s+ago", text):
@@ -228,10 +361,26 @@ def parse_time_age(text: str) -> relativedelta:
     raise RuntimeError(f'Time "{text}" format is not supported!')
 
 
+class _VideoTagParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.tags: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        # <meta property="og:video:tag" content="web scraping">
+        if tag == "meta":
+            attrs_dict = dict(attrs)
+            if attrs_dict.get("property") == "og:video:tag":
+                self.tags.append(attrs_dict.get("content") or "")
+
+
 def parse_video_tags(content: str | bytes) -> list[str]:
-    soup = bs4.BeautifulSoup(content, "lxml")
-    head_el = soup.find("head")
-    assert isinstance(head_el, bs4.element.Tag)
-    # <meta property="og:video:tag" content="web scraping">
-    tag_els = head_el.find_all("meta", {"property": "og:video:tag"})
-    return [tag_el["content"] for tag_el in tag_els]
+    """Parse tags from head of watch page (the rest is not needed)."""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", errors="replace")
+    if (end := content.find(HEAD_END)) != -1:
+        content = content[:end]
+    parser = _VideoTagParser()
+    parser.feed(content)
+    parser.close()
+    return parser.tags
@@ -1,29 +1,86 @@
+import asyncio
+import codecs
 import dataclasses
 import itertools
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
-from functools import partial
-from typing import Iterator
+from datetime import datetime, timedelta
+from functools import lru_cache, partial
+from logging import getLogger
+from typing import Any, Callable, Iterator, NamedTuple
 
 import aiohttp
+import redis.asyncio
 
 from dateutil.relativedelta import relativedelta
 
-from .database.utils import YouTubeChannel, YouTubeVideo
+from .database import models
+from .database.utils import YouTubeChannel
+from .http_client import HttpResponse, HttpSession
+from .rate_limiter import RateLimiter, RedisRateLimiter
+from .settings import LAST_DAYS_ON_PAGE, Settings
+from .youtube_parser import json_backend, search
+from .youtube_parser.feed_parser import parse_feed
 from .youtube_parser.youtube_parser import (
-    parse_channel_info,
-    parse_channel,
+    HEAD_END,
+    InitDataExtractor,
+    TextCollector,
+    YoutubeParserError,
+    parse_channel_data,
+    parse_channel_info_data,
     parse_time_age,
     parse_video_tags,
 )
 
 
+logger = getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+MAX_DRAIN_SIZE = 64 * 1024  # rest of page to read for connection reuse
+TIME_AGE_CACHE_SIZE = 4096  # "1 day ago", ... are shared by many videos
+
+
+@dataclass(slots=True, eq=False)
+class ScannedVideo:
+    """Video from channel page or feed.
+
+    Most of them are already known, so only new ones are saved
+    as YouTubeVideo rows by to_row().
+    """
+
+    original_id: str
+    channel_id: int | None
+    title: str | None
+    scan_time: datetime
+    creation_time: datetime
+    style: str | None = None
+    time_ago: str | None = None
+    live_24_7: bool = False
+
+    @property
+    def url(self) -> str:
+        return models.YT_VIDEO_URL_FMT.format(id=self.original_id)
+
+    def to_row(self) -> dict:
+        """Values of YouTubeVideo columns."""
+        return dataclasses.asdict(self)
+
+    def __hash__(self):
+        return hash(self.original_id)
+
+    def __eq__(self, other):
+        return self.original_id == other.original_id
+
+
 @dataclass
 class YouTubeChannelData:
-    videos: list[YouTubeVideo] = dataclasses.field(default_factory=list)
-    streams: list[YouTubeVideo] = dataclasses.field(default_factory=list)
+    videos: list[ScannedVideo] = dataclasses.field(default_factory=list)
+    streams: list[ScannedVideo] = dataclasses.field(default_factory=list)
 
-    def __iter__(self) -> Iterator[YouTubeVideo]:
+    def __iter__(self) -> Iterator[ScannedVideo]:
         return itertools.chain(self.videos, self.streams)
 
     def __bool__(self):
@@ -33,6 +90,97 @@ class YouTubeChannelData:
 ScanData = dict[YouTubeChannel, YouTubeChannelData]
 
 
+class FeedCache:
+    """Conditional request headers of channel feeds from the last scan."""
+
+    def __init__(self):
+        self._headers: dict[str, dict[str, str]] = {}
+
+    def get(self, key: str) -> dict[str, str]:
+        return self._headers.get(key, {})
+
+    def set(self, key: str, headers: dict[str, str]) -> None:
+        self._headers[key] = headers
+
+    def invalidate(self, key: str) -> None:
+        self._headers.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._headers)
+
+
+class TabLayoutCache:
+    """Tab names of channels (videos, streams, ...), rediscovered after ttl."""
+
+    def __init__(self, ttl: float):
+        self._ttl = ttl
+        self._tabs: dict[str, tuple[frozenset[str], float]] = {}
+
+    def get(self, key: str) -> frozenset[str] | None:
+        if item := self._tabs.get(key):
+            tabs, time_stamp = item
+            if time.monotonic() - time_stamp < self._ttl:
+                return tabs
+            del self._tabs[key]
+        return None
+
+    def set(self, key: str, tab_urls: list[str]) -> None:
+        tabs = frozenset(url.rsplit("/", 1)[-1] for url in tab_urls)
+        self._tabs[key] = tabs, time.monotonic()
+
+    def invalidate(self, key: str) -> None:
+        self._tabs.pop(key, None)
+
+
+class ScanContext(NamedTuple):
+    http_session: HttpSession
+    limiter: RateLimiter | RedisRateLimiter | None = None
+    feed_cache: FeedCache | None = None  # None - scan html pages only
+    tab_cache: TabLayoutCache | None = None
+    executor: Executor | None = None  # None - parse pages in event loop
+
+
+def create_parse_executor(settings: Settings) -> Executor | None:
+    if settings.parse_workers <= 0:
+        return None
+    if settings.parse_executor == "thread":
+        return ThreadPoolExecutor(settings.parse_workers)
+    return ProcessPoolExecutor(
+        settings.parse_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=json_backend.set_backend,
+        initargs=(settings.json_backend,),
+    )
+
+
+def create_scan_context(
+    settings: Settings,
+    http_session: HttpSession,
+    executor: Executor | None = None,
+    redis_client: redis.asyncio.Redis | None = None,
+) -> ScanContext:
+    """With redis_client request_rate is shared by all processes
+    (bot and scan workers), otherwise it is per process."""
+    limiter: RateLimiter | RedisRateLimiter
+    if redis_client is not None:
+        limiter = RedisRateLimiter(
+            redis_client,
+            settings.request_rate_key,
+            settings.request_rate,
+        )
+    else:
+        limiter = RateLimiter(settings.request_rate)
+    return ScanContext(
+        http_session,
+        limiter,
+        FeedCache() if settings.scan_backend == "feed" else None,
+        TabLayoutCache(settings.tab_layout_ttl)
+        if settings.tab_layout_ttl > 0
+        else None,
+        executor,
+    )
+
+
 def _has_tab(urls: list[str], tab_name: str) -> bool:
     for url in urls:
         if url.endswith(tab_name):
@@ -40,74 +188,289 @@ def _has_tab(urls: list[str], tab_name: str) -> bool:
     return False
 
 
-def _make_video(data: dict, scan_time, channel_id: int) -> YouTubeVideo:
-    if data["time_ago"]:
-        time_delta: relativedelta = parse_time_age(data["time_ago"])
-        creation_time = scan_time - time_delta
+@lru_cache(maxsize=TIME_AGE_CACHE_SIZE)
+def _time_age_offset(time_ago: str) -> timedelta | relativedelta:
+    """Negative time age, parsed once per distinct text.
+
+    timedelta if months are not needed, it is much cheaper to add.
+    """
+    delta: relativedelta = parse_time_age(time_ago)
+    if delta.years or delta.months:
+        return -delta
+    return -timedelta(
+        days=delta.days,
+        hours=delta.hours,
+        minutes=delta.minutes,
+        seconds=delta.seconds,
+    )
+
+
+def _make_video(data: dict, scan_time, channel_id: int) -> ScannedVideo:
+    if time_ago := data["time_ago"]:
+        creation_time = scan_time + _time_age_offset(time_ago)
     else:
         creation_time = scan_time
-    return YouTubeVideo(
-        original_id=data["id"],
-        channel_id=channel_id,
-        title=data["title"],
-        style=data["style"],
-        time_ago=data["time_ago"],
-        scan_time=scan_time,
-        creation_time=creation_time,
-        live_24_7=False,
+    return ScannedVideo(
+        data["id"],
+        channel_id,
+        data["title"],
+        scan_time,
+        creation_time,
+        data["style"],
+        time_ago,
+    )
+
+
+async def _acquire(limiter: RateLimiter | RedisRateLimiter | None) -> None:
+    if limiter is not None:
+        await limiter.acquire()
+
+
+async def _parse(
+    context: ScanContext,
+    func: Callable[..., Any],
+    *args: Any,
+) -> Any:
+    if context.executor is None:
+        return func(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(context.executor, func, *args)
+
+
+async def _drain(response: HttpResponse) -> None:
+    # unread response closes connection, but page rest is usually small
+    size = 0
+    while size <= MAX_DRAIN_SIZE:
+        if not (chunk := await response.content.readany()):
+            return
+        size += len(chunk)
+    response.close()
+
+
+async def _read_init_data(response: HttpResponse) -> str:
+    """Read page only up to the end of ytInitialData object."""
+    extractor = InitDataExtractor()
+    decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(
+        errors="replace"
+    )
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        if (obj_content := extractor.feed(decoder.decode(chunk))) is not None:
+            await _drain(response)
+            return obj_content
+    raise YoutubeParserError("ytInitialData not found!")
+
+
+async def _get_tab_data(
+    url: str,
+    context: ScanContext,
+    with_tab_urls: bool,
+    known_ids: frozenset[str],
+    stop_at_known: bool,
+) -> dict:
+    params = dict(view=0, sort="dd", flow="grid")
+    await _acquire(context.limiter)
+    async with context.http_session.get(url, params=params) as r:
+        r.raise_for_status()
+        obj_content = await _read_init_data(r)
+    return await _parse(
+        context,
+        parse_channel_data,
+        obj_content,
+        with_tab_urls,
+        known_ids,
+        stop_at_known,
     )
 
 
-async def get_channel_data(channel: YouTubeChannel) -> YouTubeChannelData:
+async def get_channel_data(
+    channel: YouTubeChannel,
+    context: ScanContext,
+    known_ids: frozenset[str] = frozenset(),
+) -> YouTubeChannelData:
+    """Scan videos and streams tabs of channel.
+
+    Parsing of videos tab stops at the first video from known_ids.
+    Streams tab starts with live and upcoming streams, so known streams
+    are only skipped there.
+    """
     scan_time = datetime.now()
     make_video = partial(
         _make_video,
         scan_time=scan_time,
         channel_id=channel.id,
     )
+    get_videos = partial(
+        _get_tab_data,
+        channel.url + "/videos",
+        context,
+        known_ids=known_ids,
+        stop_at_known=True,
+    )
+    get_streams = partial(
+        _get_tab_data,
+        channel.url + "/streams",
+        context,
+        with_tab_urls=False,
+        known_ids=known_ids,
+        stop_at_known=False,
+    )
 
-    async with aiohttp.ClientSession() as session:
-        headers = {"Accept-Language": "en-US,en;q=0.5"}
-        session.headers.update(headers)
-        params = dict(view=0, sort="dd", flow="grid")
-
-        # video
-        r = await session.get(channel.url + "/videos", params=params)
-        r.raise_for_status()
-        data = parse_channel(await r.text())
+    cache = context.tab_cache
+    tabs = cache.get(channel.original_id) if cache is not None else None
+    if tabs is None:  # discover tabs of channel
+        data = await get_videos(with_tab_urls=True)
         videos = list(map(make_video, data["videos"]))
         tab_urls = data["tab_urls"]
+        if cache is not None:
+            cache.set(channel.original_id, tab_urls)
 
-        # streams
         streams = []
         if _has_tab(tab_urls, "/streams"):
-            r = await session.get(channel.url + "/streams", params=params)
-            r.raise_for_status()
-            data = parse_channel(await r.text())
+            data = await get_streams()
             streams = list(map(make_video, data["videos"]))
-
         return YouTubeChannelData(videos=videos, streams=streams)
 
+    assert cache is not None
+    try:
+        if "streams" in tabs:
+            video_data, stream_data = await asyncio.gather(
+                get_videos(with_tab_urls=False),
+                get_streams(),
+            )
+            streams = list(map(make_video, stream_data["videos"]))
+        else:
+            video_data = await get_videos(with_tab_urls=False)
+            streams = []
+    except Exception:
+        cache.invalidate(channel.original_id)  # layout could be changed
+        raise
+    videos = list(map(make_video, video_data["videos"]))
+    return YouTubeChannelData(videos=videos, streams=streams)
+
 
-async def get_channel_info(url: str) -> YouTubeChannel:
+async def get_channel_info(
+    url: str,
+    http_session: HttpSession,
+) -> YouTubeChannel:
     params = dict(view=0, sort="dd", flow="grid")
-    async with aiohttp.ClientSession() as session:
-        headers = {"Accept-Language": "en-US,en;q=0.5"}
-        session.headers.update(headers)
-        r = await session.get(url, params=params)
+    async with http_session.get(url, params=params) as r:
         r.raise_for_status()
-        info = parse_channel_info(await r.text())
-        return YouTubeChannel(
-            original_id=info["channel_id"],
-            canonical_base_url=info["canonical_base_url"],
-            title=info["title"],
-        )
+        info = parse_channel_info_data(await _read_init_data(r))
+    return YouTubeChannel(
+        original_id=info["channel_id"],
+        canonical_base_url=info["canonical_base_url"],
+        title=info["title"],
+    )
+
+
+async def _read_head(response: HttpResponse) -> str:
+    """Read page only up to the end of head."""
+    collector = TextCollector(HEAD_END)
+    decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(
+        errors="replace"
+    )
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        if (head := collector.feed(decoder.decode(chunk))) is not None:
+            response.close()  # rest of page is big, drop connection
+            return head
+    raise YoutubeParserError("End of head not found!")
+
+
+async def get_video_tags(url: str, context: ScanContext) -> list[str]:
+    await _acquire(context.limiter)
+    async with context.http_session.get(url) as r:
+        r.raise_for_status()
+        head = await _read_head(r)
+    return await _parse(context, parse_video_tags, head)
+
+
+def _conditional_headers(headers) -> dict[str, str]:
+    result = {}
+    if etag := headers.get("ETag"):
+        result["If-None-Match"] = etag
+    if last_modified := headers.get("Last-Modified"):
+        result["If-Modified-Since"] = last_modified
+    return result
 
 
-async def get_video_tags(url: str) -> list[str]:
-    async with aiohttp.ClientSession() as session:
-        headers = {"Accept-Language": "en-US,en;q=0.5"}
-        session.headers.update(headers)
-        r = await session.get(url=url)
+async def get_feed_data(
+    url: str,
+    http_session: HttpSession,
+    headers: dict[str, str],
+) -> tuple[list[dict] | None, dict[str, str]]:
+    """Return feed entries (None if not modified) and new request headers."""
+    async with http_session.get(url, headers=headers) as r:
+        if r.status == 304:
+            return None, headers
         r.raise_for_status()
-        return parse_video_tags(await r.text())
+        return parse_feed(await r.read()), _conditional_headers(r.headers)
+
+
+async def get_channel_data_by_feed(
+    channel: YouTubeChannel,
+    context: ScanContext,
+    known_ids: frozenset[str] = frozenset(),
+) -> YouTubeChannelData:
+    assert context.feed_cache is not None
+    await _acquire(context.limiter)
+    try:
+        entries, headers = await get_feed_data(
+            channel.feed_url,
+            context.http_session,
+            context.feed_cache.get(channel.original_id),
+        )
+    except (aiohttp.ClientResponseError, YoutubeParserError) as e:
+        logger.warning(f"Feed error {channel.original_id}: {e}")
+        return await get_channel_data(channel, context, known_ids)
+
+    if entries is None:  # nothing new since the last scan
+        return YouTubeChannelData()
+
+    last_time = datetime.now() - timedelta(days=LAST_DAYS_ON_PAGE)
+    data = YouTubeChannelData()  # no new recent videos, nothing to report
+    if any(
+        entry["published"] >= last_time and entry["id"] not in known_ids
+        for entry in entries
+    ):
+        # Feed has no style of videos (LIVE, UPCOMING, ...)
+        # and don't separate streams, so take them from the channel pages.
+        data = await get_channel_data(channel, context, known_ids)
+        published = {entry["id"]: entry["published"] for entry in entries}
+        for video in data:
+            if creation_time := published.get(video.original_id):
+                video.creation_time = creation_time
+    if data:
+        # videos are saved and sent by the caller, which can fail:
+        # the next request is unconditional until they are known,
+        # a 304 response would hide them
+        context.feed_cache.invalidate(channel.original_id)
+    else:
+        context.feed_cache.set(channel.original_id, headers)
+    return data
+
+
+async def scan_channel(
+    channel: YouTubeChannel,
+    context: ScanContext,
+    known_ids: frozenset[str] = frozenset(),
+) -> YouTubeChannelData:
+    if context.feed_cache is not None:
+        return await get_channel_data_by_feed(channel, context, known_ids)
+    return await get_channel_data(channel, context, known_ids)
+
+
+async def try_scan_channel(
+    channel: YouTubeChannel,
+    context: ScanContext,
+    known_ids: frozenset[str] = frozenset(),
+) -> YouTubeChannelData | None:
+    """Scan channel, log error and return None if it fails."""
+    try:
+        return await scan_channel(channel, context, known_ids)
+    except (aiohttp.ClientConnectorError, asyncio.TimeoutError) as e:
+        logger.error(f"Scan error {channel.title}\n{channel.url}\n{type(e)}")
+    except search.SearchError:
+        logger.exception(f"Search error {channel.title}\n{channel.url}")
+    except Exception as e:
+        logger.exception(e)
+    return None
@@ -0,0 +1,74 @@
+import argparse
+import sys
+from pathlib import Path
+
+from app.youtube_parser import json_backend
+
+from .parser import get_benchmarks
+from .runner import (
+    find_regressions,
+    format_result,
+    load_baseline,
+    run_benchmark,
+    save_baseline,
+)
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Parser benchmarks",
+    )
+    parser.add_argument("-k", "--filter", default="", help="name substring")
+    parser.add_argument("--min-time", type=float, default=1.0)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="save results as the new baseline",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed slowdown fraction against baseline",
+    )
+    parser.add_argument(
+        "--json-backend",
+        choices=json_backend.BACKENDS,
+        default="auto",
+    )
+    args = parser.parse_args()
+    print(f"JSON backend: {json_backend.set_backend(args.json_backend)}")
+
+    baseline = {}
+    if args.baseline.exists():
+        baseline = load_baseline(args.baseline)
+    elif not args.save:
+        print(
+            f"No baseline {args.baseline}, nothing to compare with: "
+            "save one with --save on the base commit first"
+        )
+    results = []
+    for benchmark in get_benchmarks():
+        if args.filter not in benchmark.name:
+            continue
+        result = run_benchmark(benchmark, args.min_time)
+        print(format_result(result, baseline.get(result.name)), flush=True)
+        results.append(result)
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if regressions := find_regressions(results, baseline, args.threshold):
+        print("Regressions:", *regressions, sep="\n  ")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,365 @@
+"""EXPLAIN of the scanner's hot queries without and with indexes of models.
+
+Fills a synthetic database, runs queries of app.database.utils,
+captures their SQL and compares plans and timings before and after
+the indexes (migration 3c7d5e9a1f42) are created.
+
+python -m benchmarks.db_indexes --database-url postgresql+asyncpg://...
+
+PostgreSQL tables are made in a scratch schema, dropped afterwards.
+Without --database-url in-memory SQLite is used (EXPLAIN QUERY PLAN only).
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
+
+from app.bot_ui.bot_types import Status
+from app.database.models import (
+    Base,
+    Category,
+    Forwarding,
+    TelegramChat,
+    TelegramThread,
+    YouTubeChannel,
+    YouTubeVideo,
+    YTChannelCategory,
+)
+from app.database.utils import (
+    get_forwarding_data,
+    get_known_video_ids,
+    get_recent_video_times,
+    get_yt_channels,
+)
+from app.settings import LAST_DAYS_IN_DB
+
+SCHEMA = "index_benchmark"
+INSERT_BATCH_SIZE = 10_000
+
+
+@dataclass
+class Dataset:
+    channel_ids: list[int] = field(default_factory=list)
+    chat_ids: list[int] = field(default_factory=list)
+    category_ids: list[int] = field(default_factory=list)
+
+
+@dataclass
+class QueryResult:
+    plan: str
+    time: float  # seconds, median
+
+
+Query = Callable[[AsyncSession, Dataset], Awaitable[Any]]
+
+QUERIES: dict[str, Query] = {
+    "get_known_video_ids": lambda s, d: get_known_video_ids(
+        d.channel_ids[::10], LAST_DAYS_IN_DB, s
+    ),
+    "get_known_video_ids[1]": lambda s, d: get_known_video_ids(
+        d.channel_ids[:1], LAST_DAYS_IN_DB, s
+    ),
+    "get_recent_video_times": lambda s, d: get_recent_video_times(
+        LAST_DAYS_IN_DB, s
+    ),
+    "get_forwarding_data": lambda s, d: get_forwarding_data(s),
+    "get_yt_channels": lambda s, d: get_yt_channels(
+        d.chat_ids[0], None, set(), 0, 10, s
+    ),
+    "get_yt_channels_by_category": lambda s, d: get_yt_channels(
+        d.chat_ids[0], None, set(d.category_ids[:2]), 0, 10, s
+    ),
+}
+
+
+async def _insert(
+    connection: AsyncConnection,
+    model: type[Base],
+    rows: list[dict],
+) -> None:
+    for i in range(0, len(rows), INSERT_BATCH_SIZE):
+        await connection.execute(
+            insert(model), rows[i : i + INSERT_BATCH_SIZE]
+        )
+
+
+async def fill(
+    connection: AsyncConnection,
+    channel_count: int,
+    video_count: int,
+    chat_count: int,
+    seed: int,
+) -> Dataset:
+    """Channels with videos of the last two years, 1% of them
+    with a 24/7 stream, each channel forwarded to 1-3 chats."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    data = Dataset(
+        channel_ids=list(range(1, channel_count + 1)),
+        chat_ids=[-100_000 - i for i in range(chat_count)],
+        category_ids=list(range(1, 21)),
+    )
+    await _insert(
+        connection,
+        YouTubeChannel,
+        [
+            dict(id=i, original_id=f"UC{i}", canonical_base_url="", title="")
+            for i in data.channel_ids
+        ],
+    )
+    await _insert(
+        connection,
+        TelegramChat,
+        [
+            dict(
+                original_id=chat_id,
+                type="channel",
+                title="",
+                user_name="",
+                status=int(Status.ON if rng.random() < 0.9 else Status.OFF),
+            )
+            for chat_id in data.chat_ids
+        ],
+    )
+    thread_chat_ids = data.chat_ids[::10]
+    await _insert(
+        connection,
+        TelegramThread,
+        [
+            dict(id=i, original_id=i, original_chat_id=chat_id)
+            for i, chat_id in enumerate(thread_chat_ids, 1)
+        ],
+    )
+    await _insert(
+        connection,
+        Category,
+        [dict(id=i, name=f"c{i}", order=i) for i in data.category_ids],
+    )
+
+    forwardings, categories, videos = [], [], []
+    for channel_id in data.channel_ids:
+        for chat_id in rng.sample(data.chat_ids, rng.randint(1, 3)):
+            thread_id = None
+            if chat_id in thread_chat_ids:
+                thread_id = thread_chat_ids.index(chat_id) + 1
+            forwardings.append(
+                dict(
+                    youtube_channel_id=channel_id,
+                    telegram_chat_id=chat_id,
+                    telegram_thread_id=thread_id,
+                )
+            )
+        for category_id in rng.sample(data.category_ids, 2):
+            categories.append(
+                dict(category_id=category_id, channel_id=channel_id)
+            )
+        for i in range(video_count):
+            creation_time = now - timedelta(days=rng.uniform(0, 730))
+            videos.append(
+                dict(
+                    original_id=f"{channel_id}_{i}",
+                    scan_time=creation_time,
+                    channel_id=channel_id,
+                    style="DEFAULT",
+                    creation_time=creation_time,
+                    live_24_7=i == 0 and rng.random() < 0.01,
+                )
+            )
+    await _insert(connection, Forwarding, forwardings)
+    await _insert(connection, YTChannelCategory, categories)
+    await _insert(connection, YouTubeVideo, videos)
+    return data
+
+
+async def analyze(engine: AsyncEngine) -> None:
+    autocommit_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+    command = "VACUUM ANALYZE" if is_postgres(engine) else "ANALYZE"
+    async with autocommit_engine.connect() as connection:
+        for table in Base.metadata.sorted_tables:
+            await connection.exec_driver_sql(f'{command} "{table.name}"')
+
+
+def is_postgres(engine: AsyncEngine) -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+async def capture_statements(
+    engine: AsyncEngine,
+    query: Query,
+    data: Dataset,
+) -> list[tuple[str, Any]]:
+    """SQL and parameters executed by the query."""
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, many):
+        if not many:
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        async with AsyncSession(engine) as session:
+            await query(session, data)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", on_execute)
+    return statements
+
+
+async def explain(
+    engine: AsyncEngine,
+    statements: list[tuple[str, Any]],
+    rounds: int,
+) -> QueryResult:
+    prefix = (
+        "EXPLAIN (ANALYZE, BUFFERS) "
+        if is_postgres(engine)
+        else "EXPLAIN QUERY PLAN "
+    )
+    plans, timings = [], []
+    async with engine.connect() as connection:
+        for statement, parameters in statements:
+            result = await connection.exec_driver_sql(
+                prefix + statement, parameters
+            )
+            plans.append("\n".join(str(row[-1]) for row in result))
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            for statement, parameters in statements:
+                result = await connection.exec_driver_sql(
+                    statement, parameters
+                )
+                result.fetchall()
+            timings.append(time.perf_counter() - t0)
+    return QueryResult("\n\n".join(plans), statistics.median(timings))
+
+
+async def explain_queries(
+    engine: AsyncEngine,
+    data: Dataset,
+    rounds: int,
+) -> dict[str, QueryResult]:
+    results = {}
+    for name, query in QUERIES.items():
+        statements = await capture_statements(engine, query, data)
+        results[name] = await explain(engine, statements, rounds)
+    return results
+
+
+async def set_indexes(engine: AsyncEngine, create: bool) -> None:
+    async with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if create:
+                    await connection.run_sync(index.create)
+                else:
+                    await connection.run_sync(index.drop)
+
+
+def format_plan(plan: str) -> str:
+    return "\n".join("    " + line for line in plan.splitlines())
+
+
+async def run(args: argparse.Namespace) -> None:
+    engine = create_async_engine(args.database_url)
+    if is_postgres(engine):
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def set_search_path(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"SET search_path TO {SCHEMA}")
+            cursor.close()
+
+        async with engine.begin() as connection:
+            # fails if the schema exists, it is never reused
+            await connection.exec_driver_sql(f"CREATE SCHEMA {SCHEMA}")
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        await set_indexes(engine, create=False)
+
+        t0 = time.perf_counter()
+        async with engine.begin() as connection:
+            data = await fill(
+                connection,
+                args.channels,
+                args.videos,
+                args.chats,
+                args.seed,
+            )
+        await analyze(engine)
+        print(
+            f"Dataset: {args.channels} channels, "
+            f"{args.channels * args.videos} videos, {args.chats} chats "
+            f"({time.perf_counter() - t0:.1f} s)",
+            flush=True,
+        )
+
+        before = await explain_queries(engine, data, args.rounds)
+        await set_indexes(engine, create=True)
+        await analyze(engine)
+        after = await explain_queries(engine, data, args.rounds)
+
+        if args.plans:
+            for name in QUERIES:
+                print(f"\n== {name}")
+                print(f"-- without indexes: {before[name].time * 1e3:.2f} ms")
+                print(format_plan(before[name].plan))
+                print(f"-- with indexes: {after[name].time * 1e3:.2f} ms")
+                print(format_plan(after[name].plan))
+            print()
+        for name in QUERIES:
+            print(
+                f"{name:<32}"
+                f" {before[name].time * 1e3:>10.2f} ms"
+                f" {after[name].time * 1e3:>10.2f} ms"
+                f"  x{before[name].time / after[name].time:.1f}"
+            )
+    finally:
+        if is_postgres(engine):
+            async with engine.begin() as connection:
+                await connection.exec_driver_sql(
+                    f"DROP SCHEMA {SCHEMA} CASCADE"
+                )
+        await engine.dispose()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.db_indexes",
+        description="Plans and timings of hot queries without/with indexes",
+    )
+    parser.add_argument(
+        "--database-url",
+        default="sqlite+aiosqlite://",
+        help=f"tables are made in {SCHEMA} schema of PostgreSQL",
+    )
+    parser.add_argument("--channels", type=int, default=2000)
+    parser.add_argument("--videos", type=int, default=100, help="per channel")
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-plans",
+        dest="plans",
+        action="store_false",
+        help="print timings only",
+    )
+    asyncio.run(run(parser.parse_args()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import itertools
+from pathlib import Path
+
+from app.youtube_parser import search
+from app.youtube_parser.youtube_parser import (
+    _load_init_data,
+    _parse_init_data,
+    parse_channel,
+    parse_channel_info,
+    parse_time_age,
+    parse_video_tags,
+)
+
+from .runner import Benchmark
+from .synthetic import LAYOUTS, PageGenerator, make_watch_page
+
+TEST_DATA_DIR = Path(__file__).parent.parent / "tests/test_data"
+CHANNEL_PAGES_DIR = TEST_DATA_DIR / "channels_without_streams/contents"
+
+TIME_AGO_TEXTS = [
+    "15 minutes ago",
+    "3 hours ago",
+    "1 day ago",
+    "Streamed 2 weeks ago",
+    "5 months ago",
+    "1 year ago",
+]
+
+VIDEO_TAGS = [
+    "python libraries 2023",
+    "best python libraries",
+    "python",
+    "python programming",
+    "top 10 python libraries",
+]
+
+
+def make_video_pages(count: int = 8, video_count: int = 30) -> list[str]:
+    generator = PageGenerator(seed=0)
+    return [
+        generator.make_page(
+            generator.make_channel(video_count, stream_count=5),
+            layout=LAYOUTS[i % len(LAYOUTS)],
+        )
+        for i in range(count)
+    ]
+
+
+def _cycle_call(func, args: list):
+    args_it = itertools.cycle(args)
+    return lambda: func(next(args_it))
+
+
+def get_benchmarks() -> list[Benchmark]:
+    pages = [
+        path.read_text(encoding="utf-8")
+        for path in sorted(CHANNEL_PAGES_DIR.glob("*.html"))
+    ]
+    objs = [_load_init_data(_parse_init_data(page)) for page in pages]
+    video_pages = make_video_pages()
+    tab_content = search.BySubPath("tabRenderer", "content")
+    url = search.ByKey("url")
+    watch_page = make_watch_page(VIDEO_TAGS)
+    return [
+        Benchmark("parse_channel", _cycle_call(parse_channel, pages)),
+        Benchmark(
+            "parse_channel[videos]",
+            _cycle_call(parse_channel, video_pages),
+        ),
+        Benchmark(
+            "parse_channel_info",
+            _cycle_call(parse_channel_info, pages),
+        ),
+        Benchmark("_parse_init_data", _cycle_call(_parse_init_data, pages)),
+        Benchmark(
+            "search.find_first",
+            _cycle_call(lambda obj: search.find_first(obj, tab_content), objs),
+        ),
+        Benchmark(
+            "search.find_all",
+            _cycle_call(lambda obj: search.find_all(obj, url), objs),
+        ),
+        Benchmark("parse_video_tags", lambda: parse_video_tags(watch_page)),
+        Benchmark(
+            "parse_time_age",
+            _cycle_call(parse_time_age, TIME_AGO_TEXTS),
+        ),
+    ]
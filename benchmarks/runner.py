@@ -0,0 +1,122 @@
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+
+@dataclass
+class Benchmark:
+    name: str
+    func: Callable[[], Any]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    ops_per_sec: float
+    p50: float  # seconds per call
+    p95: float
+    p99: float
+    peak_memory: int  # max bytes allocated by a call at peak
+
+
+def _measure_peak_memory(func: Callable[[], Any], rounds: int) -> int:
+    gc.collect()
+    max_peak = 0
+    tracemalloc.start()
+    try:
+        for _ in range(rounds):
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            max_peak = max(max_peak, peak - start)
+    finally:
+        tracemalloc.stop()
+    return max_peak
+
+
+def run_benchmark(
+    benchmark: Benchmark,
+    min_time: float = 1.0,
+    min_rounds: int = 5,
+    memory_rounds: int = 10,
+) -> BenchmarkResult:
+    benchmark.func()  # warm up caches
+    timings = []
+    start_time = time.perf_counter()
+    while (
+        len(timings) < min_rounds
+        or time.perf_counter() - start_time < min_time
+    ):
+        t0 = time.perf_counter()
+        benchmark.func()
+        timings.append(time.perf_counter() - t0)
+
+    if len(timings) > 1:
+        percentiles = statistics.quantiles(timings, n=100)
+        p50, p95, p99 = percentiles[49], percentiles[94], percentiles[98]
+    else:
+        p50 = p95 = p99 = timings[0]
+    return BenchmarkResult(
+        name=benchmark.name,
+        ops_per_sec=len(timings) / sum(timings),
+        p50=p50,
+        p95=p95,
+        p99=p99,
+        peak_memory=_measure_peak_memory(benchmark.func, memory_rounds),
+    )
+
+
+def load_baseline(path: Path) -> dict[str, BenchmarkResult]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {name: BenchmarkResult(**result) for name, result in data.items()}
+
+
+def save_baseline(path: Path, results: Iterable[BenchmarkResult]) -> None:
+    data = {result.name: asdict(result) for result in results}
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def find_regressions(
+    results: Iterable[BenchmarkResult],
+    baseline: dict[str, BenchmarkResult],
+    threshold: float,
+) -> list[str]:
+    """Descriptions of results slower or bigger than baseline
+    by more than threshold (fraction)."""
+    regressions = []
+    for result in results:
+        if (base := baseline.get(result.name)) is None:
+            continue
+        if result.ops_per_sec < base.ops_per_sec * (1 - threshold):
+            regressions.append(
+                f"{result.name}: {result.ops_per_sec:.1f} ops/s, "
+                f"baseline {base.ops_per_sec:.1f} ops/s"
+            )
+        if result.peak_memory > base.peak_memory * (1 + threshold):
+            regressions.append(
+                f"{result.name}: peak memory {result.peak_memory} B, "
+                f"baseline {base.peak_memory} B"
+            )
+    return regressions
+
+
+def format_result(
+    result: BenchmarkResult,
+    base: BenchmarkResult | None = None,
+) -> str:
+    text = (
+        f"{result.name:<32} {result.ops_per_sec:>10.1f} ops/s"
+        f"  p50 {result.p50 * 1e6:>9.1f} us"
+        f"  p95 {result.p95 * 1e6:>9.1f} us"
+        f"  p99 {result.p99 * 1e6:>9.1f} us"
+        f"  peak {result.peak_memory / 1024:>8.1f} KiB"
+    )
+    if base is not None:
+        text += f"  x{result.ops_per_sec / base.ops_per_sec:.2f}"
+    return text
@@ -0,0 +1,363 @@
+"""Deterministic synthetic channel pages for load and stress tests.
+
+python -m benchmarks.synthetic OUT_DIR --channels 10000 --videos 30 --seed 1
+"""
+
+import argparse
+import json
+import random
+import string
+from dataclasses import dataclass
+from html import escape
+from pathlib import Path
+
+ID_ALPHABET = string.ascii_letters + string.digits + "-_"
+TIME_UNITS = [
+    ("second", 59),
+    ("minute", 59),
+    ("hour", 23),
+    ("day", 6),
+    ("week", 3),
+    ("month", 11),
+    ("year", 10),
+]
+WORDS = (
+    "python rust async parser guide review live stream news update "
+    "tutorial tips music game build release performance data web"
+).split()
+
+LAYOUTS = ("rich", "grid")  # richGridRenderer, sectionListRenderer
+
+
+@dataclass
+class SyntheticVideo:
+    id: str
+    title: str
+    style: str  # DEFAULT, LIVE, UPCOMING
+    time_ago: str | None
+
+
+@dataclass
+class SyntheticChannel:
+    id: str
+    title: str
+    canonical_base_url: str
+    videos: list[SyntheticVideo]
+    streams: list[SyntheticVideo]
+
+
+def _time_ago(value: int, unit: str, streamed: bool) -> str:
+    text = f"{value} {unit}{'s' if value > 1 else ''} ago"
+    return f"Streamed {text}" if streamed else text
+
+
+def _thumbnails(video_id: str) -> dict:
+    return {
+        "thumbnails": [
+            {
+                "url": f"https://i.ytimg.com/vi/{video_id}/hq{i}.jpg",
+                "width": 168 * i,
+                "height": 94 * i,
+            }
+            for i in range(1, 5)
+        ]
+    }
+
+
+def _watch_endpoint(video_id: str) -> dict:
+    return {
+        "clickTrackingParams": "CJQBEJQ1GAAiEwj",
+        "commandMetadata": {
+            "webCommandMetadata": {
+                "url": f"/watch?v={video_id}",
+                "webPageType": "WEB_PAGE_TYPE_WATCH",
+                "rootVe": 3832,
+            }
+        },
+        "watchEndpoint": {"videoId": video_id},
+    }
+
+
+def _video_renderer(video: SyntheticVideo) -> dict:
+    renderer = {
+        "videoId": video.id,
+        "thumbnail": _thumbnails(video.id),
+        "title": {
+            "runs": [{"text": video.title}],
+            "accessibility": {"accessibilityData": {"label": video.title}},
+        },
+        "navigationEndpoint": _watch_endpoint(video.id),
+        "viewCountText": {"simpleText": "1,234 views"},
+        "menu": {
+            "menuRenderer": {
+                "items": [
+                    {
+                        "menuServiceItemRenderer": {
+                            "text": {"runs": [{"text": "Add to queue"}]},
+                            "serviceEndpoint": _watch_endpoint(video.id),
+                        }
+                    }
+                ]
+            }
+        },
+        "thumbnailOverlays": [
+            {
+                "thumbnailOverlayTimeStatusRenderer": {
+                    "text": {"simpleText": "10:01"},
+                    "style": video.style,
+                }
+            },
+            {"thumbnailOverlayNowPlayingRenderer": {"text": {"runs": []}}},
+        ],
+        "trackingParams": "CJQBEJQ1GAAiEwj",
+    }
+    if video.time_ago is not None:
+        renderer["publishedTimeText"] = {"simpleText": video.time_ago}
+    return renderer
+
+
+def _continuation() -> dict:
+    return {
+        "continuationItemRenderer": {
+            "continuationEndpoint": {
+                "continuationCommand": {"token": "4qmFsgKrARIYVUM"}
+            }
+        }
+    }
+
+
+def _tab_content(videos: list[SyntheticVideo], layout: str) -> dict:
+    if layout == "rich":
+        items = [
+            {"richItemRenderer": {"content": {"videoRenderer": r}}}
+            for r in map(_video_renderer, videos)
+        ]
+        return {"richGridRenderer": {"contents": items + [_continuation()]}}
+
+    items = [{"gridVideoRenderer": r} for r in map(_video_renderer, videos)]
+    if items:
+        content_0 = {"gridRenderer": {"items": items + [_continuation()]}}
+    else:
+        content_0 = {
+            "messageRenderer": {
+                "text": {"simpleText": "This channel has no videos."}
+            }
+        }
+    return {
+        "sectionListRenderer": {
+            "contents": [{"itemSectionRenderer": {"contents": [content_0]}}]
+        }
+    }
+
+
+def make_watch_page(tags: list[str], body_size: int = 1_000_000) -> str:
+    """Watch page with og:video:tag metas in head and big scripts
+    in body, like the real one."""
+    metas = "".join(
+        f'<meta property="og:video:tag" content="{escape(tag)}">'
+        for tag in tags
+    )
+    script = '<script nonce="x">var ytInitialPlayerResponse = {};</script>'
+    return (
+        '<!DOCTYPE html><html lang="en"><head>'
+        '<meta http-equiv="origin-trial" content="AAAA">'
+        '<script nonce="x">var ytcfg = {"d": "</he" + "ad>"};</script>'
+        "<title>Video - YouTube</title>"
+        '<meta property="og:title" content="Video">'
+        f"{metas}"
+        '<link rel="canonical" href="https://www.youtube.com/watch?v=x">'
+        "</head><body>"
+        f"{script * (body_size // len(script))}"
+        "</body></html>"
+    )
+
+
+class PageGenerator:
+    """Channels and their pages, the same for the same seed."""
+
+    def __init__(self, seed: int = 0):
+        self._random = random.Random(seed)
+
+    def _id(self, length: int = 11) -> str:
+        return "".join(self._random.choices(ID_ALPHABET, k=length))
+
+    def _title(self) -> str:
+        words = self._random.choices(WORDS, k=self._random.randint(2, 8))
+        return " ".join(words).capitalize()
+
+    def _time_ages(self, count: int, streamed: bool) -> list[str]:
+        # newest first, as the tabs are sorted
+        ages = sorted(
+            (self._random.randrange(len(TIME_UNITS)), self._random.random())
+            for _ in range(count)
+        )
+        result = []
+        for unit_index, fraction in ages:
+            unit, max_value = TIME_UNITS[unit_index]
+            value = 1 + int(fraction * max_value)
+            result.append(_time_ago(value, unit, streamed))
+        return result
+
+    def make_videos(self, count: int) -> list[SyntheticVideo]:
+        return [
+            SyntheticVideo(self._id(), self._title(), "DEFAULT", time_ago)
+            for time_ago in self._time_ages(count, streamed=False)
+        ]
+
+    def make_streams(
+        self,
+        count: int,
+        live_count: int = 1,
+        upcoming_count: int = 1,
+    ) -> list[SyntheticVideo]:
+        """Live and upcoming streams (without time) go first."""
+        live_count = min(live_count, count)
+        upcoming_count = min(upcoming_count, count - live_count)
+        streams = [
+            SyntheticVideo(self._id(), self._title(), "LIVE", None)
+            for _ in range(live_count)
+        ]
+        streams += [
+            SyntheticVideo(self._id(), self._title(), "UPCOMING", None)
+            for _ in range(upcoming_count)
+        ]
+        time_ages = self._time_ages(
+            count - live_count - upcoming_count,
+            streamed=True,
+        )
+        streams += [
+            SyntheticVideo(self._id(), self._title(), "DEFAULT", time_ago)
+            for time_ago in time_ages
+        ]
+        return streams
+
+    def make_channel(
+        self,
+        video_count: int,
+        stream_count: int = 0,
+    ) -> SyntheticChannel:
+        channel_id = "UC" + self._id(22)
+        title = self._title()
+        return SyntheticChannel(
+            id=channel_id,
+            title=title,
+            canonical_base_url=f"/@{channel_id[2:12].lower()}",
+            videos=self.make_videos(video_count),
+            streams=self.make_streams(stream_count) if stream_count else [],
+        )
+
+    def make_page(
+        self,
+        channel: SyntheticChannel,
+        tab: str = "videos",
+        layout: str | None = None,
+    ) -> str:
+        """HTML of channel tab page (videos or streams)."""
+        if layout is None:
+            layout = self._random.choice(LAYOUTS)
+        tab_names = ["featured", "videos"]
+        if channel.streams:
+            tab_names.append("streams")
+        tab_names.append("playlists")
+
+        tabs = []
+        for name in tab_names:
+            url = f"{channel.canonical_base_url}/{name}"
+            tab_renderer: dict = {
+                "endpoint": {
+                    "commandMetadata": {"webCommandMetadata": {"url": url}}
+                },
+                "title": name.capitalize(),
+                "selected": name == tab,
+            }
+            if name == tab:
+                videos = (
+                    channel.streams if tab == "streams" else channel.videos
+                )
+                tab_renderer["content"] = _tab_content(videos, layout)
+            tabs.append({"tabRenderer": tab_renderer})
+
+        obj = {
+            "responseContext": {
+                "serviceTrackingParams": [
+                    {
+                        "service": "CSI",
+                        "params": [{"key": "c", "value": "WEB"}],
+                    }
+                ]
+            },
+            "contents": {"twoColumnBrowseResultsRenderer": {"tabs": tabs}},
+            "header": {
+                "c4TabbedHeaderRenderer": {
+                    "channelId": channel.id,
+                    "title": channel.title,
+                    "navigationEndpoint": {
+                        "browseEndpoint": {
+                            "browseId": channel.id,
+                            "canonicalBaseUrl": channel.canonical_base_url,
+                        }
+                    },
+                }
+            },
+            "metadata": {
+                "channelMetadataRenderer": {
+                    "title": channel.title,
+                    "externalId": channel.id,
+                }
+            },
+        }
+        return (
+            "<!DOCTYPE html><html><head>"
+            f"<title>{channel.title} - YouTube</title></head><body>"
+            '<script nonce="x">var ytcfg = {"EXPERIMENT_FLAGS": {}};</script>'
+            f'<script nonce="x">var ytInitialData = {json.dumps(obj)};'
+            "</script>"
+            '<script nonce="x">window.ytAtR = "";</script>'
+            "</body></html>"
+        )
+
+
+def write_channels(
+    out_dir: Path,
+    channel_count: int,
+    video_count: int,
+    stream_count: int = 0,
+    seed: int = 0,
+) -> list[SyntheticChannel]:
+    """Write OUT_DIR/<channel id>/videos.html (and streams.html)."""
+    generator = PageGenerator(seed)
+    channels = []
+    for _ in range(channel_count):
+        channel = generator.make_channel(video_count, stream_count)
+        channel_dir = out_dir / channel.id
+        channel_dir.mkdir(parents=True, exist_ok=True)
+        tabs = ["videos", "streams"] if channel.streams else ["videos"]
+        for tab in tabs:
+            (channel_dir / f"{tab}.html").write_text(
+                generator.make_page(channel, tab),
+                encoding="utf-8",
+            )
+        channels.append(channel)
+    return channels
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic")
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--channels", type=int, default=100)
+    parser.add_argument("--videos", type=int, default=30)
+    parser.add_argument("--streams", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    channels = write_channels(
+        args.out_dir,
+        args.channels,
+        args.videos,
+        args.streams,
+        args.seed,
+    )
+    print(f"{len(channels)} channels written to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""hot_query_indexes
+
+Revision ID: 3c7d5e9a1f42
+Revises: e41c8a2f7b90
+Create Date: 2026-10-17 20:41:13.085127
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3c7d5e9a1f42"
+down_revision = "e41c8a2f7b90"
+branch_labels = None
+depends_on = None
+
+# name, table, columns, options
+indexes = [
+    (
+        "ix_videos_channel_creation",
+        "YouTubeVideos",
+        ["channel_id", "creation_time"],
+        dict(postgresql_include=["original_id"]),
+    ),
+    (
+        "ix_videos_live_24_7",
+        "YouTubeVideos",
+        ["channel_id"],
+        dict(
+            postgresql_include=["original_id"],
+            postgresql_where=sa.text("live_24_7 IS true"),
+            sqlite_where=sa.text("live_24_7 IS true"),
+        ),
+    ),
+    (
+        "ix_videos_creation_time",
+        "YouTubeVideos",
+        ["creation_time"],
+        {},
+    ),
+    (
+        "ix_forwarding_chat",
+        "Forwarding",
+        ["telegram_chat_id", "telegram_thread_id"],
+        {},
+    ),
+    (
+        "ix_yt_channel_categories_channel",
+        "YTChannelCategories",
+        ["channel_id"],
+        {},
+    ),
+]
+
+
+# CREATE INDEX CONCURRENTLY doesn't lock writes of the scanner,
+# but can't run inside a transaction.
+
+
+def upgrade() -> None:
+    postgres = op.get_context().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in indexes:
+            if postgres:  # INVALID index left by interrupted upgrade
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                **options,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(indexes):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+            )
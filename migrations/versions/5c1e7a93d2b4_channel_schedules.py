@@ -0,0 +1,36 @@
+"""channel_schedules
+
+Revision ID: 5c1e7a93d2b4
+Revises: 0f4a9f4a0595
+Create Date: 2026-10-17 10:12:31.402117
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5c1e7a93d2b4"
+down_revision = "0f4a9f4a0595"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "YouTubeChannelSchedules",
+        sa.Column("channel_id", sa.Integer(), nullable=False),
+        sa.Column("next_scan_time", sa.DateTime(), nullable=False),
+        sa.Column("upload_interval", sa.Float(), nullable=True),
+        sa.Column("last_upload_time", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["channel_id"],
+            ["YouTubeChannels.id"],
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("channel_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("YouTubeChannelSchedules")
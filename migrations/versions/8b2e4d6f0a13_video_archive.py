@@ -0,0 +1,54 @@
+"""video_archive
+
+Revision ID: 8b2e4d6f0a13
+Revises: 3c7d5e9a1f42
+Create Date: 2026-10-17 22:05:36.419870
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8b2e4d6f0a13"
+down_revision = "3c7d5e9a1f42"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    postgres = op.get_context().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        if postgres:  # INVALID index left by interrupted upgrade
+            op.execute(
+                "DROP INDEX CONCURRENTLY IF EXISTS ix_video_tags_scan_time"
+            )
+        op.create_index(
+            "ix_video_tags_scan_time",
+            "YouTubeVideoTags",
+            ["scan_time"],
+            postgresql_concurrently=True,
+        )
+
+    op.create_table(
+        "YouTubeVideosArchive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("original_id", sa.String(), nullable=False),
+        sa.Column("scan_time", sa.DateTime(), nullable=False),
+        sa.Column("channel_id", sa.Integer(), nullable=True),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("style", sa.String(), nullable=True),
+        sa.Column("time_ago", sa.String(), nullable=True),
+        sa.Column("creation_time", sa.DateTime(), nullable=True),
+        sa.Column("live_24_7", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_video_tags_scan_time",
+            table_name="YouTubeVideoTags",
+            postgresql_concurrently=True,
+        )
+    op.drop_table("YouTubeVideosArchive")
@@ -0,0 +1,29 @@
+"""video_tags
+
+Revision ID: 9d3b6f1e2a7c
+Revises: 5c1e7a93d2b4
+Create Date: 2026-10-17 15:40:12.583021
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9d3b6f1e2a7c"
+down_revision = "5c1e7a93d2b4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "YouTubeVideoTags",
+        sa.Column("original_id", sa.String(), nullable=False),
+        sa.Column("tags", sa.JSON(), nullable=False),
+        sa.Column("scan_time", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("original_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("YouTubeVideoTags")
@@ -0,0 +1,36 @@
+"""channel_failures
+
+Revision ID: e41c8a2f7b90
+Revises: 9d3b6f1e2a7c
+Create Date: 2026-10-17 18:02:47.311542
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e41c8a2f7b90"
+down_revision = "9d3b6f1e2a7c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "YouTubeChannelFailures",
+        sa.Column("channel_id", sa.Integer(), nullable=False),
+        sa.Column("failure_count", sa.Integer(), nullable=False),
+        sa.Column("first_failure_time", sa.DateTime(), nullable=False),
+        sa.Column("next_scan_time", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["channel_id"],
+            ["YouTubeChannels.id"],
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("channel_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("YouTubeChannelFailures")
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+import redis.asyncio
+from redis.exceptions import ConnectionError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database.models import Base
+
+REDIS_URL = os.environ.get("TEST_REDIS_URL", "redis://localhost:6379/15")
+
+
+@pytest.fixture
+async def engine():
+    """In-memory SQLite database with all tables of models."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_maker(engine) -> async_sessionmaker:
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+@pytest.fixture
+async def redis_client():
+    client = redis.asyncio.from_url(REDIS_URL)
+    try:
+        await client.ping()
+    except (ConnectionError, OSError):
+        pytest.skip(f"Redis is not available at {REDIS_URL}")
+    yield client
+    await client.close()
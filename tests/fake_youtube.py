@@ -0,0 +1,276 @@
+"""Fake YouTube for end-to-end scanner load tests.
+
+python -m tests.fake_youtube --channels 5000 --concurrency 50 \
+    --request-rate 200 --latency 0.05 --error-rate 0.01 --rate-limit 0.01
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Iterator
+
+import aiohttp
+from aiohttp import web
+
+from benchmarks.synthetic import (
+    LAYOUTS,
+    WORDS,
+    PageGenerator,
+    SyntheticChannel,
+    make_watch_page,
+)
+
+TABS = ("videos", "streams")
+CONSENT_PAGE = (
+    "<!DOCTYPE html><html><head><title>Before you continue to YouTube"
+    "</title></head><body><form action='/save'></form></body></html>"
+)
+
+
+@dataclass
+class FakeYouTubeConfig:
+    latency: float = 0  # seconds before every response
+    jitter: float = 0  # random part of latency, seconds
+    error_rate: float = 0  # part of responses with 500
+    rate_limit: float = 0  # part of responses with 429
+    consent_rate: float = 0  # part of redirects to consent page
+    watch_body_size: int = 100_000
+    seed: int = 0
+
+
+class FakeYouTube:
+    """Channel, tab and watch pages from synthetic channels or fixtures.
+
+    /channel/<id>, /@<handle>          - channel root (featured) page
+    /channel/<id>/<tab>, /@<handle>/<tab> - videos or streams tab
+    /watch?v=<id>                      - watch page with tags in head
+    """
+
+    def __init__(self, config: FakeYouTubeConfig | None = None):
+        self.config = config or FakeYouTubeConfig()
+        self.stats: Counter[str] = Counter()
+        self._random = random.Random(self.config.seed)
+        self._generator = PageGenerator(self.config.seed)
+        self._channels: dict[str, tuple[SyntheticChannel, str]] = {}
+        self._handles: dict[str, str] = {}  # canonical base url -> id
+        self._pages: dict[tuple[str, str], str] = {}  # fixtures
+
+    def add_channel(
+        self,
+        channel: SyntheticChannel,
+        layout: str | None = None,
+    ) -> None:
+        if layout is None:
+            layout = LAYOUTS[len(self._channels) % len(LAYOUTS)]
+        self._channels[channel.id] = channel, layout
+        self._handles[channel.canonical_base_url] = channel.id
+
+    def add_page(self, channel_id: str, tab: str, html: str) -> None:
+        """Fixture page, served instead of synthetic one."""
+        self._pages[channel_id, tab] = html
+
+    def load_pages(self, pages_dir: Path) -> None:
+        """Pages written by benchmarks.synthetic: <channel id>/<tab>.html"""
+        for path in pages_dir.glob("*/*.html"):
+            self.add_page(
+                path.parent.name,
+                path.stem,
+                path.read_text(encoding="utf-8"),
+            )
+
+    def make_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._faults])
+        app.router.add_get("/consent", self._consent, name="consent")
+        app.router.add_get("/watch", self._watch)
+        app.router.add_get("/channel/{channel_id}", self._channel)
+        app.router.add_get("/channel/{channel_id}/{tab}", self._channel)
+        app.router.add_get("/{handle:@[^/]+}", self._channel)
+        app.router.add_get("/{handle:@[^/]+}/{tab}", self._channel)
+        return app
+
+    @web.middleware
+    async def _faults(
+        self,
+        request: web.Request,
+        handler: Callable[[web.Request], Awaitable[web.StreamResponse]],
+    ) -> web.StreamResponse:
+        config = self.config
+        self.stats["requests"] += 1
+        latency = config.latency + config.jitter * self._random.random()
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+        value = self._random.random()
+        if value < config.rate_limit:
+            response = web.Response(status=429, headers={"Retry-After": "1"})
+        elif value < config.rate_limit + config.error_rate:
+            response = web.Response(status=500)
+        elif (
+            value < config.rate_limit + config.error_rate + config.consent_rate
+            and request.path != "/consent"
+        ):
+            location = request.app.router["consent"].url_for()
+            location = location.with_query({"continue": request.path_qs})
+            response = web.Response(
+                status=302,
+                headers={"Location": str(location)},
+            )
+        else:
+            response = await handler(request)
+        self.stats[str(response.status)] += 1
+        return response
+
+    async def _consent(self, request: web.Request) -> web.Response:
+        return web.Response(text=CONSENT_PAGE, content_type="text/html")
+
+    async def _watch(self, request: web.Request) -> web.Response:
+        video_id = request.query.get("v", "")
+        tags = random.Random(video_id).sample(WORDS, 3)
+        return web.Response(
+            text=make_watch_page(tags, self.config.watch_body_size),
+            content_type="text/html",
+        )
+
+    async def _channel(self, request: web.Request) -> web.Response:
+        info = request.match_info
+        channel_id = info.get("channel_id")
+        if channel_id is None:
+            channel_id = self._handles.get("/" + info["handle"], "")
+        tab = info.get("tab", "featured")
+        if (html := self._pages.get((channel_id, tab))) is None:
+            if channel_id not in self._channels:
+                return web.Response(status=404)
+            channel, layout = self._channels[channel_id]
+            if tab not in TABS or (tab == "streams" and not channel.streams):
+                tab = "featured"  # like YouTube, for unknown tabs
+            html = self._generator.make_page(channel, tab, layout)
+        return web.Response(text=html, content_type="text/html")
+
+
+@contextmanager
+def serve_in_thread(app: web.Application) -> Iterator[str]:
+    """Run app in its own thread and event loop, yield base url.
+
+    So the work of fake server doesn't add to event loop lag of scanner.
+    """
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app, access_log=None)
+    started = threading.Event()
+
+    def run() -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        loop.run_until_complete(site.start())
+        started.set()
+        loop.run_forever()
+        loop.run_until_complete(runner.cleanup())
+        loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait()
+    host, port = runner.addresses[0][:2]
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+
+async def run_load(args: argparse.Namespace) -> None:
+    from app.database.models import YouTubeChannel, set_youtube_base_url
+    from app.rate_limiter import RateLimiter
+    from app.run import scan_youtube_channels
+    from app.youtube_utils import ScanContext, TabLayoutCache
+
+    config = FakeYouTubeConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        consent_rate=args.consent_rate,
+        seed=args.seed,
+    )
+    fake = FakeYouTube(config)
+    generator = PageGenerator(args.seed)
+    channels = []
+    for i in range(args.channels):
+        # every other channel has streams tab
+        synthetic = generator.make_channel(
+            args.videos,
+            args.streams if i % 2 else 0,
+        )
+        fake.add_channel(synthetic)
+        channel = YouTubeChannel(
+            original_id=synthetic.id,
+            canonical_base_url=synthetic.canonical_base_url,
+            title=synthetic.title,
+        )
+        channel.id = i + 1
+        channels.append(channel)
+    if args.pages_dir is not None:
+        fake.load_pages(args.pages_dir)
+
+    with serve_in_thread(fake.make_app()) as base_url:
+        set_youtube_base_url(base_url)
+        connector = aiohttp.TCPConnector(limit=args.pool_size)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            context = ScanContext(
+                session,
+                RateLimiter(args.request_rate),
+                tab_cache=TabLayoutCache(24 * 60 * 60),
+            )
+            for round_number in range(1, args.rounds + 1):
+                fake.stats.clear()
+                start_time = time.monotonic()
+                scan_data = await scan_youtube_channels(
+                    channels,
+                    context,
+                    args.concurrency,
+                )
+                elapsed = time.monotonic() - start_time
+                video_count = sum(
+                    len(list(data)) for data in scan_data.values()
+                )
+                stats = ", ".join(
+                    f"{k}: {v}" for k, v in sorted(fake.stats.items())
+                )
+                print(
+                    f"Round {round_number}: "
+                    f"{len(scan_data)}/{len(channels)} channels, "
+                    f"{video_count} videos in {elapsed:.1f}s; {stats}",
+                    flush=True,
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m tests.fake_youtube",
+        description="Scan synthetic channels on fake YouTube",
+    )
+    parser.add_argument("--channels", type=int, default=1000)
+    parser.add_argument("--videos", type=int, default=30)
+    parser.add_argument("--streams", type=int, default=5)
+    parser.add_argument("--pages-dir", type=Path, help="fixture pages")
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--request-rate", type=float, default=100)
+    parser.add_argument("--pool-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-limit", type=float, default=0)
+    parser.add_argument("--consent-rate", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run_load(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+from benchmarks.runner import (
+    Benchmark,
+    BenchmarkResult,
+    find_regressions,
+    load_baseline,
+    run_benchmark,
+    save_baseline,
+)
+
+
+def make_result(ops_per_sec: float, peak_memory: int) -> BenchmarkResult:
+    return BenchmarkResult("bench", ops_per_sec, 0.1, 0.2, 0.3, peak_memory)
+
+
+def test_run_benchmark():
+    result = run_benchmark(Benchmark("sum", lambda: sum(range(100))), 0.01)
+    assert result.name == "sum"
+    assert result.ops_per_sec > 0
+    assert result.p50 <= result.p95 <= result.p99
+
+
+def test_baseline(tmp_path):
+    path = tmp_path / "baseline.json"
+    save_baseline(path, [make_result(100, 1000)])
+    baseline = load_baseline(path)
+    assert baseline == {"bench": make_result(100, 1000)}
+
+    assert not find_regressions([make_result(85, 1100)], baseline, 0.2)
+    assert len(find_regressions([make_result(70, 1000)], baseline, 0.2)) == 1
+    assert len(find_regressions([make_result(70, 2000)], baseline, 0.2)) == 2
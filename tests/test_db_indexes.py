@@ -0,0 +1,15 @@
+from benchmarks.db_indexes import QUERIES, explain_queries, fill, set_indexes
+
+
+async def test_explain_queries(engine):
+    await set_indexes(engine, create=False)
+    async with engine.begin() as connection:
+        data = await fill(connection, 50, 20, 10, seed=1)
+    before = await explain_queries(engine, data, rounds=1)
+    await set_indexes(engine, create=True)
+    after = await explain_queries(engine, data, rounds=1)
+
+    assert before.keys() == after.keys() == QUERIES.keys()
+    name = "get_known_video_ids[1]"
+    assert "ix_videos_channel_creation" not in before[name].plan
+    assert "ix_videos_channel_creation" in after[name].plan
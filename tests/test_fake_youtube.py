@@ -0,0 +1,80 @@
+import logging
+
+import aiohttp
+import pytest
+from aiohttp.test_utils import TestServer
+
+from app.database import models
+from app.database.models import YouTubeChannel, set_youtube_base_url
+from app.run import scan_youtube_channels
+from app.youtube_utils import ScanContext, get_channel_info, get_video_tags
+from benchmarks.synthetic import PageGenerator
+from tests.fake_youtube import FakeYouTube, FakeYouTubeConfig
+
+
+def make_channels(fake: FakeYouTube, count: int) -> list[YouTubeChannel]:
+    generator = PageGenerator(seed=5)
+    channels = []
+    for i in range(count):
+        synthetic = generator.make_channel(5, 3 if i % 2 else 0)
+        fake.add_channel(synthetic)
+        channel = YouTubeChannel(
+            original_id=synthetic.id,
+            canonical_base_url=synthetic.canonical_base_url,
+            title=synthetic.title,
+        )
+        channel.id = i + 1
+        channels.append(channel)
+    return channels
+
+
+@pytest.fixture
+async def fake_server():
+    fake = FakeYouTube()
+    base_url = models.YT_BASE_URL
+    async with TestServer(fake.make_app()) as server:
+        set_youtube_base_url(str(server.make_url("/")))
+        yield fake
+    set_youtube_base_url(base_url)
+
+
+async def test_scan(fake_server, caplog):
+    channels = make_channels(fake_server, 6)
+    async with aiohttp.ClientSession() as http_session:
+        context = ScanContext(http_session)
+        with caplog.at_level(logging.INFO, logger="app.run"):
+            scan_data = await scan_youtube_channels(channels, context, 3)
+        # the same layout of all pages, found by learned paths
+        hits, count = map(int, caplog.messages[-1].split()[-1].split("/"))
+        assert caplog.messages[-1].startswith("Path cache hits:")
+        assert count >= 6 + 3 and hits >= count - 3
+        assert len(scan_data) == 6
+        assert all(len(data.videos) == 5 for data in scan_data.values())
+        assert sum(len(data.streams) for data in scan_data.values()) == 9
+        assert fake_server.stats["requests"] == 6 + 3
+
+        info = await get_channel_info(channels[0].canonical_url, http_session)
+        assert info == channels[0] and info.title == channels[0].title
+        video = next(iter(scan_data[channels[0]]))
+        assert len(await get_video_tags(video.url, context)) == 3
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        FakeYouTubeConfig(error_rate=1),
+        FakeYouTubeConfig(rate_limit=1),
+        FakeYouTubeConfig(consent_rate=1),
+    ],
+)
+async def test_faults(fake_server, config):
+    channels = make_channels(fake_server, 4)
+    fake_server.config = config
+    async with aiohttp.ClientSession() as http_session:
+        scan_data = await scan_youtube_channels(
+            channels,
+            ScanContext(http_session),
+            2,
+        )
+    assert scan_data == {}
+    assert fake_server.stats["200"] == (4 if config.consent_rate else 0)
@@ -0,0 +1,211 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.database import models
+from app.database.models import YouTubeChannel, set_youtube_base_url
+from app.youtube_parser.feed_parser import parse_feed
+from app.youtube_utils import (
+    FeedCache,
+    ScanContext,
+    get_channel_data_by_feed,
+    get_feed_data,
+)
+from benchmarks.synthetic import PageGenerator
+from tests.fake_youtube import FakeYouTube
+
+FEED_PATH = Path(__file__).parent / "test_data/feeds/videos.xml"
+ETAG = '"feed-v1"'
+
+
+def make_feed_app(requests: list[str]) -> web.Application:
+    """Stand-in for https://www.youtube.com/feeds/videos.xml"""
+
+    async def feed(request: web.Request) -> web.Response:
+        requests.append(request.query_string)
+        if request.headers.get("If-None-Match") == ETAG:
+            return web.Response(status=304)
+        return web.Response(
+            body=FEED_PATH.read_bytes(),
+            content_type="application/atom+xml",
+            headers={"ETag": ETAG},
+        )
+
+    app = web.Application()
+    app.router.add_get("/feeds/videos.xml", feed)
+    return app
+
+
+def test_parse_feed():
+    entries = parse_feed(FEED_PATH.read_bytes())
+    assert [e["id"] for e in entries] == ["o06MyVhYte4", "dQw4w9WgXcQ"]
+    assert entries[0]["title"] == "Top Python libraries & frameworks"
+    assert entries[0]["published"] > entries[1]["published"]
+
+
+async def test_get_feed_data_conditional():
+    requests: list[str] = []
+    async with TestServer(make_feed_app(requests)) as server:
+        url = str(server.make_url("/feeds/videos.xml?channel_id=UC"))
+        async with aiohttp.ClientSession() as http_session:
+            entries, headers = await get_feed_data(url, http_session, {})
+            assert entries is not None and len(entries) == 2
+            assert headers == {"If-None-Match": ETAG}
+
+            entries, headers = await get_feed_data(url, http_session, headers)
+            assert entries is None
+            assert headers == {"If-None-Match": ETAG}
+    assert requests == ["channel_id=UC", "channel_id=UC"]
+
+
+def make_feed(entries: list[tuple[str, datetime]]) -> str:
+    xml_entries = "".join(
+        f"<entry><yt:videoId>{video_id}</yt:videoId>"
+        f"<title>{escape(video_id)}</title>"
+        f"<published>{published.isoformat()}</published></entry>"
+        for video_id, published in entries
+    )
+    return (
+        '<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" '
+        f'xmlns="http://www.w3.org/2005/Atom">{xml_entries}</feed>'
+    )
+
+
+class FeedChannel:
+    """Synthetic channel served by fake YouTube with its feed."""
+
+    context: ScanContext  # set by fixture, with feed cache
+
+    def __init__(self):
+        self.fake = FakeYouTube()
+        synthetic = PageGenerator(seed=3).make_channel(5)
+        self.fake.add_channel(synthetic)
+        self.video_ids = [v.id for v in synthetic.videos]
+        self.channel = YouTubeChannel(
+            original_id=synthetic.id,
+            canonical_base_url=synthetic.canonical_base_url,
+            title=synthetic.title,
+        )
+        self.channel.id = 1
+        self.feed_entries: list[tuple[str, datetime]] = []
+        self.feed_requests = 0
+        self.broken = False
+
+    @property
+    def page_requests(self) -> int:
+        return self.fake.stats["requests"] - self.feed_requests
+
+    async def feed(self, request: web.Request) -> web.Response:
+        self.feed_requests += 1
+        if request.headers.get("If-None-Match") == ETAG:
+            return web.Response(status=304)
+        return web.Response(
+            text="<feed>" if self.broken else make_feed(self.feed_entries),
+            content_type="application/atom+xml",
+            headers={"ETag": ETAG},
+        )
+
+    def published(self, hours_ago: float) -> list[tuple[str, datetime]]:
+        time = datetime.now(timezone.utc) - timedelta(hours=hours_ago)
+        return [(video_id, time) for video_id in self.video_ids[:2]]
+
+
+@pytest.fixture
+async def feed_channel():
+    feed_channel = FeedChannel()
+    app = feed_channel.fake.make_app()
+    app.router.add_get("/feeds/videos.xml", feed_channel.feed)
+    base_url = models.YT_BASE_URL
+    async with TestServer(app) as server:
+        set_youtube_base_url(str(server.make_url("/")))
+        async with aiohttp.ClientSession() as http_session:
+            feed_channel.context = ScanContext(
+                http_session,
+                feed_cache=FeedCache(),
+            )
+            yield feed_channel
+    set_youtube_base_url(base_url)
+
+
+async def test_feed_with_new_videos(feed_channel):
+    feed_channel.feed_entries = feed_channel.published(hours_ago=1)
+    data = await get_channel_data_by_feed(
+        feed_channel.channel,
+        feed_channel.context,
+    )
+    # styles of videos are taken from channel pages
+    assert feed_channel.page_requests > 0
+    assert [v.original_id for v in data.videos] == feed_channel.video_ids
+    assert all(v.style is not None for v in data)
+    published = feed_channel.feed_entries[0][1]
+    assert data.videos[0].creation_time == published.astimezone().replace(
+        tzinfo=None
+    )
+
+
+async def test_feed_with_known_videos(feed_channel):
+    feed_channel.feed_entries = feed_channel.published(hours_ago=1)
+    data = await get_channel_data_by_feed(
+        feed_channel.channel,
+        feed_channel.context,
+        frozenset(feed_channel.video_ids),
+    )
+    assert not data and feed_channel.page_requests == 0
+
+
+async def test_feed_without_recent_videos(feed_channel):
+    feed_channel.feed_entries = feed_channel.published(hours_ago=24 * 10)
+    data = await get_channel_data_by_feed(
+        feed_channel.channel,
+        feed_channel.context,
+    )
+    assert not data and feed_channel.page_requests == 0
+
+
+async def test_feed_not_modified(feed_channel):
+    feed_channel.feed_entries = feed_channel.published(hours_ago=24 * 10)
+    for _ in range(2):
+        data = await get_channel_data_by_feed(
+            feed_channel.channel,
+            feed_channel.context,
+        )
+        assert not data
+    assert feed_channel.feed_requests == 2
+    assert feed_channel.fake.stats["304"] == 1
+
+
+async def test_feed_headers_saved_when_videos_known(feed_channel):
+    feed_channel.feed_entries = feed_channel.published(hours_ago=1)
+    for _ in range(2):  # e.g. saving of found videos failed
+        data = await get_channel_data_by_feed(
+            feed_channel.channel,
+            feed_channel.context,
+        )
+        assert data
+    assert feed_channel.fake.stats["304"] == 0
+
+    known_ids = frozenset(feed_channel.video_ids)
+    for _ in range(2):
+        data = await get_channel_data_by_feed(
+            feed_channel.channel,
+            feed_channel.context,
+            known_ids,
+        )
+        assert not data
+    assert feed_channel.feed_requests == 4
+    assert feed_channel.fake.stats["304"] == 1
+
+
+async def test_broken_feed(feed_channel):
+    feed_channel.broken = True
+    data = await get_channel_data_by_feed(
+        feed_channel.channel,
+        feed_channel.context,
+    )
+    assert feed_channel.page_requests > 0
+    assert [v.original_id for v in data.videos] == feed_channel.video_ids
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, select
+
+from app.database.models import YouTubeChannel, YouTubeVideo
+from app.known_ids import KnownVideoIndex
+from app.run import filter_data_by_id
+from app.youtube_utils import ScannedVideo, YouTubeChannelData
+
+
+def make_video(original_id: str, channel_id: int, style: str) -> ScannedVideo:
+    now = datetime.now()
+    return ScannedVideo(original_id, channel_id, original_id, now, now, style)
+
+
+async def test_filter_data_by_id(engine, session_maker):
+    now = datetime.now()
+    long_ago = now - timedelta(days=365)
+    async with session_maker() as session:
+        channels = []
+        for i in range(20):
+            channel = YouTubeChannel(
+                original_id=f"UC{i}", canonical_base_url="", title=""
+            )
+            session.add(channel)
+            await session.flush()
+            channels.append(channel)
+        stored = [
+            ("known", now, "DEFAULT"),
+            ("old", long_ago, "DEFAULT"),
+            ("old_stream", long_ago, "DEFAULT"),
+            ("old_live", long_ago, "LIVE"),
+        ]
+        for original_id, creation_time, style in stored:
+            session.add(
+                YouTubeVideo(
+                    original_id=original_id,
+                    scan_time=creation_time,
+                    channel_id=channels[0].id,
+                    style=style,
+                    creation_time=creation_time,
+                )
+            )
+        await session.commit()
+
+    scan_data = {
+        channel: YouTubeChannelData(
+            videos=[make_video(f"v{channel.id}", channel.id, "DEFAULT")],
+            streams=[make_video(f"s{channel.id}", channel.id, "UPCOMING")],
+        )
+        for channel in channels
+    }
+    scan_data[channels[0]].videos += [
+        make_video(i, channels[0].id, "DEFAULT") for i in ("known", "old")
+    ]
+    scan_data[channels[0]].streams += [
+        make_video("old_stream", channels[0].id, "LIVE"),
+        make_video("old_live", channels[0].id, "DEFAULT"),
+    ]
+    scan_data[channels[1]] = YouTubeChannelData()
+
+    statements: list[str] = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+    async with session_maker() as session:
+        new_data = await filter_data_by_id(scan_data, session)
+        await session.commit()
+    assert len(statements) == 2  # select of states and update of streams
+
+    assert channels[1] not in new_data
+    assert [v.original_id for v in new_data[channels[0]]] == ["v1", "s1"]
+    assert sum(len(list(data)) for data in new_data.values()) == 2 * 19
+
+    async with session_maker() as session:
+        q = select(YouTubeVideo.original_id).where(YouTubeVideo.live_24_7)
+        assert set(await session.scalars(q)) == {"old_stream", "old_live"}
+
+
+async def test_filter_data_by_known_index(engine, session_maker):
+    now = datetime.now()
+    async with session_maker() as session:
+        channel = YouTubeChannel(
+            original_id="UC", canonical_base_url="", title=""
+        )
+        session.add(channel)
+        await session.flush()
+        session.add(
+            YouTubeVideo(
+                original_id="stale",  # saved, but missed in index
+                scan_time=now,
+                channel_id=channel.id,
+                creation_time=now,
+            )
+        )
+        await session.commit()
+
+    index = KnownVideoIndex(last_days=90)
+    index.add(channel.id, "known", now)
+    scan_data = {
+        channel: YouTubeChannelData(
+            videos=[
+                make_video(i, channel.id, "DEFAULT")
+                for i in ("new", "known", "stale")
+            ]
+        )
+    }
+    async with session_maker() as session:
+        new_data = await filter_data_by_id(scan_data, session, index)
+    assert [v.original_id for v in new_data[channel]] == ["new"]
+    assert index.get(channel.id) == {"known", "stale"}
+
+    statements: list[str] = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+    scan_data[channel].videos.pop(0)
+    async with session_maker() as session:
+        new_data = await filter_data_by_id(scan_data, session, index)
+    assert not any(new_data[channel]) and statements == []
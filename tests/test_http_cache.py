@@ -0,0 +1,91 @@
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from yarl import URL
+
+from app.database.models import YouTubeChannel
+from app.http_cache import CachedSession, HttpCache
+from app.youtube_utils import ScanContext, get_channel_data, get_video_tags
+from benchmarks.synthetic import PageGenerator, make_watch_page
+
+TAGS = ["python", "asyncio"]
+PARAMS = dict(view=0, sort="dd", flow="grid")
+
+
+async def test_record_replay(tmp_path):
+    requests: list[str] = []
+
+    async def watch(request: web.Request) -> web.Response:
+        requests.append(request.path_qs)
+        return web.Response(
+            text=make_watch_page(TAGS, 10_000),
+            content_type="text/html",
+        )
+
+    app = web.Application()
+    app.router.add_get("/watch", watch)
+    cache = HttpCache(tmp_path)
+    async with TestServer(app) as server:
+        url = str(server.make_url("/watch?v=a"))
+        async with CachedSession(
+            aiohttp.ClientSession(), cache, "record"
+        ) as http_session:
+            tags = await get_video_tags(url, ScanContext(http_session))
+            assert tags == TAGS
+
+    async with CachedSession(
+        aiohttp.ClientSession(), cache, "replay", latency=0.05
+    ) as http_session:
+        start_time = time.monotonic()
+        assert await get_video_tags(url, ScanContext(http_session)) == TAGS
+        assert time.monotonic() - start_time >= 0.05
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await get_video_tags(url + "b", ScanContext(http_session))
+    assert requests == ["/watch?v=a"]
+
+
+async def test_cache_key(tmp_path):
+    cache = HttpCache(tmp_path)
+    url = URL("https://www.youtube.com/@a/videos?view=0&sort=dd")
+    await cache.save(url, 200, {"Content-Type": "text/html"}, b"page")
+    await cache.save(url.with_path("/@b/videos"), 200, {}, b"page")
+    cached = await cache.load(
+        URL("https://www.youtube.com/@a/videos?sort=dd&view=0")
+    )
+    assert cached is not None
+    meta, body = cached
+    assert body == b"page" and meta["headers"]["Content-Type"] == "text/html"
+    assert len(list((tmp_path / "bodies").iterdir())) == 1  # same content
+
+
+async def test_replay_channel(tmp_path):
+    generator = PageGenerator(seed=3)
+    synthetic = generator.make_channel(video_count=5, stream_count=3)
+    channel = YouTubeChannel(
+        original_id=synthetic.id,
+        canonical_base_url=synthetic.canonical_base_url,
+        title=synthetic.title,
+    )
+    channel.id = 1
+    cache = HttpCache(tmp_path)
+    for tab in ("videos", "streams"):
+        await cache.save(
+            URL(f"{channel.url}/{tab}").update_query(PARAMS),
+            200,
+            {"Content-Type": "text/html; charset=utf-8"},
+            generator.make_page(synthetic, tab).encode(),
+        )
+
+    async with CachedSession(
+        aiohttp.ClientSession(), cache, "replay"
+    ) as http_session:
+        data = await get_channel_data(channel, ScanContext(http_session))
+    assert [v.original_id for v in data.videos] == [
+        v.id for v in synthetic.videos
+    ]
+    assert [v.style for v in data.streams] == [
+        v.style for v in synthetic.streams
+    ]
@@ -0,0 +1,81 @@
+import json
+
+from app.youtube_parser.youtube_parser import parse_channel
+
+
+def make_video_renderer(video_id: str, style: str = "DEFAULT") -> dict:
+    renderer = {
+        "videoId": video_id,
+        "title": {"runs": [{"text": f"Video {video_id}"}]},
+        "thumbnailOverlays": [
+            {"thumbnailOverlayTimeStatusRenderer": {"style": style}}
+        ],
+    }
+    if style == "DEFAULT":
+        renderer["publishedTimeText"] = {"simpleText": "1 day ago"}
+    return renderer
+
+
+def make_page(
+    video_ids: list[str],
+    styles: dict[str, str] | None = None,
+) -> str:
+    styles = styles or {}
+    items = [
+        {
+            "richItemRenderer": {
+                "content": {
+                    "videoRenderer": make_video_renderer(
+                        i, styles.get(i, "DEFAULT")
+                    )
+                }
+            }
+        }
+        for i in video_ids
+    ]
+    obj = {
+        "contents": {
+            "tabs": [
+                {
+                    "tabRenderer": {
+                        "endpoint": {
+                            "commandMetadata": {
+                                "webCommandMetadata": {"url": "/@test/videos"}
+                            }
+                        },
+                        "content": {"richGridRenderer": {"contents": items}},
+                    }
+                }
+            ]
+        }
+    }
+    return (
+        "<html><body><script>"
+        f"var ytInitialData = {json.dumps(obj)};"
+        "</script></body></html>"
+    )
+
+
+def test_parse_channel_full():
+    data = parse_channel(make_page(["a", "b", "c"]))
+    assert data["tab_urls"] == ["/@test/videos"]
+    assert [v["id"] for v in data["videos"]] == ["a", "b", "c"]
+    assert data["videos"][0]["title"] == "Video a"
+    assert data["videos"][0]["time_ago"] == "1 day ago"
+
+
+def test_parse_channel_stop_at_known():
+    data = parse_channel(make_page(["a", "b", "c"]), known_ids={"b"})
+    assert [v["id"] for v in data["videos"]] == ["a"]
+
+
+def test_parse_channel_skip_known():
+    page = make_page(["a", "b", "c"])
+    data = parse_channel(page, known_ids={"b"}, stop_at_known=False)
+    assert [v["id"] for v in data["videos"]] == ["a", "c"]
+
+
+def test_parse_channel_known_upcoming_on_top():
+    page = make_page(["premiere", "a", "b", "c"], {"premiere": "UPCOMING"})
+    data = parse_channel(page, known_ids={"premiere", "b"})
+    assert [v["id"] for v in data["videos"]] == ["a"]
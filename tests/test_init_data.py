@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.youtube_parser.youtube_parser import (
+    InitDataExtractor,
+    YoutubeParserError,
+    _load_init_data,
+    _parse_init_data,
+)
+from app.youtube_utils import _read_init_data
+
+CONTENTS_DIR = Path(__file__).parent / "test_data/channels_without_streams"
+PAGE_PATH = CONTENTS_DIR / "contents/jakeeh.html"
+
+
+def feed_by_chunks(text: str, size: int) -> str | None:
+    extractor = InitDataExtractor()
+    for i in range(0, len(text), size):
+        if (obj_content := extractor.feed(text[i : i + size])) is not None:
+            return obj_content
+    return None
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096, 10**7])
+def test_extractor_chunks(size):
+    content = PAGE_PATH.read_text("utf-8")
+    assert feed_by_chunks(content, size) == _parse_init_data(content)
+
+
+def test_extractor_trailing_data():
+    page = '<script>var ytInitialData = {"a": "}"};</script>'
+    assert feed_by_chunks(page, 3) == '{"a": "}"}'
+    page = '<script>var ytInitialData = {"a": "}"}; var b = 1;</script>'
+    assert _load_init_data(feed_by_chunks(page, 3)) == {"a": "}"}
+
+
+def test_parse_init_data_trailing_object():
+    page = (
+        '<script>var ytInitialData = {"a": 1}; '
+        'var ytInitialPlayerResponse = {"b": 2};</script>'
+    )
+    assert _load_init_data(_parse_init_data(page)) == {"a": 1}
+    assert _load_init_data(feed_by_chunks(page, 5)) == {"a": 1}
+
+
+def test_load_init_data_wrong():
+    with pytest.raises(YoutubeParserError):
+        _load_init_data('{"a": ')
+
+
+def test_parse_init_data_not_found():
+    with pytest.raises(YoutubeParserError):
+        _parse_init_data("<html></html>")
+
+
+async def test_read_init_data():
+    content = PAGE_PATH.read_bytes()
+
+    async def page(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse()
+        response.content_type = "text/html"
+        await response.prepare(request)
+        for i in range(0, len(content), 1000):
+            await response.write(content[i : i + 1000])
+        return response
+
+    app = web.Application()
+    app.router.add_get("/page", page)
+    async with TestServer(app) as server:
+        async with aiohttp.ClientSession() as http_session:
+            async with http_session.get(server.make_url("/page")) as r:
+                obj_content = await _read_init_data(r)
+    assert obj_content == _parse_init_data(content.decode("utf-8"))
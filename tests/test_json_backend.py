@@ -0,0 +1,23 @@
+import pytest
+
+from app.youtube_parser import json_backend
+
+
+@pytest.fixture(autouse=True)
+def restore_backend():
+    yield
+    json_backend.set_backend()
+
+
+def test_json_backend():
+    assert json_backend.set_backend("json") == "json"
+    assert json_backend.loads('{"a": [1, "b"]}') == {"a": [1, "b"]}
+    with pytest.raises(ValueError):
+        json_backend.set_backend("unknown")
+
+
+def test_orjson_backend():
+    pytest.importorskip("orjson")
+    assert json_backend.set_backend("auto") == "orjson"
+    assert json_backend.loads('{"a": [1, "b"]}') == {"a": [1, "b"]}
+    assert json_backend.loads('{"a": NaN}')["a"] != 0  # json fallback
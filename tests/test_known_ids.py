@@ -0,0 +1,61 @@
+import uuid
+from datetime import datetime, timedelta
+
+from app.database.models import YouTubeChannel, YouTubeVideo
+from app.known_ids import KnownVideoIndex
+from app.youtube_utils import ScannedVideo
+
+
+async def test_build_and_prune(session_maker):
+    now = datetime.now()
+    async with session_maker() as session:
+        channel = YouTubeChannel(
+            original_id="UC", canonical_base_url="", title=""
+        )
+        session.add(channel)
+        await session.flush()
+        for original_id, days, live_24_7 in [
+            ("new", 1, False),
+            ("old", 100, False),
+            ("live", 100, True),
+        ]:
+            session.add(
+                YouTubeVideo(
+                    original_id=original_id,
+                    scan_time=now,
+                    channel_id=channel.id,
+                    creation_time=now - timedelta(days=days),
+                    live_24_7=live_24_7,
+                )
+            )
+        await session.commit()
+
+        index = KnownVideoIndex(last_days=90)
+        await index.build(session)
+    assert index.get(channel.id) == {"new", "live"}
+    assert index.contains(channel.id, "new")
+    assert not index.contains(channel.id + 1, "new")
+
+    index.add_videos(
+        [ScannedVideo("added", channel.id, None, now, now - timedelta(5))]
+    )
+    assert len(index) == 3
+    assert index.prune(now + timedelta(days=88)) == 1  # "added" expired
+    assert index.get(channel.id) == {"new", "live"}
+
+
+async def test_snapshot(redis_client):
+    key = f"test_known_ids:{uuid.uuid4().hex}"
+    now = datetime.now()
+    index = KnownVideoIndex(last_days=90)
+    assert not await index.load(redis_client, key)
+    index.add(1, "a", now)
+    index.add(1, "b", now - timedelta(days=100))
+    index.add(2, "c", None)
+    try:
+        await index.save(redis_client, key)
+        loaded = KnownVideoIndex(last_days=90)
+        assert await loaded.load(redis_client, key)
+    finally:
+        await redis_client.delete(key)
+    assert loaded.get(1) == {"a"} and loaded.get(2) == {"c"}
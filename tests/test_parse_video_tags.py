@@ -1,7 +1,40 @@
 import asyncio
 import itertools
+from pathlib import Path
 
-from app.youtube_utils import get_video_tags
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.http_cache import CachedSession, HttpCache
+from app.http_client import HEADERS
+from app.youtube_parser.youtube_parser import parse_video_tags
+from app.youtube_utils import ScanContext, get_video_tags
+from benchmarks.synthetic import make_watch_page
+
+CASSETTE_DIR = Path(__file__).parent / "test_data/http_cache"
+VIDEO_URL = "https://www.youtube.com/watch?v=o06MyVhYte4"
+EXPECTED_TAGS = [
+    "python libraries 2023",
+    "best python libraries 2023",
+    "best python libraries",
+    "best python libraries to learn",
+    "top python libraries",
+    "python library",
+    "python",
+    "python libraries",
+    "python programming",
+    "python libraries explained",
+    "python libraries to learn",
+    "popular python libraries",
+    "python libraries tutorial",
+    "python libraries for data analysis",
+    "top python libraries 2023",
+    "python libraries and their uses",
+    "top python libraries to learn",
+    "top 10 python libraries",
+    "programming libraries python",
+]
 
 
 def make_keywords(tags: list[str]) -> frozenset[str]:
@@ -10,33 +43,44 @@ def make_keywords(tags: list[str]) -> frozenset[str]:
     )
 
 
+async def get_tags_with_cache(mode: str) -> list[str]:
+    async with CachedSession(
+        aiohttp.ClientSession(headers=HEADERS),
+        HttpCache(CASSETTE_DIR),
+        mode,
+    ) as http_session:
+        return await get_video_tags(VIDEO_URL, ScanContext(http_session))
+
+
 async def test_parse_video_tags():
-    expected = [
-        "python libraries 2023",
-        "best python libraries 2023",
-        "best python libraries",
-        "best python libraries to learn",
-        "top python libraries",
-        "python library",
-        "python",
-        "python libraries",
-        "python programming",
-        "python libraries explained",
-        "python libraries to learn",
-        "popular python libraries",
-        "python libraries tutorial",
-        "python libraries for data analysis",
-        "top python libraries 2023",
-        "python libraries and their uses",
-        "top python libraries to learn",
-        "top 10 python libraries",
-        "programming libraries python",
-    ]
-    url = "https://www.youtube.com/watch?v=o06MyVhYte4"
-    tags = await get_video_tags(url)
-    print(make_keywords(tags))
-    assert tags == expected
-
-
-if __name__ == "__main__":
-    asyncio.run(test_parse_video_tags())
+    assert await get_tags_with_cache("replay") == EXPECTED_TAGS
+
+
+def test_parse_video_tags_from_head():
+    page = make_watch_page(EXPECTED_TAGS + ["a & b", "юникод"], 10_000)
+    assert parse_video_tags(page) == EXPECTED_TAGS + ["a & b", "юникод"]
+    assert parse_video_tags(page.encode()) == parse_video_tags(page)
+
+
+async def test_get_video_tags_streaming():
+    content = make_watch_page(EXPECTED_TAGS).encode()
+
+    async def watch(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse()
+        response.content_type = "text/html"
+        await response.prepare(request)
+        for i in range(0, len(content), 1000):
+            await response.write(content[i : i + 1000])
+        return response
+
+    app = web.Application()
+    app.router.add_get("/watch", watch)
+    async with TestServer(app) as server:
+        async with aiohttp.ClientSession() as http_session:
+            url = str(server.make_url("/watch"))
+            tags = await get_video_tags(url, ScanContext(http_session))
+    assert tags == EXPECTED_TAGS
+
+
+if __name__ == "__main__":  # record the watch page again
+    print(make_keywords(asyncio.run(get_tags_with_cache("record"))))
@@ -0,0 +1,38 @@
+import asyncio
+import time
+import uuid
+
+from app.rate_limiter import RateLimiter, RedisRateLimiter
+
+
+async def test_rate_limiter():
+    rate = 20
+    limiter = RateLimiter(rate)
+    start_time = time.monotonic()
+    await asyncio.gather(*(limiter.acquire() for _ in range(11)))
+    elapsed = time.monotonic() - start_time
+    # first token is available immediately
+    assert elapsed >= 10 / rate * 0.9
+
+
+async def test_rate_limiter_burst():
+    limiter = RateLimiter(1, capacity=5)
+    start_time = time.monotonic()
+    for _ in range(5):
+        async with limiter:
+            pass
+    assert time.monotonic() - start_time < 0.5
+
+
+async def test_redis_rate_limiter(redis_client):
+    rate = 20
+    key = f"test_rate:{uuid.uuid4().hex}"
+    # two processes sharing the bucket
+    limiters = [RedisRateLimiter(redis_client, key, rate) for _ in range(2)]
+    start_time = time.monotonic()
+    try:
+        await asyncio.gather(*(limiters[i % 2].acquire() for i in range(11)))
+    finally:
+        await redis_client.delete(key)
+    elapsed = time.monotonic() - start_time
+    assert elapsed >= 10 / rate * 0.9
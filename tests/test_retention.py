@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app import retention
+from app.database.models import (
+    YouTubeChannel,
+    YouTubeVideo,
+    YouTubeVideoArchive,
+    YouTubeVideoTags,
+)
+from app.retention import expire_videos, retention_time
+from app.settings import LAST_DAYS_IN_DB, Settings
+
+
+def make_settings(**kwargs) -> Settings:
+    kwargs = dict(video_retention_days=180, retention_batch_size=2) | kwargs
+    return Settings(
+        bot_token="",
+        bot_admin_ids=frozenset(),
+        log_dir=".",
+        database_url="",
+        redis_url="",
+        **kwargs,
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_batch_delay(monkeypatch):
+    monkeypatch.setattr(retention, "BATCH_DELAY", 0)
+
+
+async def fill(session_maker, now: datetime) -> None:
+    old = now - timedelta(days=200)
+    async with session_maker() as session:
+        channel = YouTubeChannel(
+            original_id="UC", canonical_base_url="", title=""
+        )
+        session.add(channel)
+        await session.flush()
+        videos = [
+            ("new", now, "DEFAULT", False),
+            ("live", old, "DEFAULT", True),
+            ("upcoming", old, "UPCOMING", False),
+            ("no_style", old, None, False),
+        ]
+        videos += [(f"old{i}", old, "DEFAULT", False) for i in range(4)]
+        for original_id, creation_time, style, live_24_7 in videos:
+            session.add(
+                YouTubeVideo(
+                    original_id=original_id,
+                    scan_time=creation_time,
+                    channel_id=channel.id,
+                    style=style,
+                    creation_time=creation_time,
+                    live_24_7=live_24_7,
+                )
+            )
+        for original_id, scan_time in [("new", now), ("old0", old)]:
+            session.add(YouTubeVideoTags(original_id, ["tag"], scan_time))
+        await session.commit()
+
+
+@pytest.mark.parametrize("archive", [True, False])
+async def test_expire_videos(session_maker, archive):
+    now = datetime.now()
+    await fill(session_maker, now)
+    settings = make_settings(archive_videos=archive)
+
+    assert await expire_videos(session_maker, settings, now) == (5, 1)
+    assert await expire_videos(session_maker, settings, now) == (0, 0)
+
+    async with session_maker() as session:
+        kept = set(await session.scalars(select(YouTubeVideo.original_id)))
+        archived = set(
+            await session.scalars(select(YouTubeVideoArchive.original_id))
+        )
+        tags = set(await session.scalars(select(YouTubeVideoTags.original_id)))
+    assert kept == {"new", "live", "upcoming"}
+    expired = {"no_style", "old0", "old1", "old2", "old3"}
+    assert archived == (expired if archive else set())
+    assert tags == {"new"}
+
+
+def test_retention_time():
+    now = datetime.now()
+    settings = make_settings()
+    assert retention_time(settings, now) == now - timedelta(days=180)
+    settings = make_settings(video_retention_days=1)
+    last_time = now - timedelta(days=LAST_DAYS_IN_DB)
+    assert retention_time(settings, now) == last_time
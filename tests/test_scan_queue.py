@@ -0,0 +1,186 @@
+import asyncio
+import os
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+from aiohttp.test_utils import TestServer
+
+from app.database import models
+from app.database.models import YouTubeChannel, set_youtube_base_url
+from app.scan_queue import (
+    QueueKeys,
+    WorkItem,
+    push_items,
+    requeue_expired,
+    run_worker,
+    scan_distributed,
+    take_item,
+)
+from app.youtube_utils import YouTubeChannelData
+from benchmarks.synthetic import PageGenerator
+from tests.conftest import REDIS_URL
+from tests.fake_youtube import FakeYouTube, FakeYouTubeConfig
+
+ROOT_DIR = Path(__file__).parent.parent
+WORKER_COUNT = 3
+
+
+@pytest.fixture
+def keys() -> QueueKeys:
+    return QueueKeys(f"test_scan:{uuid.uuid4().hex}")
+
+
+def make_channels(count: int) -> list[YouTubeChannel]:
+    channels = []
+    for i in range(count):
+        channel = YouTubeChannel(
+            original_id=f"UC{i}",
+            canonical_base_url=f"/@channel{i}",
+            title=f"Channel {i}",
+        )
+        channel.id = i
+        channels.append(channel)
+    return channels
+
+
+async def test_scan_distributed(redis_client, keys):
+    scanned: list[str] = []
+
+    async def handler(item: WorkItem) -> YouTubeChannelData | None:
+        scanned.append(item.channel.original_id)
+        if item.channel.id == 0:
+            return None  # scan error
+        return YouTubeChannelData()
+
+    workers = [
+        asyncio.create_task(run_worker(redis_client, keys, handler, 5))
+        for _ in range(3)
+    ]
+    try:
+        channels = make_channels(10)
+        scan_data = await scan_distributed(
+            channels, {}, redis_client, keys, 3, 10
+        )
+    finally:
+        for worker in workers:
+            worker.cancel()
+    assert sorted(scanned) == sorted(c.original_id for c in channels)
+    assert set(scan_data) == set(channels[1:])
+
+
+async def test_requeue_expired(redis_client, keys):
+    workers: list[asyncio.Task] = []
+
+    async def handler(item: WorkItem) -> YouTubeChannelData | None:
+        return YouTubeChannelData()
+
+    async def dead_worker():
+        await take_item(redis_client, keys, lease_timeout=0.1)
+        # dies without completing the item
+        workers.append(
+            asyncio.create_task(run_worker(redis_client, keys, handler, 5))
+        )
+
+    async def reaper():
+        while True:
+            await asyncio.sleep(0.2)
+            await requeue_expired(redis_client, keys, 3)
+
+    tasks = [asyncio.create_task(dead_worker()), asyncio.create_task(reaper())]
+    try:
+        channels = make_channels(1)
+        scan_data = await scan_distributed(
+            channels, {}, redis_client, keys, 3, 10
+        )
+    finally:
+        for task in tasks + workers:
+            task.cancel()
+    assert set(scan_data) == set(channels)
+
+
+async def test_take_item_with_lease(redis_client, keys):
+    await push_items(
+        redis_client,
+        keys,
+        [WorkItem("run:0", "run", make_channels(1)[0], frozenset())],
+    )
+    item = await take_item(redis_client, keys, lease_timeout=5)
+    assert item is not None and item.id == "run:0"
+    assert await redis_client.exists(keys.lease(item.id))
+    assert await requeue_expired(redis_client, keys, 3) == 0
+    assert await take_item(redis_client, keys, 5, timeout=0.2) is None
+    await redis_client.delete(keys.processing, keys.items, keys.lease(item.id))
+
+
+async def test_scan_worker_processes(redis_client, keys, tmp_path):
+    fake = FakeYouTube(FakeYouTubeConfig(latency=0.05))
+    generator = PageGenerator(seed=7)
+    channels = []
+    for i in range(12):
+        synthetic = generator.make_channel(5)
+        fake.add_channel(synthetic)
+        channel = YouTubeChannel(
+            original_id=synthetic.id,
+            canonical_base_url=synthetic.canonical_base_url,
+            title=synthetic.title,
+        )
+        channel.id = i + 1
+        channels.append(channel)
+
+    base_url = models.YT_BASE_URL
+    async with TestServer(fake.make_app()) as server:
+        set_youtube_base_url(str(server.make_url("/")))
+        env = dict(
+            os.environ,
+            BOT_TOKEN="",
+            BOT_ADMIN_IDS="1",
+            DATABASE_URL="sqlite+aiosqlite://",
+            REDIS_URL=REDIS_URL,
+            LOG_DIR=str(tmp_path),
+            MODE="dev",
+            YOUTUBE_BASE_URL=models.YT_BASE_URL,
+            SCAN_QUEUE_PREFIX=keys.prefix,
+            REQUEST_RATE="1000",
+            REQUEST_RATE_KEY=f"{keys.prefix}:request_rate",
+            SCAN_LEASE_TIMEOUT="5",
+        )
+        workers = [
+            subprocess.Popen(
+                [sys.executable, "-m", "app.scan_worker"],
+                cwd=ROOT_DIR,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            for _ in range(WORKER_COUNT)
+        ]
+        try:
+            scan_data = await scan_distributed(
+                channels, {}, redis_client, keys, 3, 60
+            )
+            assert all(worker.poll() is None for worker in workers)
+        finally:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.wait(10)
+            set_youtube_base_url(base_url)
+            await redis_client.delete(f"{keys.prefix}:request_rate")
+
+    assert set(scan_data) == set(channels)
+    assert all(len(data.videos) == 5 for data in scan_data.values())
+    # items were shared by the processes
+    logs = [
+        path.read_text(encoding="utf-8")
+        for path in tmp_path.glob("scan_worker_*.txt")
+    ]
+    assert len(logs) == WORKER_COUNT
+    busy = [
+        log
+        for log in logs
+        if any(c.canonical_base_url in log for c in channels)
+    ]
+    assert len(busy) > 1
@@ -0,0 +1,230 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database.models import (
+    Destination,
+    TelegramChat,
+    YouTubeChannel,
+    YouTubeChannelSchedule,
+    YouTubeVideo,
+)
+from app.database.utils import get_video_creation_times
+from app.scheduling import (
+    estimate_upload_interval,
+    failure_delay,
+    is_due,
+    is_quarantined,
+    next_scan_time,
+    order_by_fan_out,
+    update_failures,
+    update_schedules,
+)
+from app.youtube_utils import ScannedVideo, YouTubeChannelData
+from app.settings import Settings
+
+HOUR = 60 * 60
+
+
+def make_settings() -> Settings:
+    return Settings(
+        bot_token="",
+        bot_admin_ids=frozenset(),
+        log_dir=".",
+        database_url="",
+        redis_url="",
+        min_scan_interval=HOUR / 2,
+        max_scan_interval=24 * HOUR,
+        scan_interval_factor=0.25,
+        failure_backoff=HOUR / 2,
+        max_failure_backoff=4 * HOUR,
+        quarantine_threshold=6,
+        quarantine_probe_interval=7 * 24 * HOUR,
+    )
+
+
+def test_estimate_upload_interval():
+    now = datetime(2023, 10, 17, 12)
+    times = [now - timedelta(hours=h) for h in (0, 2, 4, 6)]
+    assert estimate_upload_interval(times) == 2 * HOUR
+    assert estimate_upload_interval(times[:1]) is None
+
+    hours = [0, 1, 2, 3, 13, 23, 33, 43, 53]  # uploads became more often
+    times = [now - timedelta(hours=h) for h in hours]
+    mean = 53 * HOUR / 8
+    assert HOUR < estimate_upload_interval(times) < mean
+
+
+def test_next_scan_time():
+    now = datetime(2023, 10, 17, 12)
+    settings = make_settings()
+
+    t = next_scan_time(now, 4 * HOUR, now, settings)
+    assert t == now + timedelta(hours=1)
+
+    t = next_scan_time(now, 60, now, settings)  # min interval
+    assert t == now + timedelta(minutes=30)
+
+    t = next_scan_time(now, 30 * 24 * HOUR, now, settings)  # max interval
+    assert t == now + timedelta(days=1)
+
+    t = next_scan_time(now, None, None, settings)
+    assert t == now + timedelta(days=1)
+
+    last_upload_time = now - timedelta(hours=8)  # channel is silent
+    t = next_scan_time(now, 4 * HOUR, last_upload_time, settings)
+    assert t == now + timedelta(hours=2)
+
+
+def make_channel(channel_id: int) -> YouTubeChannel:
+    channel = YouTubeChannel(
+        original_id=str(channel_id), canonical_base_url="", title=""
+    )
+    channel.id = channel_id
+    return channel
+
+
+def test_update_schedules_new_channel():
+    now = datetime(2023, 10, 17, 12)
+    settings = make_settings()
+    channel = make_channel(1)
+    # incremental scan: only the new video of hourly uploader
+    new_video = ScannedVideo("new", channel.id, None, now, now)
+    scan_data = {channel: YouTubeChannelData(videos=[new_video])}
+
+    (schedule,) = update_schedules(scan_data, {}, now, settings)
+    assert schedule.upload_interval is None
+    assert schedule.next_scan_time == now + timedelta(days=1)
+
+    video_times = {
+        channel.id: {str(h): now - timedelta(hours=h) for h in range(1, 10)}
+    }
+    (schedule,) = update_schedules(scan_data, {}, now, settings, video_times)
+    assert schedule.upload_interval == HOUR
+    assert schedule.last_upload_time == now
+    assert schedule.next_scan_time == now + timedelta(minutes=30)
+
+
+def test_update_schedules_across_scans():
+    start = datetime(2023, 10, 17, 12)
+    settings = make_settings()
+    channel = make_channel(1)
+    schedules = {}
+
+    def scan(now: datetime, hours: list[int]) -> YouTubeChannelSchedule:
+        videos = [
+            ScannedVideo(f"{now}-{h}", 1, None, now, now - timedelta(hours=h))
+            for h in hours
+        ]
+        scan_data = {channel: YouTubeChannelData(videos=videos)}
+        (schedule,) = update_schedules(scan_data, schedules, now, settings)
+        schedules[channel.id] = schedule
+        return schedule
+
+    # hourly uploads, each scan sees two new videos
+    schedule = scan(start, [0, 1])
+    assert schedule.upload_interval == HOUR
+    for i in range(1, 4):
+        schedule = scan(start + timedelta(hours=2 * i), [0, 1])
+        assert schedule.upload_interval == HOUR  # gap from the last upload
+        assert schedule.last_upload_time == start + timedelta(hours=2 * i)
+
+    # the channel slows down, one scan doesn't overwrite the interval
+    now = schedule.last_upload_time + timedelta(hours=10)
+    schedule = scan(now, [0])
+    assert schedule.upload_interval == pytest.approx(3.7 * HOUR)
+    schedule = scan(now + timedelta(hours=10), [0])
+    assert schedule.upload_interval == pytest.approx(5.59 * HOUR)
+
+    # nothing new: interval is kept, the scan is delayed by silence
+    later = now + timedelta(hours=30)
+    schedule = scan(later, [])
+    assert schedule.upload_interval == pytest.approx(5.59 * HOUR)
+    assert schedule.next_scan_time == later + timedelta(hours=5)
+
+
+async def test_get_video_creation_times(session_maker):
+    now = datetime.now()
+    async with session_maker() as session:
+        channel = YouTubeChannel(
+            original_id="UC", canonical_base_url="", title=""
+        )
+        session.add(channel)
+        await session.flush()
+        for original_id, days, live_24_7 in [
+            ("new", 1, False),
+            ("old", 100, False),
+            ("live", 1, True),
+        ]:
+            session.add(
+                YouTubeVideo(
+                    original_id=original_id,
+                    scan_time=now,
+                    channel_id=channel.id,
+                    creation_time=now - timedelta(days=days),
+                    live_24_7=live_24_7,
+                )
+            )
+        await session.commit()
+
+        times = await get_video_creation_times(
+            [channel.id, channel.id + 1], 90, session
+        )
+    assert times == {channel.id: {"new": now - timedelta(days=1)}}
+
+
+def test_order_by_fan_out():
+    channels = [
+        YouTubeChannel(original_id=str(i), canonical_base_url="", title="")
+        for i in range(3)
+    ]
+    destinations = [
+        Destination(TelegramChat(original_id=i), thread=None) for i in range(3)
+    ]
+    tg_to_yt_channels = {
+        destinations[0]: [channels[0], channels[1]],
+        destinations[1]: [channels[1], channels[2]],
+        destinations[2]: [channels[1], channels[2]],
+    }
+    ordered = order_by_fan_out(tg_to_yt_channels)
+    assert ordered == [channels[1], channels[2], channels[0]]
+
+
+def test_failure_delay():
+    settings = make_settings()
+    delays = [failure_delay(n, settings) / HOUR for n in range(1, 8)]
+    assert delays == [0.5, 1, 2, 4, 4, 7 * 24, 7 * 24]
+    assert failure_delay(10**6, make_settings()) == 7 * 24 * HOUR
+
+
+def test_update_failures():
+    now = datetime(2023, 10, 17, 12)
+    settings = make_settings()
+    channels = []
+    for i in range(3):
+        channel = YouTubeChannel(
+            original_id=str(i), canonical_base_url="", title=""
+        )
+        channel.id = i
+        channels.append(channel)
+
+    failures = {}
+    start_time = now
+    for n in range(1, 7):  # channel 0 keeps failing
+        scan_data = {channels[2]: YouTubeChannelData()}
+        failed, recovered = update_failures(
+            channels[:1] + channels[2:], scan_data, failures, now, settings
+        )
+        assert recovered == []
+        failures = {f.channel_id: f for f in failed}
+        assert failures[0].failure_count == n
+        assert not is_due(failures[0], now)
+        assert failures[0].first_failure_time == start_time
+        now = failures[0].next_scan_time
+    assert is_quarantined(failures[0], settings)
+
+    scan_data = {channel: YouTubeChannelData() for channel in channels}
+    failed, recovered = update_failures(
+        channels, scan_data, failures, now, settings
+    )
+    assert failed == [] and recovered == [0]
@@ -0,0 +1,73 @@
+import pytest
+
+from app.youtube_parser import search
+
+OBJ = {
+    "header": {"title": {"runs": [{"text": "Header"}]}},
+    "items": [
+        {"video": {"videoId": "a", "title": {"runs": [{"text": "A"}]}}},
+        {"video": {"videoId": "b", "menu": {"videoId": "menu"}}},
+    ],
+    "menu": {"videoId": "top menu"},
+}
+
+
+def test_find_first():
+    assert search.find_first(OBJ, search.ByKey("videoId")) == "top menu"
+    assert search.find_first(OBJ, search.BySubPath("video", "videoId")) == "a"
+    with pytest.raises(search.SearchError):
+        search.find_first(OBJ, search.ByKey("missing"))
+
+
+def test_find_all():
+    assert search.find_all(OBJ, search.ByKey("videoId")) == [
+        "top menu",
+        "a",
+        "b",
+        "menu",
+    ]
+    selector = search.BySubPath("video", "videoId", return_root=True)
+    assert search.find_all(OBJ, selector) == [
+        item["video"] for item in OBJ["items"]
+    ]
+
+
+def test_query_matches_separate_searches():
+    selectors = [
+        search.ByKey("videoId"),
+        search.BySubPath("title", "runs", 0, "text"),
+        search.BySubPath("video", "videoId"),
+        search.ByKey("missing"),
+    ]
+    query = search.Query(*selectors)
+    first = query.find_first(OBJ)
+    assert first[:3] == [
+        search.find_first(OBJ, selector) for selector in selectors[:3]
+    ]
+    assert first[3] is search.NOT_FOUND
+    assert query.find_all(OBJ) == [
+        search.find_all(OBJ, selector) for selector in selectors
+    ]
+
+
+def test_query_skip_keys():
+    query = search.Query(search.ByKey("videoId"), skip_keys=["menu"])
+    assert query.find_first(OBJ) == ["a"]
+    assert query.find_all(OBJ) == [["a", "b"]]
+
+
+def test_path_cache():
+    cache = search.PathCache(search.BySubPath("video", "videoId"))
+    assert cache.find_first(OBJ) == "a"
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert cache.find_first(OBJ) == "a"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    moved = {"page": {"items": OBJ["items"][1:]}}  # layout changed
+    assert cache.find_first(moved) == "b"
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.find_first(OBJ) == "a"  # old path is still known
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    with pytest.raises(search.SearchError):
+        cache.find_first({})
@@ -0,0 +1,70 @@
+import pytest
+
+from app.youtube_parser.youtube_parser import (
+    parse_channel,
+    parse_channel_info,
+    parse_time_age,
+)
+from benchmarks.synthetic import LAYOUTS, PageGenerator, write_channels
+
+
+def expected_videos(videos) -> list[dict]:
+    return [
+        dict(id=v.id, title=v.title, style=v.style, time_ago=v.time_ago)
+        for v in videos
+    ]
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_videos_page(layout):
+    generator = PageGenerator(seed=1)
+    channel = generator.make_channel(video_count=30, stream_count=5)
+    data = parse_channel(generator.make_page(channel, "videos", layout))
+    assert data["videos"] == expected_videos(channel.videos)
+    assert data["tab_urls"][1:3] == [
+        f"{channel.canonical_base_url}/videos",
+        f"{channel.canonical_base_url}/streams",
+    ]
+    for video in channel.videos:
+        parse_time_age(video.time_ago)
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_streams_page(layout):
+    generator = PageGenerator(seed=2)
+    channel = generator.make_channel(video_count=0, stream_count=10)
+    page = generator.make_page(channel, "streams", layout)
+    data = parse_channel(page, with_tab_urls=False)
+    assert data["videos"] == expected_videos(channel.streams)
+    assert [v["style"] for v in data["videos"][:3]] == [
+        "LIVE",
+        "UPCOMING",
+        "DEFAULT",
+    ]
+
+
+def test_empty_channel():
+    generator = PageGenerator()
+    channel = generator.make_channel(video_count=0)
+    for layout in LAYOUTS:
+        page = generator.make_page(channel, "videos", layout)
+        assert parse_channel(page)["videos"] == []
+    assert parse_channel_info(page) == dict(
+        title=channel.title,
+        channel_id=channel.id,
+        canonical_base_url=channel.canonical_base_url,
+    )
+
+
+def test_deterministic(tmp_path):
+    pages = []
+    for name in ("a", "b"):
+        write_channels(tmp_path / name, 3, 5, 2, seed=7)
+        pages.append(
+            {
+                p.relative_to(tmp_path / name): p.read_text()
+                for p in (tmp_path / name).rglob("*.html")
+            }
+        )
+    assert len(pages[0]) == 6
+    assert pages[0] == pages[1]
@@ -0,0 +1,128 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import run
+from app.database.models import (
+    Forwarding,
+    TelegramChat,
+    YouTubeChannel,
+    YouTubeVideo,
+)
+from app.settings import Settings
+from app.youtube_utils import ScanContext, ScannedVideo, YouTubeChannelData
+
+
+def make_settings() -> Settings:
+    return Settings(
+        bot_token="",
+        bot_admin_ids=frozenset(),
+        log_dir=".",
+        database_url="",
+        redis_url="",
+        incremental_scan=False,
+    )
+
+
+async def get_video_ids(session_maker) -> list[str]:
+    async with session_maker() as session:
+        return list(await session.scalars(select(YouTubeVideo.original_id)))
+
+
+@pytest.fixture
+async def channel(session_maker, monkeypatch) -> YouTubeChannel:
+    """Forwarded channel, every scan finds video "new" on it."""
+    async with session_maker() as session:
+        channel = YouTubeChannel(
+            original_id="UC", canonical_base_url="", title=""
+        )
+        session.add(channel)
+        session.add(TelegramChat(-100, "channel", "", "", "", ""))
+        await session.flush()
+        session.add(Forwarding(channel.id, -100, None))
+        await session.commit()
+
+    async def scan(channels, *args, **kwargs):
+        now = datetime.now()
+        video = ScannedVideo("new", channel.id, "", now, now, "DEFAULT")
+        return {channels[0]: YouTubeChannelData(videos=[video])}
+
+    monkeypatch.setattr(run, "scan_youtube_channels", scan)
+    return channel
+
+
+async def test_update_keeps_videos_new_if_push_fails(
+    session_maker,
+    channel,
+    monkeypatch,
+):
+    pushed = []
+
+    async def push(scan_data, *args):
+        if not pushed:
+            pushed.append(None)
+            raise ConnectionError("Redis is down")
+        pushed.extend(v.original_id for d in scan_data.values() for v in d)
+
+    monkeypatch.setattr(run, "push_message_groups", push)
+    settings = make_settings()
+
+    await run.update(session_maker, settings, ScanContext(None))
+    assert await get_video_ids(session_maker) == []
+
+    await run.update(session_maker, settings, ScanContext(None))
+    assert pushed == [None, "new"]
+    assert await get_video_ids(session_maker) == ["new"]
+
+
+async def test_update_pushes_waiting_for_tags_after_commit(
+    session_maker,
+    channel,
+    monkeypatch,
+):
+    class TagStore:
+        async def get_known(self, original_ids):
+            return {}  # all videos wait for tags
+
+    async def push(scan_data, *args):
+        pass
+
+    pushed_with_tags = []
+
+    async def push_with_tags(scan_data, *args):
+        pushed_with_tags.extend(
+            v.original_id for d in scan_data.values() for v in d
+        )
+
+    insert, commit = run.insert_videos, AsyncSession.commit
+    fail_commit = []
+
+    async def insert_then_fail_commit(rows, session):
+        fail_commit.append(True)
+        return await insert(rows, session)
+
+    async def commit_once_failing(session):
+        if fail_commit:
+            fail_commit.pop()
+            raise ConnectionError("Database is down")
+        await commit(session)
+
+    monkeypatch.setattr(run, "insert_videos", insert_then_fail_commit)
+    monkeypatch.setattr(AsyncSession, "commit", commit_once_failing)
+    monkeypatch.setattr(run, "push_message_groups", push)
+    monkeypatch.setattr(run, "push_message_groups_with_tags", push_with_tags)
+    settings = make_settings()
+
+    await run.update(session_maker, settings, ScanContext(None), TagStore())
+    assert pushed_with_tags == []  # nothing is sent for rolled back videos
+    assert await get_video_ids(session_maker) == []
+
+    monkeypatch.setattr(run, "insert_videos", insert)
+    monkeypatch.setattr(AsyncSession, "commit", commit)
+    await run.update(session_maker, settings, ScanContext(None), TagStore())
+    await asyncio.gather(*run._background_tasks)
+    assert pushed_with_tags == ["new"]
+    assert await get_video_ids(session_maker) == ["new"]
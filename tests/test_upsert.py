@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.database.models import (
+    Category,
+    Forwarding,
+    TelegramChat,
+    YouTubeChannel,
+    YouTubeVideo,
+    YTChannelCategory,
+)
+from app.database.utils import (
+    add_forwarding,
+    add_yt_channel_category,
+    get_video_tags_by_ids,
+    insert_videos,
+    save_video_tags,
+)
+from app.youtube_utils import ScannedVideo
+
+
+@pytest.fixture
+async def session(session_maker):
+    async with session_maker() as session:
+        channel = YouTubeChannel(
+            original_id="UC", canonical_base_url="", title=""
+        )
+        session.add(channel)
+        session.add(
+            TelegramChat(-100, "channel", "", "", "", "")  # all not null
+        )
+        session.add(Category(name="news", order=1))
+        await session.commit()
+        yield session
+
+
+async def test_insert_videos(session):
+    now = datetime.now()
+    rows = [ScannedVideo(i, 1, i, now, now).to_row() for i in "abc"]
+    assert await insert_videos(rows[:2], session) == {"a", "b"}
+    await session.commit()
+    # saved by concurrent run, the batch doesn't fail
+    assert await insert_videos(rows, session) == {"c"}
+    await session.commit()
+    q = select(YouTubeVideo.original_id)
+    assert sorted(await session.scalars(q)) == ["a", "b", "c"]
+
+
+async def test_idempotent_links(session):
+    for _ in range(2):
+        await add_forwarding(1, -100, None, session)  # NULL thread
+        await add_yt_channel_category(1, 1, session)
+        await session.commit()
+    assert len((await session.scalars(select(Forwarding))).all()) == 1
+    assert len((await session.scalars(select(YTChannelCategory))).all()) == 1
+
+
+async def test_save_video_tags(session):
+    await save_video_tags({"a": ["x"], "b": ["y"]}, session)
+    await save_video_tags({"a": ["z"]}, session)
+    await session.commit()
+    assert await get_video_tags_by_ids(["a", "b"], session) == {
+        "a": ["z"],
+        "b": ["y"],
+    }
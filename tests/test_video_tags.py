@@ -0,0 +1,59 @@
+import asyncio
+from datetime import datetime
+
+import aiohttp
+
+from app import video_tags
+from app.video_tags import TagCache, VideoTagStore
+from app.youtube_utils import ScanContext, ScannedVideo
+
+
+def make_video(original_id: str) -> ScannedVideo:
+    now = datetime.now()
+    return ScannedVideo(original_id, None, None, now, now)
+
+
+def test_tag_cache():
+    cache = TagCache(maxsize=2)
+    cache.set("a", ["a"])
+    cache.set("b", ["b"])
+    assert cache.get("a") == ["a"]
+    cache.set("c", ["c"])  # "b" is the least recently used
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+
+async def test_video_tag_store(session_maker, monkeypatch):
+    fetched: list[str] = []
+    active = [0]
+    max_active = [0]
+
+    async def get_video_tags(url: str, context: ScanContext) -> list[str]:
+        active[0] += 1
+        max_active[0] = max(max_active[0], active[0])
+        await asyncio.sleep(0.01)
+        active[0] -= 1
+        if url.endswith("error"):
+            raise aiohttp.ClientError()
+        fetched.append(url)
+        return [url[-1]]
+
+    monkeypatch.setattr(video_tags, "get_video_tags", get_video_tags)
+    async with aiohttp.ClientSession() as http_session:
+        context = ScanContext(http_session)
+        store = VideoTagStore(session_maker, context, 10, concurrency=2)
+        videos = [make_video(i) for i in ("a", "b", "c", "error")]
+        tags = await store.fetch(videos)
+        assert tags == {"a": ["a"], "b": ["b"], "c": ["c"]}
+        assert len(fetched) == 3
+        assert max_active[0] == 2
+
+        assert await store.fetch(videos[:3]) == tags  # from cache
+        assert len(fetched) == 3
+
+        # new process, tags are in database
+        store = VideoTagStore(session_maker, context, 10, concurrency=2)
+        assert await store.get_known(["a", "b", "d"]) == {
+            "a": ["a"],
+            "b": ["b"],
+        }
@@ -0,0 +1,78 @@
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import aiohttp
+
+from app.database.models import YouTubeVideo
+from app.youtube_parser.youtube_parser import (
+    _parse_init_data,
+    parse_channel,
+    parse_channel_data,
+    parse_time_age,
+)
+from app.youtube_utils import (
+    ScanContext,
+    TabLayoutCache,
+    _make_video,
+    _parse,
+)
+
+CONTENTS_DIR = Path(__file__).parent / "test_data/channels_without_streams"
+
+TAB_URLS = [
+    "/@jakeeh/featured",
+    "/@jakeeh/videos",
+    "/@jakeeh/streams",
+    "/@jakeeh/playlists",
+]
+
+
+def test_tab_layout_cache():
+    cache = TabLayoutCache(ttl=60)
+    assert cache.get("UC") is None
+    cache.set("UC", TAB_URLS)
+    tabs = cache.get("UC")
+    assert tabs is not None and "streams" in tabs
+    cache.invalidate("UC")
+    assert cache.get("UC") is None
+
+
+def test_tab_layout_cache_ttl():
+    cache = TabLayoutCache(ttl=0.01)
+    cache.set("UC", TAB_URLS)
+    time.sleep(0.02)
+    assert cache.get("UC") is None
+
+
+def test_make_video():
+    scan_time = datetime(2024, 3, 31, 12)
+    for time_ago in ("3 weeks ago", "1 month ago", "Streamed 2 years ago"):
+        data = dict(id="a", title="A", style="DEFAULT", time_ago=time_ago)
+        video = _make_video(data, scan_time, channel_id=1)
+        assert video.creation_time == scan_time - parse_time_age(time_ago)
+
+    video = pickle.loads(pickle.dumps(video))  # scan workers send them
+    model = YouTubeVideo(**video.to_row())  # row has only model columns
+    assert model == video and model.url == video.url
+    assert (model.title, model.time_ago) == ("A", "Streamed 2 years ago")
+    assert not hasattr(video, "__dict__")
+
+
+async def test_parse_in_process_pool():
+    content = (CONTENTS_DIR / "contents/jakeeh.html").read_text("utf-8")
+    expected = parse_channel(content)
+    with ProcessPoolExecutor(1) as executor:
+        async with aiohttp.ClientSession() as http_session:
+            context = ScanContext(http_session, executor=executor)
+            data = await _parse(
+                context,
+                parse_channel_data,
+                _parse_init_data(content),
+                True,
+                frozenset(),
+                True,
+            )
+    assert data == expected